@@ -5,6 +5,7 @@ from django.utils import timezone
 from datetime import timedelta
 from faker import Faker
 from Tasks.models import Project, Task, Workflow, UserProductivity, ResourceAllocation, TaskDependency, TaskSentiment, Category, Tag, SubTask, TimeLog, Comment, Attachment, PeerReview, Communication
+from AI.dependency_graph import create_task_dependencies
 
 User = get_user_model()
 fake = Faker()
@@ -128,17 +129,19 @@ def create_demo_data(num_users=10, num_projects=30):
                     file=f"demo_attachment_{fake.file_name()}"
                 )
 
-    # Create task dependencies
-    for task in tasks:
+    # Create task dependencies; only on earlier tasks, so they never form a cycle
+    dependencies = []
+    for i, task in enumerate(tasks):
         if random.random() < 0.3:  # 30% chance of having a dependency
-            possible_dependencies = [t for t in tasks if t.project == task.project and t != task]
+            possible_dependencies = [t for t in tasks[:i] if t.project == task.project]
             if possible_dependencies:
                 dependency = random.choice(possible_dependencies)
-                TaskDependency.objects.create(
+                dependencies.append(TaskDependency(
                     task=task,
                     dependency=dependency,
                     dependency_type=random.choice(['start_to_start', 'start_to_finish', 'finish_to_start', 'finish_to_finish'])
-                )
+                ))
+    create_task_dependencies(dependencies)
 
     # Create workflows
     for project in projects:
@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from AI.scheduling import schedule_tasks
+
+PRIORITIES = ['low', 'medium', 'high']
+DEPENDENCY_TYPES = ['finish_to_start', 'finish_to_start', 'finish_to_start', 'start_to_start', 'finish_to_finish']
+
+
+def greedy_schedule(schedule):
+    # The previous AIService._optimize_schedule, kept here as the baseline
+    sorted_schedule = sorted(schedule, key=lambda x: (x['priority'], x['due_date']))
+    available_time = 8 * 60  # 8 hours in minutes
+
+    optimized_schedule = []
+    current_day = datetime.now().date()
+    daily_schedule = []
+    daily_time = 0
+
+    for task in sorted_schedule:
+        task_duration = task['estimated_completion_time'] * 60  # Convert hours to minutes
+
+        if daily_time + task_duration > available_time:
+            optimized_schedule.append({
+                'date': current_day,
+                'tasks': daily_schedule
+            })
+            current_day += timedelta(days=1)
+            daily_schedule = []
+            daily_time = 0
+
+        daily_schedule.append(task)
+        daily_time += task_duration
+
+    if daily_schedule:
+        optimized_schedule.append({
+            'date': current_day,
+            'tasks': daily_schedule
+        })
+
+    return optimized_schedule
+
+
+def synthetic_tasks(num_tasks, dependency_rate, seed):
+    rng = random.Random(seed)
+    today = date.today()
+    hours = [round(rng.lognormvariate(1, 0.8), 2) for _ in range(num_tasks)]
+    # Due dates spread over the calendar time the work needs at 8 hours a
+    # weekday, plus 25%, so that meeting every deadline is possible
+    horizon = int(sum(hours) / 8 * 7 / 5 * 1.25)
+    tasks = [
+        {
+            'task_id': task_id,
+            'description': f"Task {task_id}",
+            'estimated_completion_time': hours[task_id - 1],
+            'priority': rng.choice(PRIORITIES),
+            # The greedy baseline cannot sort tasks without a due date
+            'due_date': today + timedelta(days=rng.randint(0, horizon)),
+        }
+        for task_id in range(1, num_tasks + 1)
+    ]
+    dependencies = [
+        (rng.randint(1, task_id - 1), task_id, rng.choice(DEPENDENCY_TYPES))
+        for task_id in range(2, num_tasks + 1)
+        if rng.random() < dependency_rate
+    ]
+    return tasks, dependencies
+
+
+def schedule_quality(optimized_schedule, dependencies):
+    last_day, position = {}, {}
+    for day in optimized_schedule:
+        for task in day['tasks']:
+            last_day[task['task_id']] = day['date']
+            position.setdefault(task['task_id'], len(position))
+    due = {
+        task['task_id']: task['due_date']
+        for day in optimized_schedule for task in day['tasks']
+    }
+    late = sum(last_day[task_id] > due_date for task_id, due_date in due.items())
+    # A dependent task placed before its prerequisite
+    violations = sum(
+        position[task_id] < position[dependency_id]
+        for dependency_id, task_id, _ in dependencies
+    )
+    days = (optimized_schedule[-1]['date'] - optimized_schedule[0]['date']).days + 1 if optimized_schedule else 0
+    return {'late_tasks': late, 'dependency_violations': violations, 'calendar_days': days}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the schedule optimizer against the previous greedy day-filling version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Number of open tasks for one user')
+        parser.add_argument('--dependency-rate', type=float, default=0.3, help='Share of tasks with a prerequisite')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per scheduler; the best is reported')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        tasks, dependencies = synthetic_tasks(options['tasks'], options['dependency_rate'], options['seed'])
+        self.stdout.write(f"{len(tasks)} tasks, {len(dependencies)} dependencies")
+
+        runs = {
+            'greedy': lambda: greedy_schedule(tasks),
+            'heap': lambda: schedule_tasks(tasks, dependencies),
+        }
+        for name, run in runs.items():
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                optimized_schedule = run()
+                timings.append(time.perf_counter() - started)
+            quality = schedule_quality(optimized_schedule, dependencies)
+            self.stdout.write(self.style.SUCCESS(
+                f"{name:>6}: best {min(timings) * 1000:.1f} ms, "
+                f"{quality['late_tasks']} late, {quality['dependency_violations']} dependency violations, "
+                f"{quality['calendar_days']} calendar days"
+            ))
@@ -0,0 +1,109 @@
+import logging
+import os
+
+import joblib
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import AIModel
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = getattr(
+    settings,
+    'AI_MODEL_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_models'),
+)
+ARTIFACTS_TO_KEEP = getattr(settings, 'AI_MODEL_ARTIFACTS_TO_KEEP', 3)
+
+# AIModel names of the persisted estimators
+TASK_COMPLETION_MODEL = 'Task Completion Model'
+TASK_PRIORITY_MODEL = 'Task Priority Model'
+WORKFLOW_AUTOMATION_MODEL = 'Workflow Automation AI'
+RESOURCE_ALLOCATION_MODEL = 'Resource Allocation Model'
+TASK_DEPENDENCY_MODEL = 'Task Dependency Model'
+RISK_ASSESSMENT_MODEL = 'Risk Assessment Model'
+COLLABORATION_MODEL = 'Collaboration Model'
+
+
+class ModelNotTrainedError(RuntimeError):
+    """A model was used before update_ai_models saved an artifact for it."""
+
+    def __init__(self, name):
+        super().__init__(f"{name} has not been trained yet; run update_ai_models to train it")
+        self.name = name
+
+
+def require_model(estimator, name):
+    # load_model_artifact returns None when there is nothing to load
+    if estimator is None:
+        raise ModelNotTrainedError(name)
+    return estimator
+
+
+def save_model_artifact(name, estimator, metrics=None, feature_schema=None, watermark=None):
+    version = timezone.now().strftime('%Y%m%d%H%M%S%f')
+    relative_path = os.path.join(slugify(name), f"{version}.joblib")
+    path = os.path.join(ARTIFACT_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Uncompressed dumps let readers memory-map the numpy arrays, so every
+    # worker process on a host shares one copy of the fitted trees.
+    tmp_path = f"{path}.tmp"
+    joblib.dump(estimator, tmp_path)
+    os.replace(tmp_path, path)
+
+    ai_model, _ = AIModel.objects.get_or_create(name=name, defaults={'version': version, 'description': name})
+    ai_model.version = version
+    ai_model.artifact_path = relative_path
+    ai_model.metrics = metrics or {}
+    ai_model.feature_schema = feature_schema or []
+    ai_model.trained_at = timezone.now()
+    ai_model.training_watermark = watermark
+    ai_model.save()
+
+    _prune_old_artifacts(os.path.dirname(path))
+    logger.info(f"Saved {name} artifact version {version}")
+    return ai_model
+
+
+def load_model_artifact(name, mmap_mode='r'):
+    ai_model = (
+        AIModel.objects.filter(name=name, is_active=True)
+        .exclude(artifact_path='')
+        .order_by('-trained_at')
+        .first()
+    )
+    if ai_model is None:
+        logger.warning(f"No trained artifact found for {name}; run update_ai_models to train it")
+        return None
+
+    path = os.path.join(ARTIFACT_DIR, ai_model.artifact_path)
+    try:
+        estimator = joblib.load(path, mmap_mode=mmap_mode)
+    except (OSError, EOFError) as e:
+        logger.error(f"Error loading {name} artifact {ai_model.artifact_path}: {str(e)}")
+        return None
+
+    logger.info(f"Loaded {name} artifact version {ai_model.version}")
+    return estimator
+
+
+def training_watermark(name):
+    return AIModel.objects.filter(name=name).values_list('training_watermark', flat=True).first()
+
+
+def artifact_versions(names):
+    return tuple(
+        AIModel.objects.filter(name__in=names).order_by('name').values_list('name', 'version')
+    )
+
+
+def _prune_old_artifacts(directory):
+    artifacts = sorted(f for f in os.listdir(directory) if f.endswith('.joblib'))
+    for filename in artifacts[:-ARTIFACTS_TO_KEEP]:
+        try:
+            os.remove(os.path.join(directory, filename))
+        except OSError as e:
+            logger.warning(f"Could not remove old model artifact {filename}: {str(e)}")
@@ -0,0 +1,148 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from .pipelines import sentiment_pipeline, zero_shot_pipeline
+from .result_cache import ResultCache, pipeline_version
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_LABELS = ["high priority", "medium priority", "low priority"]
+TAG_LABELS = ["work", "personal", "urgent", "long-term", "quick", "complex"]
+HYPOTHESIS_TEMPLATE = "This example is {}."
+TAG_THRESHOLD = 0.5
+
+BATCH_SIZE = getattr(settings, 'AI_NLP_BATCH_SIZE', 32)
+
+# Unchanged texts are served from cache; only misses reach the models.
+sentiment_cache = ResultCache('sentiment')
+priority_cache = ResultCache('priority')
+tags_cache = ResultCache('tags')
+priority_and_tags_cache = ResultCache('priority-and-tags')
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def analyze_sentiment_batch(texts, batch_size=BATCH_SIZE):
+    if not texts:
+        return []
+
+    def compute(misses):
+        results = sentiment_pipeline.get()(misses, batch_size=batch_size, truncation=True)
+        return [result['label'] for result in results]
+
+    return sentiment_cache.get_or_compute_many(pipeline_version(sentiment_pipeline), texts, compute)
+
+
+def zero_shot_logits(texts, labels, batch_size=BATCH_SIZE):
+    """Run the NLI model once over every (text, label) pair.
+
+    Returns an array of shape (len(texts), len(labels), 2) holding the
+    [contradiction, entailment] logits, from which both single-label and
+    multi-label scores can be derived without another forward pass.
+    """
+    import torch
+
+    classifier = zero_shot_pipeline.get()
+    model, tokenizer = classifier.model, classifier.tokenizer
+    entailment_id = classifier.entailment_id
+    contradiction_id = -1 if entailment_id == 0 else 0
+
+    hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in labels]
+    pairs = [(text, hypothesis) for text in texts for hypothesis in hypotheses]
+
+    outputs = []
+    with torch.no_grad():
+        for chunk in batched(pairs, batch_size):
+            inputs = tokenizer(
+                [premise for premise, _ in chunk],
+                [hypothesis for _, hypothesis in chunk],
+                padding=True,
+                truncation='only_first',
+                return_tensors='pt',
+            ).to(model.device)
+            outputs.append(model(**inputs).logits.cpu().numpy())
+
+    logits = np.concatenate(outputs).reshape(len(texts), len(labels), -1)
+    return logits[..., [contradiction_id, entailment_id]]
+
+
+def _zero_shot_version(labels):
+    # Labels, template and threshold all change the output, so they are part of the key
+    return f"{pipeline_version(zero_shot_pipeline)}|{HYPOTHESIS_TEMPLATE}|{TAG_THRESHOLD}|{','.join(labels)}"
+
+
+def _softmax(x, axis=-1):
+    exp = np.exp(x - x.max(axis=axis, keepdims=True))
+    return exp / exp.sum(axis=axis, keepdims=True)
+
+
+def _priorities_from_logits(logits):
+    # Single-label: softmax of the entailment logits across the label set.
+    scores = _softmax(logits[..., 1], axis=1)
+    best = np.argmax(scores, axis=1)
+    return [
+        (PRIORITY_LABELS[j].split()[0], float(scores[i, j]))
+        for i, j in enumerate(best)
+    ]
+
+
+def _tags_from_logits(logits):
+    # Multi-label: entailment vs contradiction for each label independently.
+    scores = _softmax(logits, axis=2)[..., 1]
+    return [
+        [TAG_LABELS[j] for j in np.argsort(-row) if row[j] > TAG_THRESHOLD]
+        for row in scores
+    ]
+
+
+def predict_priority_batch(texts, batch_size=BATCH_SIZE):
+    if not texts:
+        return []
+
+    def compute(misses):
+        logits = zero_shot_logits(misses, PRIORITY_LABELS, batch_size=batch_size)
+        return [priority for priority, _ in _priorities_from_logits(logits)]
+
+    return priority_cache.get_or_compute_many(_zero_shot_version(PRIORITY_LABELS), texts, compute)
+
+
+def suggest_tags_batch(texts, batch_size=BATCH_SIZE):
+    if not texts:
+        return []
+
+    def compute(misses):
+        return _tags_from_logits(zero_shot_logits(misses, TAG_LABELS, batch_size=batch_size))
+
+    return tags_cache.get_or_compute_many(_zero_shot_version(TAG_LABELS), texts, compute)
+
+
+def classify_priority_and_tags(texts, batch_size=BATCH_SIZE):
+    if not texts:
+        return []
+
+    def compute(misses):
+        logits = zero_shot_logits(misses, PRIORITY_LABELS + TAG_LABELS, batch_size=batch_size)
+        priorities = _priorities_from_logits(logits[:, :len(PRIORITY_LABELS)])
+        tags = _tags_from_logits(logits[:, len(PRIORITY_LABELS):])
+        return [
+            {'priority': priority, 'priority_confidence': confidence, 'tags': text_tags}
+            for (priority, confidence), text_tags in zip(priorities, tags)
+        ]
+
+    version = _zero_shot_version(PRIORITY_LABELS + TAG_LABELS)
+    return [dict(result) for result in priority_and_tags_cache.get_or_compute_many(version, texts, compute)]
+
+
+def analyze_texts(texts, batch_size=BATCH_SIZE):
+    texts = list(texts)
+    sentiments = analyze_sentiment_batch(texts, batch_size=batch_size)
+    classifications = classify_priority_and_tags(texts, batch_size=batch_size)
+    return [
+        dict(classification, sentiment=sentiment)
+        for sentiment, classification in zip(sentiments, classifications)
+    ]
@@ -0,0 +1,832 @@
+import copy
+import threading
+import time
+from collections import defaultdict, deque
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import ValidationError
+
+from Tasks.models import Task, TaskDependency
+from .features import refresh_task_features
+from .models import DependencyGraphVersion
+
+# Hours assumed for tasks without an estimate
+DEFAULT_TASK_DURATION = 1.0
+
+PROJECT_GRAPH_CACHE_TTL = getattr(settings, 'AI_PROJECT_GRAPH_CACHE_TTL', 60 * 60 * 24)
+# Generations a cached graph may lag behind before it is rebuilt instead of replayed
+PROJECT_GRAPH_MAX_REPLAY = 256
+
+# DependencyGraphVersion row locked by checks that span projects
+SPANNING_SCOPE = '*'
+
+FINISH_TO_START = 'finish_to_start'
+START_TO_START = 'start_to_start'
+FINISH_TO_FINISH = 'finish_to_finish'
+START_TO_FINISH = 'start_to_finish'
+
+
+class DependencyCycleError(ValidationError, ValueError):
+    # A ValidationError so that API views answer 400 instead of 500
+    pass
+
+
+def _reads_committed_state():
+    # Outside a transaction, or in one that has not written anything these
+    # signals saw, a read of the database holds only committed rows
+    return not connection.in_atomic_block or not connection.run_on_commit
+
+
+def task_duration(task):
+    for value in (task.ai_estimated_duration, task.estimated_hours):
+        if value is not None:
+            return float(value)
+    return DEFAULT_TASK_DURATION
+
+
+class ProjectDAG:
+    """A project's tasks and dependencies as an indexed DAG.
+
+    Edges run from the prerequisite (``TaskDependency.dependency``) to the
+    dependent task and keep their ``dependency_type``. Reachability is held
+    as Python-int bitsets, one per task, so ancestor/descendant tests and
+    parallel sets are bitwise operations rather than graph walks. Edges to
+    tasks outside the graph are left out and mark it ``external``.
+    """
+
+    def __init__(self, task_ids, durations, edges):
+        self.task_ids = list(task_ids)
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.durations = [float(duration) for duration in durations]
+        self.successors = [[] for _ in self.task_ids]
+        self.predecessors = [[] for _ in self.task_ids]
+        self.edges = []
+        self.generation = None
+        self.dependency_version = 0
+        self.external = False
+        self._order = None
+        self._position = None
+        self._descendants = None
+        self._ancestors = None
+        self._schedule = None
+        self._reduction = None
+        self._critical_path = None
+        self._project_finish = None
+        for dependency_id, task_id, dependency_type in edges:
+            # Dependencies on tasks outside the project cannot be scheduled here
+            if dependency_id in self.index and task_id in self.index:
+                self.add_edge(dependency_id, task_id, dependency_type)
+            else:
+                self.external = True
+
+    @classmethod
+    def from_project(cls, project):
+        project_id = getattr(project, 'pk', project)
+        # Read first: additions that commit while the rows are read count next time
+        dependency_version = DependencyGraphVersion.objects.filter(scope=str(project_id)).values_list(
+            'version', flat=True
+        ).first()
+        tasks = list(Task.objects.filter(project=project_id).order_by('pk').annotate(
+            duration=Coalesce('ai_estimated_duration', 'estimated_hours', Value(DEFAULT_TASK_DURATION))
+        ).values_list('pk', 'duration'))
+        task_ids = [task_id for task_id, _ in tasks]
+        durations = [duration for _, duration in tasks]
+        edges = TaskDependency.objects.filter(
+            Q(task__project=project_id) | Q(dependency__project=project_id)
+        ).values_list('dependency_id', 'task_id', 'dependency_type')
+        dag = cls(task_ids, durations, edges)
+        dag.dependency_version = dependency_version or 0
+        return dag
+
+    def _join(self, source, target, descendants, ancestors):
+        # Everything at or above the source now reaches everything at or
+        # below the target, and vice versa; no full recomputation needed.
+        below = (1 << target) | descendants[target]
+        above = (1 << source) | ancestors[source]
+        for node in self._nodes(above):
+            descendants[node] |= below
+        for node in self._nodes(below):
+            ancestors[node] |= above
+
+    def add_edge(self, dependency_id, task_id, dependency_type=FINISH_TO_START):
+        source, target = self.index[dependency_id], self.index[task_id]
+        if self._descendants is not None:
+            if source == target or self._descendants[target] >> source & 1:
+                raise DependencyCycleError(f"Task {dependency_id} already depends on task {task_id}")
+            self._join(source, target, self._descendants, self._ancestors)
+        # The order stays valid when the source already precedes the target
+        if self._order is not None and self._position[source] > self._position[target]:
+            self._order = None
+        self.successors[source].append((target, dependency_type))
+        self.predecessors[target].append((source, dependency_type))
+        self.edges.append((dependency_id, task_id, dependency_type))
+        self._schedule = self._reduction = self._critical_path = None
+
+    def copy(self):
+        """A copy that edges can be added to and removed from without changing this graph."""
+        dag = copy.copy(self)
+        dag.successors = [list(successors) for successors in self.successors]
+        dag.predecessors = [list(predecessors) for predecessors in self.predecessors]
+        dag.edges = list(self.edges)
+        if self._descendants is not None:
+            dag._descendants, dag._ancestors = list(self._descendants), list(self._ancestors)
+        return dag
+
+    def overlay(self):
+        if self._descendants is None:
+            self._reachability()
+        return GraphOverlay(self, self._descendants, self._ancestors)
+
+    def check_edges(self, edges, removed=()):
+        """Raise ``DependencyCycleError`` if adding ``edges`` in turn, once the
+        ``removed`` (dependency_id, task_id) pairs are gone, would close a cycle.
+
+        The graph itself is left unchanged.
+        """
+        self.overlay().check_edges(edges, removed)
+
+    def has_edge(self, dependency_id, task_id):
+        source, target = self.index.get(dependency_id), self.index.get(task_id)
+        if source is None or target is None:
+            return False
+        return any(node == source for node, _ in self.predecessors[target])
+
+    def remove_edge(self, dependency_id, task_id):
+        source, target = self.index.get(dependency_id), self.index.get(task_id)
+        if source is None or target is None:
+            return
+        self.successors[source] = [(node, kind) for node, kind in self.successors[source] if node != target]
+        self.predecessors[target] = [(node, kind) for node, kind in self.predecessors[target] if node != source]
+        self.edges = [edge for edge in self.edges if edge[:2] != (dependency_id, task_id)]
+        # Removing an edge keeps the order valid but can shrink reachability
+        self._descendants = self._ancestors = None
+        self._schedule = self._reduction = self._critical_path = None
+
+    def prepare(self):
+        """Compute every derived structure now, so later lookups are reads."""
+        self.topological_order()
+        if self._descendants is None:
+            self._reachability()
+        self.critical_path_schedule()
+        self.transitive_reduction()
+        self.critical_path()
+        return self
+
+    def _nodes(self, mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def topological_order(self):
+        """Task indices in dependency order (Kahn's algorithm)."""
+        if self._order is None:
+            in_degree = [len(predecessors) for predecessors in self.predecessors]
+            ready = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+            order = []
+            while ready:
+                node = ready.popleft()
+                order.append(node)
+                for successor, _ in self.successors[node]:
+                    in_degree[successor] -= 1
+                    if in_degree[successor] == 0:
+                        ready.append(successor)
+            if len(order) != len(self.task_ids):
+                raise DependencyCycleError("Task dependencies contain a cycle")
+            self._order = order
+            self._position = {node: position for position, node in enumerate(order)}
+        return self._order
+
+    def topological_task_ids(self):
+        return [self.task_ids[i] for i in self.topological_order()]
+
+    def _reachability(self):
+        order = self.topological_order()
+        descendants = [0] * len(self.task_ids)
+        for node in reversed(order):
+            bits = 0
+            for successor, _ in self.successors[node]:
+                bits |= (1 << successor) | descendants[successor]
+            descendants[node] = bits
+        ancestors = [0] * len(self.task_ids)
+        for node in order:
+            bits = 0
+            for predecessor, _ in self.predecessors[node]:
+                bits |= (1 << predecessor) | ancestors[predecessor]
+            ancestors[node] = bits
+        self._descendants, self._ancestors = descendants, ancestors
+
+    def descendants_mask(self, task_id):
+        if self._descendants is None:
+            self._reachability()
+        return self._descendants[self.index[task_id]]
+
+    def ancestors_mask(self, task_id):
+        if self._ancestors is None:
+            self._reachability()
+        return self._ancestors[self.index[task_id]]
+
+    def reaches(self, source_id, target_id):
+        return bool(self.descendants_mask(source_id) >> self.index[target_id] & 1)
+
+    def parallel_tasks(self, task_id):
+        """Tasks that are neither ancestors nor descendants of ``task_id``."""
+        node = self.index[task_id]
+        related = self.descendants_mask(task_id) | self.ancestors_mask(task_id) | (1 << node)
+        free = ((1 << len(self.task_ids)) - 1) & ~related
+        return self._ids_from_mask(free)
+
+    def _ids_from_mask(self, mask):
+        return [self.task_ids[node] for node in self._nodes(mask)]
+
+    def transitive_reduction(self):
+        """Dependency edges not implied by another path, as (dependency_id, task_id) pairs."""
+        if self._reduction is None:
+            if self._descendants is None:
+                self._reachability()
+            reduction = []
+            for source, successors in enumerate(self.successors):
+                implied = 0
+                for successor, _ in successors:
+                    implied |= self._descendants[successor]
+                for successor in {successor for successor, _ in successors}:
+                    if not implied >> successor & 1:
+                        reduction.append((self.task_ids[source], self.task_ids[successor]))
+            self._reduction = reduction
+        return self._reduction
+
+    def critical_path(self):
+        """The chain of critical tasks, per ``critical_path_schedule``, that ends the project.
+
+        Walks back from the critical task that finishes last through critical
+        prerequisites whose dependency sets its earliest start, so start-to-start
+        and the other overlapping types do not count a prerequisite's full
+        duration.
+        """
+        if self._critical_path is None:
+            schedule = self.critical_path_schedule()
+            earliest_start = [schedule[task_id]['earliest_start'] for task_id in self.task_ids]
+            critical = [i for i, task_id in enumerate(self.task_ids) if schedule[task_id]['is_critical']]
+            # The latest in dependency order among those finishing last
+            node = max(
+                critical, key=lambda i: (schedule[self.task_ids[i]]['earliest_finish'], self._position[i]), default=None
+            )
+            path = []
+            while node is not None:
+                path.append(self.task_ids[node])
+                node = next((
+                    predecessor for predecessor, dependency_type in self.predecessors[node]
+                    if schedule[self.task_ids[predecessor]]['is_critical'] and abs(
+                        self._start_after(predecessor, node, dependency_type, earliest_start) - earliest_start[node]
+                    ) < 1e-9
+                ), None)
+            self._critical_path = path[::-1]
+        return self._critical_path
+
+    def project_finish(self):
+        """Hours from the project start until its last task finishes."""
+        self.critical_path_schedule()
+        return self._project_finish
+
+    def _start_after(self, predecessor, node, dependency_type, earliest_start):
+        # Earliest start of ``node`` allowed by one incoming dependency
+        pred_start = earliest_start[predecessor]
+        pred_finish = pred_start + self.durations[predecessor]
+        if dependency_type == START_TO_START:
+            return pred_start
+        if dependency_type == FINISH_TO_FINISH:
+            return pred_finish - self.durations[node]
+        if dependency_type == START_TO_FINISH:
+            return pred_start - self.durations[node]
+        return pred_finish
+
+    def critical_path_schedule(self):
+        """Earliest/latest start and finish and slack for every task.
+
+        One forward and one backward pass in topological order. Each edge
+        constrains the dependent task according to its type: finish-to-start
+        (start after the prerequisite finishes), start-to-start,
+        finish-to-finish and start-to-finish. Returns
+        ``{task_id: {...}}`` in hours from the project start.
+        """
+        if self._schedule is not None:
+            return self._schedule
+
+        order = self.topological_order()
+        durations = self.durations
+        earliest_start = [0.0] * len(self.task_ids)
+        for node in order:
+            earliest_start[node] = max(chain([0.0], (
+                self._start_after(predecessor, node, dependency_type, earliest_start)
+                for predecessor, dependency_type in self.predecessors[node]
+            )))
+
+        project_finish = max(
+            (start + duration for start, duration in zip(earliest_start, durations)), default=0.0
+        )
+        latest_finish = [project_finish] * len(self.task_ids)
+        for node in reversed(order):
+            finish = project_finish
+            for successor, dependency_type in self.successors[node]:
+                succ_finish = latest_finish[successor]
+                succ_start = succ_finish - durations[successor]
+                if dependency_type == START_TO_START:
+                    finish = min(finish, succ_start + durations[node])
+                elif dependency_type == FINISH_TO_FINISH:
+                    finish = min(finish, succ_finish)
+                elif dependency_type == START_TO_FINISH:
+                    finish = min(finish, succ_finish + durations[node])
+                else:
+                    finish = min(finish, succ_start)
+            latest_finish[node] = finish
+
+        schedule = {}
+        for i, task_id in enumerate(self.task_ids):
+            latest_start = latest_finish[i] - durations[i]
+            slack = latest_start - earliest_start[i]
+            schedule[task_id] = {
+                'earliest_start': earliest_start[i],
+                'earliest_finish': earliest_start[i] + durations[i],
+                'latest_start': latest_start,
+                'latest_finish': latest_finish[i],
+                'slack': slack,
+                'is_critical': abs(slack) < 1e-9,
+            }
+        self._schedule, self._project_finish = schedule, project_finish
+        return schedule
+
+
+class GraphOverlay:
+    """Edges added to and removed from a ``ProjectDAG`` without changing it.
+
+    An overlay starts out sharing the graph's reachability bitsets; only
+    copies made with ``fork`` are changed. Added edges are joined into the
+    bitsets as in ``ProjectDAG.add_edge``, and tasks the graph does not know
+    become new, unconnected nodes. Removed edges are not subtracted, so the
+    bitsets may overstate reachability; when they claim a new edge closes a
+    cycle and edges were removed, a walk that skips the removed edges, and
+    only visits nodes the bitsets say can reach the goal, decides.
+    ``external`` starts out as the graph's and is set once an edge to a
+    task of another project is written.
+    """
+
+    def __init__(self, dag, descendants, ancestors):
+        self.dag = dag
+        self.descendants = descendants
+        self.ancestors = ancestors
+        self.extra = {}
+        self.added = defaultdict(set)
+        self.removed = set()
+        self.external = dag.external
+        self.version = dag.dependency_version
+
+    def fork(self):
+        overlay = GraphOverlay(self.dag, list(self.descendants), list(self.ancestors))
+        overlay.extra = dict(self.extra)
+        overlay.added = defaultdict(set, {node: set(targets) for node, targets in self.added.items()})
+        overlay.removed = set(self.removed)
+        overlay.external, overlay.version = self.external, self.version
+        return overlay
+
+    def _node(self, task_id, create=False):
+        node = self.dag.index.get(task_id, self.extra.get(task_id))
+        if node is None and create:
+            node = self.extra[task_id] = len(self.descendants)
+            self.descendants.append(0)
+            self.ancestors.append(0)
+        return node
+
+    def _closes_cycle(self, source, target):
+        if source == target:
+            return True
+        if not self.descendants[target] >> source & 1:
+            return False
+        if not self.removed:
+            return True
+        seen, stack = {target}, [target]
+        while stack:
+            node = stack.pop()
+            if node == source:
+                return True
+            successors = (successor for successor, _ in self.dag.successors[node]) if node < len(self.dag) else ()
+            for successor in chain(successors, self.added.get(node, ())):
+                if (successor not in seen and (node, successor) not in self.removed
+                        and (successor == source or self.descendants[successor] >> source & 1)):
+                    seen.add(successor)
+                    stack.append(successor)
+        return False
+
+    def add(self, dependency_id, task_id, check=True):
+        source, target = self._node(dependency_id, create=True), self._node(task_id, create=True)
+        if check and self._closes_cycle(source, target):
+            raise DependencyCycleError(f"Task {dependency_id} already depends on task {task_id}")
+        self.removed.discard((source, target))
+        self.added[source].add(target)
+        self.dag._join(source, target, self.descendants, self.ancestors)
+
+    def remove(self, dependency_id, task_id):
+        source, target = self._node(dependency_id), self._node(task_id)
+        if source is not None and target is not None:
+            self.added[source].discard(target)
+            self.removed.add((source, target))
+
+    def check_edges(self, edges, removed=()):
+        """Like ``ProjectDAG.check_edges``, on top of this overlay; leaves it unchanged."""
+        edges = list(edges)
+        if len(edges) == 1 and not removed:
+            # A single insert is a bit test on the shared bitsets
+            dependency_id, task_id = edges[0][:2]
+            source, target = self._node(dependency_id), self._node(task_id)
+            if source is not None and target is not None and self._closes_cycle(source, target):
+                raise DependencyCycleError(f"Task {dependency_id} already depends on task {task_id}")
+            return
+        trial = self.fork()
+        for dependency_id, task_id in removed:
+            trial.remove(dependency_id, task_id)
+        for dependency_id, task_id, *_ in edges:
+            trial.add(dependency_id, task_id)
+
+
+class ProjectGraphCache:
+    """Prepared ``ProjectDAG``s per project, kept in process and in the shared cache.
+
+    Every committed change to a project's tasks or dependencies moves the
+    project's generation counter, kept under its own small cache key, and
+    each stored graph records the generation it was read at. A graph is
+    only reused while its generation is current, so one built from a read
+    that raced a commit is never served. Dependency writes also log the
+    (dependency_id, task_id) pairs they touched under their generation; a
+    reader whose graph is a few generations behind re-reads just those
+    pairs onto a copy instead of rebuilding. Any other change leaves a gap
+    in the log, which forces a rebuild. An up-to-date lookup costs one
+    cache round-trip.
+
+    Graphs also track how many of the project's ``DependencyGraphVersion``
+    additions they hold: cycle checks lock that row and need a graph that
+    has caught up with it, which the generation alone cannot tell them
+    while a commit has not been logged yet.
+    """
+
+    def __init__(self, ttl=PROJECT_GRAPH_CACHE_TTL, max_replay=PROJECT_GRAPH_MAX_REPLAY):
+        self.ttl = ttl
+        self.max_replay = max_replay
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def _graph_key(self, project_id):
+        return f"ai:project-graph:{project_id}"
+
+    def _generation_key(self, project_id):
+        return f"ai:project-graph:{project_id}:generation"
+
+    def _changes_key(self, project_id, generation):
+        return f"ai:project-graph:{project_id}:changes:{generation}"
+
+    def get(self, project, dependency_version=0):
+        """The graph of ``project``, read from the database if none is cached or
+        the cached one holds fewer than ``dependency_version`` additions."""
+        project_id = getattr(project, 'pk', project)
+        dag = self.cached(project_id)
+        if dag is None or dag.dependency_version < dependency_version:
+            # Taken before the read: a change that commits meanwhile moves
+            # the generation on, and the graph built here is not stored
+            generation = self._generation(project_id)
+            dag = ProjectDAG.from_project(project_id).prepare()
+            self._store(project_id, dag, generation)
+        return dag
+
+    def cached(self, project_id):
+        """The current graph of ``project_id``, or None if there is none to reuse."""
+        generation = cache.get(self._generation_key(project_id))
+        if generation is None:
+            return None
+        local = self._local.get(project_id)
+        if local is not None and local.generation == generation:
+            return local
+        candidates = [dag for dag in (local, cache.get(self._graph_key(project_id)))
+                      if dag is not None and dag.generation <= generation]
+        if not candidates:
+            return None
+        dag = max(candidates, key=lambda candidate: candidate.generation)
+        if dag.generation != generation:
+            dag = self._replay(project_id, dag, generation)
+            if dag is None:
+                return None
+        if _reads_committed_state():
+            with self._lock:
+                self._local[project_id] = dag
+        return dag
+
+    def _replay(self, project_id, dag, generation):
+        missing = generation - dag.generation
+        if missing > self.max_replay:
+            return None
+        keys = [self._changes_key(project_id, dag.generation + step) for step in range(1, missing + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        pairs, versions = set(), set()
+        for key in keys:
+            changed_pairs, added_versions = changes[key]
+            pairs.update(tuple(pair) for pair in changed_pairs)
+            versions.update(added_versions)
+        # The rows as they are now, whatever order their commits logged in
+        rows = [row for row in TaskDependency.objects.filter(
+            dependency_id__in={dependency_id for dependency_id, _ in pairs},
+            task_id__in={task_id for _, task_id in pairs},
+        ).values_list('dependency_id', 'task_id', 'dependency_type') if row[:2] in pairs]
+        dag = dag.copy()
+        try:
+            for dependency_id, task_id in pairs:
+                if dag.has_edge(dependency_id, task_id):
+                    dag.remove_edge(dependency_id, task_id)
+            for row in rows:
+                dag.add_edge(*row)
+        except (KeyError, DependencyCycleError):
+            # A task the graph does not have: one created since, or another project's
+            return None
+        dag.generation = generation
+        # Additions logged out of order only count once the ones before them are in
+        while dag.dependency_version + 1 in versions:
+            dag.dependency_version += 1
+        return dag
+
+    def _generation(self, project_id):
+        key = self._generation_key(project_id)
+        # Started from the clock, so a counter recreated after an eviction
+        # never repeats a generation some stored graph was read at
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+    def _advance(self, project_id):
+        key = self._generation_key(project_id)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            self._generation(project_id)
+            return cache.incr(key)
+
+    def _store(self, project_id, dag, generation):
+        dag.generation = generation
+        # Compare-and-set: a graph whose read raced a commit, or that may hold
+        # this transaction's uncommitted rows, is used once and not kept
+        if generation is None or not _reads_committed_state():
+            return
+        if cache.get(self._generation_key(project_id)) != generation:
+            return
+        cache.set(self._graph_key(project_id), dag, self.ttl)
+        with self._lock:
+            self._local[project_id] = dag
+
+    def edges_changed(self, project_id, pairs, versions=()):
+        """Log committed writes to the dependencies between ``pairs`` of tasks.
+
+        ``versions`` are the project's ``DependencyGraphVersion`` numbers the
+        writes' additions were counted under.
+        """
+        generation = self._advance(project_id)
+        cache.set(
+            self._changes_key(project_id, generation), ([tuple(pair) for pair in pairs], list(versions)), self.ttl
+        )
+
+    def task_changed(self, project_id, task_id, duration):
+        # Most task saves (status, progress, ...) leave the graph untouched
+        dag = self.cached(project_id)
+        node = dag.index.get(task_id) if dag is not None else None
+        if node is None or dag.durations[node] != duration:
+            self.invalidate(project_id)
+
+    def invalidate(self, project_id):
+        self._advance(project_id)
+        with self._lock:
+            self._local.pop(project_id, None)
+
+
+project_graphs = ProjectGraphCache()
+
+
+class PendingDependencies:
+    """Dependency changes written in the current transaction, not yet committed.
+
+    Cached graphs only change on commit, so inside a transaction cycle
+    checks run against an overlay of the cached graph holding these
+    changes. Each change registers a no-op commit hook; Django drops the
+    hooks of savepoints that roll back and clears them all when the
+    transaction ends, so a change whose hook is gone no longer applies.
+    """
+
+    ADDED, REMOVED, SPANNING = 'added', 'removed', 'spanning'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        state = self._local.__dict__
+        entries = state.setdefault('entries', [])
+        state.setdefault('overlays', {})
+        state.setdefault('additions', defaultdict(int))
+        if not connection.in_atomic_block:
+            entries.clear()
+            state['overlays'], state['additions'] = {}, defaultdict(int)
+        elif entries:
+            # Hooks are only ever removed, never reordered; while the newest
+            # one is still in place nothing before it was rolled back.
+            hooks = connection.run_on_commit
+            *_, hook, position = entries[-1]
+            if position >= len(hooks) or hooks[position][1] is not hook:
+                positions = {id(item[1]): position for position, item in enumerate(hooks)}
+                entries[:] = [(*entry[:5], positions[id(entry[4])]) for entry in entries if id(entry[4]) in positions]
+                state['overlays'], state['additions'] = {}, defaultdict(int)
+                for project_id, _, _, change, *_ in entries:
+                    if change != self.REMOVED:
+                        state['additions'][project_id] += 1
+        return state
+
+    def record(self, project_id, dependency_id, task_id, change=ADDED):
+        if not connection.in_atomic_block:
+            return
+        state = self._state()
+
+        def hook():
+            pass
+        transaction.on_commit(hook)
+        state['entries'].append((project_id, dependency_id, task_id, change, hook, len(connection.run_on_commit) - 1))
+        if change != self.REMOVED:
+            state['additions'][project_id] += 1
+        overlay = state['overlays'].get(project_id)
+        if overlay is not None:
+            self._apply(overlay, dependency_id, task_id, change)
+
+    def _apply(self, overlay, dependency_id, task_id, change):
+        if change == self.SPANNING:
+            overlay.external = True
+        elif change == self.ADDED:
+            overlay.add(dependency_id, task_id, check=False)
+        else:
+            overlay.remove(dependency_id, task_id)
+
+    def overlay(self, project_id, version):
+        """The project's graph with this transaction's changes applied, or None
+        if the project has dependencies on other projects' tasks.
+
+        ``version`` is the project's locked ``DependencyGraphVersion``; a
+        cached graph that has not caught up with the additions committed
+        before it is read from the database again.
+        """
+        state = self._state()
+        committed = version - state['additions'][project_id]
+        overlay = state['overlays'].get(project_id)
+        # Changes only when a rolled-back savepoint released the lock meanwhile
+        if overlay is None or overlay.version != committed:
+            overlay = state['overlays'][project_id] = project_graphs.get(project_id, committed).overlay().fork()
+            overlay.version = committed
+            for entry_project_id, dependency_id, task_id, change, *_ in state['entries']:
+                if entry_project_id == project_id:
+                    self._apply(overlay, dependency_id, task_id, change)
+        return None if overlay.external else overlay
+
+
+pending_dependencies = PendingDependencies()
+
+
+def lock_dependency_scopes(scopes):
+    """Lock the ``DependencyGraphVersion`` rows of ``scopes`` (project ids, or
+    ``SPANNING_SCOPE``) until the transaction ends; returns their versions."""
+    keys = {str(scope): scope for scope in scopes}
+    if not keys:
+        return {}
+    locked = DependencyGraphVersion.objects.select_for_update().filter(scope__in=keys).order_by('scope')
+    versions = dict(locked.values_list('scope', 'version'))
+    if len(versions) < len(keys):
+        DependencyGraphVersion.objects.bulk_create(
+            [DependencyGraphVersion(scope=key) for key in keys if key not in versions], ignore_conflicts=True
+        )
+        versions = dict(locked.values_list('scope', 'version'))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def check_edges_in_database(edges, removed=()):
+    """Like ``ProjectDAG.check_edges``, walking the dependency rows themselves.
+
+    Covers edges between projects and tasks without one, which no project
+    graph holds, and sees the current transaction's uncommitted rows. Costs
+    one query per level of the walk.
+    """
+    removed = {tuple(pair[:2]) for pair in removed}
+    added = defaultdict(set)
+    for dependency_id, task_id, *_ in edges:
+        if _depends_on(dependency_id, task_id, added, removed):
+            raise DependencyCycleError(f"Task {dependency_id} already depends on task {task_id}")
+        added[dependency_id].add(task_id)
+        removed.discard((dependency_id, task_id))
+
+
+def _depends_on(dependency_id, task_id, added, removed):
+    # Whether dependency_id is task_id or one of the tasks that depend on it
+    seen = frontier = {task_id}
+    while frontier:
+        if dependency_id in frontier:
+            return True
+        rows = TaskDependency.objects.filter(dependency_id__in=frontier).values_list('dependency_id', 'task_id')
+        extra = ((node, successor) for node in frontier for successor in added.get(node, ()))
+        frontier = {successor for node, successor in chain(rows, extra)
+                    if (node, successor) not in removed and successor not in seen}
+        seen = seen | frontier
+    return False
+
+
+def validate_dependencies(edges, removed=()):
+    """Check that adding ``edges`` ((dependency_id, task_id, dependency_type)
+    tuples) would not create a dependency cycle, and count them as written
+    by the current transaction.
+
+    Runs in the transaction that writes the rows and locks the
+    ``DependencyGraphVersion`` rows of the projects they touch until it
+    ends, so concurrent writes to a project are checked one at a time.
+    Edges within a project are checked against its cached graph, a bit
+    test for a single insert, with the transaction's own uncommitted
+    changes applied on top (see ``PendingDependencies``). Edges between
+    projects or tasks without one, and projects that already have such
+    edges, are checked by walking the rows instead, under one more lock
+    shared by all those checks. ``removed`` names edges the write replaces.
+
+    Returns ``{project_id: (edges, versions)}``: the edges touching each
+    project and the ``DependencyGraphVersion`` numbers they were counted
+    under, for ``ProjectGraphCache.edges_changed``.
+    """
+    edges, removed = list(edges), list(removed)
+    for dependency_id, task_id, *_ in edges:
+        if dependency_id == task_id:
+            raise DependencyCycleError(f"Task {task_id} cannot depend on itself")
+
+    task_ids = {task_id for edge in edges for task_id in edge[:2]}
+    projects = dict(Task.objects.filter(pk__in=task_ids).values_list('pk', 'project_id'))
+    touching, spanning = defaultdict(list), set()
+    for edge in edges:
+        touched = {projects.get(edge[0]), projects.get(edge[1])}
+        if len(touched) > 1 or None in touched:
+            spanning.add(tuple(edge[:2]))
+        for project_id in touched - {None}:
+            touching[project_id].append(edge)
+
+    versions = lock_dependency_scopes(touching)
+    overlays = {} if spanning else {
+        project_id: pending_dependencies.overlay(project_id, versions[project_id]) for project_id in touching
+    }
+    if spanning or None in overlays.values():
+        # Cycles through other projects' tasks are in no single graph
+        lock_dependency_scopes([SPANNING_SCOPE])
+        check_edges_in_database(edges, removed)
+    else:
+        try:
+            for project_id, overlay in overlays.items():
+                overlay.check_edges(touching[project_id], removed)
+        except DependencyCycleError:
+            # Cached graphs keep edges other transactions have deleted since
+            check_edges_in_database(edges, removed)
+
+    written = {}
+    for project_id, project_edges in touching.items():
+        for pair in removed:
+            pending_dependencies.record(project_id, *pair[:2], change=PendingDependencies.REMOVED)
+        for dependency_id, task_id, *_ in project_edges:
+            change = PendingDependencies.SPANNING if (dependency_id, task_id) in spanning else PendingDependencies.ADDED
+            pending_dependencies.record(project_id, dependency_id, task_id, change=change)
+        DependencyGraphVersion.objects.filter(scope=str(project_id)).update(version=F('version') + len(project_edges))
+        version = versions[project_id]
+        written[project_id] = (project_edges, list(range(version + 1, version + len(project_edges) + 1)))
+    return written
+
+
+def create_task_dependencies(dependencies, batch_size=None):
+    """Insert unsaved ``TaskDependency`` instances in bulk after checking for cycles.
+
+    The whole batch is validated in one pass per project before anything is
+    written; if any edge would close a cycle, ``DependencyCycleError`` is
+    raised and no rows are created. Cached project graphs pick the new
+    edges up once the insert commits.
+    """
+    dependencies = list(dependencies)
+    task_ids = {dependency.task_id for dependency in dependencies}
+    with transaction.atomic():
+        written = validate_dependencies(
+            (dependency.dependency_id, dependency.task_id, dependency.dependency_type) for dependency in dependencies
+        )
+        # bulk_create sends no post_save, so do what the signal handlers would
+        created = TaskDependency.objects.bulk_create(dependencies, batch_size=batch_size)
+        for project_id, (edges, versions) in written.items():
+            pairs = [edge[:2] for edge in edges]
+            transaction.on_commit(
+                lambda project_id=project_id, pairs=pairs, versions=versions:
+                    project_graphs.edges_changed(project_id, pairs, versions)
+            )
+        transaction.on_commit(lambda: refresh_task_features(task_ids))
+    return created
@@ -0,0 +1,115 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Point at a local stub server to run risk assessment offline.
+EXTERNAL_SIGNALS_BASE_URL = getattr(settings, 'AI_EXTERNAL_SIGNALS_BASE_URL', 'https://api.example.com')
+EXTERNAL_SIGNALS_TIMEOUT = getattr(settings, 'AI_EXTERNAL_SIGNALS_TIMEOUT', (3, 10))
+# Signals younger than the TTL are fresh; older ones are still served, while
+# a background refresh runs, until they reach the max age.
+EXTERNAL_SIGNALS_TTL = getattr(settings, 'AI_EXTERNAL_SIGNALS_TTL', 15 * 60)
+EXTERNAL_SIGNALS_MAX_AGE = getattr(settings, 'AI_EXTERNAL_SIGNALS_MAX_AGE', 24 * 60 * 60)
+
+CACHE_KEY = 'ai:external-signals'
+REFRESH_LOCK_KEY = 'ai:external-signals:refreshing'
+
+ENDPOINTS = {
+    'economic': '/economic-indicators',
+    'weather': '/weather-forecast',
+    'industry': '/industry-trends',
+}
+
+
+class ExternalSignalFetcher:
+    """Fetches the external risk signals concurrently and caches them.
+
+    The three endpoints are requested in parallel over one pooled session.
+    The combined signals are stored in the shared cache; stale values are
+    returned immediately while one background refresh (per cluster, guarded
+    by a cache lock) fetches new ones.
+    """
+
+    def __init__(self, base_url=EXTERNAL_SIGNALS_BASE_URL, timeout=EXTERNAL_SIGNALS_TIMEOUT,
+                 ttl=EXTERNAL_SIGNALS_TTL, max_age=EXTERNAL_SIGNALS_MAX_AGE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._executor = None
+
+    def get_frame(self):
+        return pd.DataFrame({name: [value] for name, value in self.get_signals().items()})
+
+    def get_signals(self):
+        cached = cache.get(CACHE_KEY)
+        if cached is None:
+            return self.refresh()
+
+        age = time.time() - cached['fetched_at']
+        if age > self.ttl:
+            self._refresh_in_background()
+        return cached['signals']
+
+    def refresh(self):
+        self._ensure_pool()
+        futures = {name: self._executor.submit(self._fetch, path) for name, path in ENDPOINTS.items()}
+        data = {name: future.result() for name, future in futures.items()}
+
+        signals = {
+            'market_volatility': data['economic']['market_volatility'],
+            'economic_growth': data['economic']['gdp_growth_rate'],
+            'industry_disruption_level': data['industry']['disruption_level'],
+            'weather_severity': data['weather']['severity_index'],
+        }
+        cache.set(CACHE_KEY, {'signals': signals, 'fetched_at': time.time()}, self.max_age)
+        return signals
+
+    def _refresh_in_background(self):
+        if not cache.add(REFRESH_LOCK_KEY, True, timeout=60):
+            return
+        threading.Thread(target=self._background_refresh, name='external-signals-refresh', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+            logger.info("Refreshed external risk signals")
+        except Exception as e:
+            logger.warning(f"Background refresh of external risk signals failed: {str(e)}")
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+    def _fetch(self, path):
+        response = self._session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _ensure_pool(self):
+        # Sessions and threads do not survive a fork; rebuild them per process.
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            session = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=['GET'])
+            adapter = HTTPAdapter(pool_connections=len(ENDPOINTS), pool_maxsize=len(ENDPOINTS) * 2, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+            self._executor = ThreadPoolExecutor(max_workers=len(ENDPOINTS), thread_name_prefix='external-signals')
+            self._pid = os.getpid()
+
+
+external_signals = ExternalSignalFetcher()
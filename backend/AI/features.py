@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from django.db.models import Count, F, FloatField, Func, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Length
+
+from Tasks.models import Task, Project, UserProfile, SubTask, Comment, Attachment, TaskDependency
+from .models import TaskFeatures
+
+TASK_FEATURE_NAMES = [
+    'description_length', 'due_date', 'start_date', 'category', 'num_tags', 'progress',
+    'recurring', 'num_subtasks', 'num_comments', 'num_attachments', 'priority',
+]
+CATEGORICAL_TASK_FEATURES = [TASK_FEATURE_NAMES.index('category'), TASK_FEATURE_NAMES.index('priority')]
+STORED_FEATURE_FIELDS = TASK_FEATURE_NAMES + ['num_dependencies']
+
+PRIORITY_MAP = {'low': 'low', 'medium': 'medium', 'high': 'high', 'urgent': 'urgent'}
+
+REFRESH_BATCH_SIZE = 1000
+DATASET_CHUNK_SIZE = 2000
+
+
+def _related_count(model, fk='task'):
+    # Correlated COUNT subqueries avoid the row fan-out of joining four
+    # one-to-many relations in the same query.
+    counts = (
+        model.objects.filter(**{fk: OuterRef('pk')})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _related_average(model, field, fk):
+    # AVG without GROUP BY over the rows correlated to the outer project
+    averages = (
+        model.objects.filter(**{fk: OuterRef('pk')})
+        .order_by()
+        .annotate(average=Func(F(field), function='AVG', output_field=FloatField()))
+        .values('average')[:1]
+    )
+    return Coalesce(Subquery(averages, output_field=FloatField()), 0.0)
+
+
+def annotate_task_features(queryset):
+    return queryset.annotate(
+        feature_description_length=Coalesce(Length('description'), 0),
+        feature_num_tags=_related_count(Task.tags.through),
+        feature_num_subtasks=_related_count(SubTask),
+        feature_num_comments=_related_count(Comment),
+        feature_num_attachments=_related_count(Attachment),
+        feature_num_dependencies=_related_count(TaskDependency),
+    )
+
+
+def annotate_project_features(queryset):
+    """Annotate the per-project aggregates used by the training datasets.
+
+    Task counts are conditional ``Count``s over one join; team aggregates are
+    correlated subqueries so the two multi-valued relations never multiply
+    each other's rows.
+    """
+    return queryset.annotate(
+        feature_num_tasks=Count('tasks'),
+        feature_num_completed_tasks=Count('tasks', filter=Q(tasks__status='completed')),
+        feature_num_high_priority_tasks=Count('tasks', filter=Q(tasks__priority='high')),
+        feature_team_size=_related_count(Project.team.through, fk='project'),
+        feature_avg_team_experience=_related_average(UserProfile, 'years_of_experience', 'user__team_projects'),
+        feature_avg_team_workload=_related_average(UserProfile, 'workload', 'user__team_projects'),
+    )
+
+
+def project_dataset(queryset, columns):
+    """Stream ``{column: field}`` from an annotated project queryset into a DataFrame.
+
+    ``project_duration`` is derived in pandas from ``start_date`` and
+    ``end_date``, which must then not be requested as columns themselves.
+    """
+    fields = list(columns.values())
+    with_duration = 'project_duration' in columns
+    if with_duration:
+        fields = [field for field in fields if field != 'project_duration'] + ['start_date', 'end_date']
+
+    rows = annotate_project_features(queryset.order_by()).values_list(*fields)
+    frame = pd.DataFrame.from_records(rows.iterator(chunk_size=DATASET_CHUNK_SIZE), columns=fields)
+
+    if with_duration:
+        end_dates = pd.to_datetime(frame.pop('end_date'), utc=True)
+        frame['project_duration'] = (end_dates - pd.to_datetime(frame.pop('start_date'), utc=True)).dt.days
+    renames = {field: column for column, field in columns.items() if column != 'project_duration'}
+    return frame.rename(columns=renames)[list(columns)]
+
+
+def _timestamp(value):
+    return value.timestamp() if value else 0
+
+
+def refresh_task_features(task_ids=None):
+    """Recompute the stored feature rows for the given tasks (all when None)."""
+    tasks = Task.objects.all() if task_ids is None else Task.objects.filter(pk__in=list(task_ids))
+    rows = annotate_task_features(tasks.order_by()).values_list(
+        'pk', 'feature_description_length', 'due_date', 'start_date', 'category_id',
+        'feature_num_tags', 'progress', 'recurring', 'feature_num_subtasks',
+        'feature_num_comments', 'feature_num_attachments', 'feature_num_dependencies', 'priority',
+    )
+
+    batch = []
+    refreshed = 0
+    for row in rows.iterator(chunk_size=REFRESH_BATCH_SIZE):
+        batch.append(TaskFeatures(
+            task_id=row[0],
+            description_length=row[1],
+            due_date=_timestamp(row[2]),
+            start_date=_timestamp(row[3]),
+            category=row[4] or 0,
+            num_tags=row[5],
+            progress=row[6],
+            recurring=1 if row[7] else 0,
+            num_subtasks=row[8],
+            num_comments=row[9],
+            num_attachments=row[10],
+            num_dependencies=row[11],
+            priority=PRIORITY_MAP.get((row[12] or '').lower(), 'medium'),
+        ))
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            refreshed += _upsert_task_features(batch)
+            batch = []
+    if batch:
+        refreshed += _upsert_task_features(batch)
+    return refreshed
+
+
+def _upsert_task_features(batch):
+    TaskFeatures.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['task'],
+        update_fields=STORED_FEATURE_FIELDS + ['updated_at'],
+    )
+    return len(batch)
+
+
+def build_task_features(queryset, extra_fields=()):
+    """Build the task feature matrix for a queryset from the feature store.
+
+    Returns ``(ids, X, extras)`` where ``X`` has one row per task with the
+    columns in ``TASK_FEATURE_NAMES`` and ``extras`` maps each requested extra
+    field to its list of values, aligned with ``ids``. Tasks without a stored
+    row yet are computed and stored first.
+    """
+    missing = list(queryset.filter(ai_features__isnull=True).values_list('pk', flat=True))
+    if missing:
+        refresh_task_features(missing)
+
+    rows = list(queryset.values_list(
+        'pk', *[f'ai_features__{name}' for name in TASK_FEATURE_NAMES], *extra_fields
+    ))
+
+    ids = [row[0] for row in rows]
+    X = np.empty((len(rows), len(TASK_FEATURE_NAMES)), dtype=object)
+    for i, row in enumerate(rows):
+        X[i] = row[1:1 + len(TASK_FEATURE_NAMES)]
+
+    offset = 1 + len(TASK_FEATURE_NAMES)
+    extras = {
+        field: [row[offset + position] for row in rows]
+        for position, field in enumerate(extra_fields)
+    }
+    return ids, X, extras
+
+
+def task_feature_row(task):
+    _, X, _ = build_task_features(Task.objects.filter(pk=task.pk))
+    return X[0]
@@ -0,0 +1,119 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_QUANTILES = (0.1, 0.9)
+
+MAX_BATCH_SIZE = getattr(settings, 'AI_INFERENCE_MAX_BATCH_SIZE', 64)
+MAX_WAIT = getattr(settings, 'AI_INFERENCE_MAX_WAIT_MS', 5) / 1000
+# Longest a caller waits for its batched result, in seconds
+PREDICT_TIMEOUT = getattr(settings, 'AI_INFERENCE_TIMEOUT', 30)
+IDLE_TIMEOUT = 60
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one vectorized call.
+
+    Callers block in ``predict`` while a background thread gathers rows for at
+    most ``max_wait`` seconds (or until ``max_batch_size`` rows are queued),
+    runs ``predict_batch`` on all of them and hands each caller its own result.
+    If the batch fails, or returns a different number of results than rows,
+    every caller in it gets the error; callers wait at most ``timeout``
+    seconds (``AI_INFERENCE_TIMEOUT``) either way. The worker thread exits after sitting idle and is restarted on demand,
+    including after a fork.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT, name='model'):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def predict(self, row, timeout=PREDICT_TIMEOUT):
+        future = Future()
+        with self._lock:
+            self._ensure_worker()
+            self._queue.put((row, future))
+        return future.result(timeout)
+
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            # Threads do not survive a fork; start a fresh queue in the child.
+            self._queue = queue.Queue()
+            self._thread = None
+            self._pid = os.getpid()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=IDLE_TIMEOUT)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            results = list(self.predict_batch(rows))
+            if len(results) != len(rows):
+                # Results cannot be matched to callers; fail them all
+                raise ValueError(f"predict_batch returned {len(results)} results for {len(rows)} rows")
+        except Exception as e:
+            logger.error(f"Error running batched {self.name} prediction for {len(rows)} rows: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def forest_prediction_intervals(model, X, quantiles=CONFIDENCE_QUANTILES):
+    """Predict a whole batch with a random forest and its spread across trees.
+
+    ``model`` may be the forest itself or a Pipeline ending in one. Each tree
+    predicts the full batch once and the results are stacked into an
+    ``(n_trees, n_samples)`` array, so the cost is one call per tree rather
+    than one per tree per row. Returns ``(predictions, confidences, lower,
+    upper)`` arrays, where confidence is ``1 / (1 + std)`` across trees.
+    """
+    forest = model
+    if hasattr(model, 'steps'):
+        forest = model.steps[-1][1]
+        X = model[:-1].transform(X)
+
+    per_tree = np.stack([tree.predict(X) for tree in forest.estimators_])
+    predictions = per_tree.mean(axis=0)
+    confidences = 1 / (1 + per_tree.std(axis=0))
+    lower, upper = np.quantile(per_tree, quantiles, axis=0)
+    return predictions, confidences, lower, upper
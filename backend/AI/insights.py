@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from Tasks.models import Task, TaskDependency
+from .artifacts import (
+    artifact_versions, RESOURCE_ALLOCATION_MODEL, TASK_DEPENDENCY_MODEL, RISK_ASSESSMENT_MODEL, COLLABORATION_MODEL,
+)
+from .models import ProjectInsightsReport
+
+logger = logging.getLogger(__name__)
+
+# External risk signals and communications are not in the fingerprint, so a
+# report older than this is refreshed even when the fingerprint matches.
+INSIGHTS_REPORT_TTL = getattr(settings, 'AI_INSIGHTS_REPORT_TTL', 6 * 60 * 60)
+# Longest a refresh may take before another one can be queued
+INSIGHTS_REFRESH_LOCK_TIMEOUT = 10 * 60
+
+REPORT_MODELS = [RESOURCE_ALLOCATION_MODEL, TASK_DEPENDENCY_MODEL, RISK_ASSESSMENT_MODEL, COLLABORATION_MODEL]
+
+
+def _refresh_lock_key(project_id):
+    return f"ai:insights-report:{project_id}:refreshing"
+
+
+class ReportEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # numpy scalars and arrays from the analysis stages
+        if hasattr(o, 'tolist'):
+            return o.tolist()
+        return super().default(o)
+
+
+def insights_fingerprint(project):
+    """Hash of the project state an insights report is computed from.
+
+    Covers the project's and its tasks' ``updated_at``, the task and
+    dependency counts, the newest dependency, the team and the versions of
+    the models the report uses. Dependency edits in place, assignment
+    changes and bulk duration updates do not show up here; the signals and
+    the bulk writers clear stored fingerprints for those instead.
+    """
+    tasks = Task.objects.filter(project=project).aggregate(count=Count('pk'), updated=Max('updated_at'))
+    dependencies = TaskDependency.objects.filter(task__project=project).aggregate(count=Count('pk'), last=Max('pk'))
+    state = (
+        project.updated_at.isoformat() if project.updated_at else None,
+        tasks['count'], tasks['updated'].isoformat() if tasks['updated'] else None,
+        dependencies['count'], dependencies['last'],
+        list(project.team.order_by('pk').values_list('pk', flat=True)),
+        artifact_versions(REPORT_MODELS),
+    )
+    return hashlib.sha1(json.dumps(state, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+def save_insights_report(project, report, fingerprint):
+    report = json.loads(json.dumps(report, cls=ReportEncoder))
+    stored, _ = ProjectInsightsReport.objects.update_or_create(
+        project=project, defaults={'report': report, 'fingerprint': fingerprint, 'generated_at': timezone.now()},
+    )
+    return stored
+
+
+def _response(stored, is_stale):
+    return {**stored.report, 'generated_at': stored.generated_at, 'is_stale': is_stale}
+
+
+def cached_insights_report(project, generate):
+    """The stored insights report for ``project``, generating it if there is none.
+
+    A report whose fingerprint still matches is returned as is. One that is
+    out of date, or older than the TTL, is still returned (marked
+    ``is_stale``) while a background task, one per project at a time,
+    generates a new one with ``generate``.
+    """
+    fingerprint = insights_fingerprint(project)
+    stored = ProjectInsightsReport.objects.filter(project=project).first()
+    if stored is None:
+        return _response(save_insights_report(project, generate(project), fingerprint), False)
+
+    expired = timezone.now() - stored.generated_at > timedelta(seconds=INSIGHTS_REPORT_TTL)
+    if stored.fingerprint != fingerprint or expired:
+        schedule_insights_refresh(project.pk)
+        return _response(stored, True)
+    return _response(stored, False)
+
+
+def schedule_insights_refresh(project_id):
+    from .tasks import refresh_insights_report
+
+    if cache.add(_refresh_lock_key(project_id), True, timeout=INSIGHTS_REFRESH_LOCK_TIMEOUT):
+        transaction.on_commit(lambda: refresh_insights_report.delay(project_id))
+
+
+def refresh_stored_report(project, generate):
+    """Generate and store a new report for ``project``, then release its refresh lock."""
+    try:
+        # Taken first: changes made while generating leave the report out of date
+        fingerprint = insights_fingerprint(project)
+        save_insights_report(project, generate(project), fingerprint)
+        logger.info(f"Refreshed AI insights report for project {project.pk}")
+    finally:
+        release_refresh_lock(project.pk)
+
+
+def release_refresh_lock(project_id):
+    cache.delete(_refresh_lock_key(project_id))
+
+
+def invalidate_insights_reports(project_ids):
+    """Mark the stored reports of ``project_ids`` out of date."""
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if project_ids:
+        ProjectInsightsReport.objects.filter(project__in=project_ids).update(fingerprint='')
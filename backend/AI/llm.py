@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import random
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LLM_MODEL = getattr(settings, 'AI_LLM_MODEL', 'gpt-4')
+# Point at a local stand-in server to run the LLM jobs offline.
+OPENAI_API_BASE = getattr(settings, 'AI_OPENAI_API_BASE', None)
+LLM_CONCURRENCY = getattr(settings, 'AI_LLM_CONCURRENCY', 8)
+LLM_TIMEOUT = getattr(settings, 'AI_LLM_TIMEOUT', 30)
+LLM_MAX_RETRIES = getattr(settings, 'AI_LLM_MAX_RETRIES', 3)
+LLM_RETRY_BASE_DELAY = getattr(settings, 'AI_LLM_RETRY_BASE_DELAY', 0.5)
+LLM_BACKEND = getattr(settings, 'AI_LLM_BACKEND', 'openai')
+# Backend used when the primary one fails, e.g. 'local' for degraded mode.
+LLM_FALLBACK_BACKEND = getattr(settings, 'AI_LLM_FALLBACK_BACKEND', None)
+
+
+class ChatRequest:
+    """A single chat completion.
+
+    ``task`` names what the request is for ('sentiment', 'task_suggestions')
+    and ``context`` carries its structured inputs, so backends that do not
+    read free text can still answer it.
+    """
+
+    def __init__(self, system_prompt, prompt, max_tokens, temperature, task=None, context=None):
+        self.system_prompt = system_prompt
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.task = task
+        self.context = context or {}
+
+    @property
+    def key(self):
+        return (self.system_prompt, self.prompt, self.max_tokens, self.temperature)
+
+
+class LLMBackend:
+    name = None
+
+    @property
+    def version(self):
+        # Part of the result cache key, so switching backends never serves
+        # another backend's answers.
+        return self.name
+
+    def complete(self, request):
+        raise NotImplementedError
+
+    async def acomplete(self, request):
+        return self.complete(request)
+
+
+class OpenAIBackend(LLMBackend):
+    name = 'openai'
+
+    def __init__(self, api_key=None, model=LLM_MODEL, api_base=OPENAI_API_BASE):
+        self.api_key = api_key or getattr(settings, 'OPENAI_API_KEY', None)
+        self.model = model
+        self.api_base = api_base
+
+    @property
+    def version(self):
+        return f"{self.name}:{self.model}"
+
+    def _arguments(self, request):
+        return dict(
+            model=self.model,
+            messages=[{"role": "system", "content": request.system_prompt},
+                      {"role": "user", "content": request.prompt}],
+            max_tokens=request.max_tokens,
+            n=1,
+            temperature=request.temperature,
+            api_key=self.api_key,
+            api_base=self.api_base,
+        )
+
+    def complete(self, request):
+        import openai
+
+        response = openai.ChatCompletion.create(**self._arguments(request))
+        return response.choices[0].message['content']
+
+    async def acomplete(self, request):
+        import openai
+
+        response = await openai.ChatCompletion.acreate(**self._arguments(request))
+        return response.choices[0].message['content']
+
+
+class FallbackResponse(str):
+    """An answer from a fallback backend.
+
+    Marked transient, so result caches return it without storing it and
+    the primary backend is asked again once it recovers.
+    """
+    transient = True
+
+
+class FallbackBackend(LLMBackend):
+    """Answers from ``fallback`` whenever ``primary`` raises.
+
+    LLMFanout unwraps it, retrying ``primary`` and only asking ``fallback``
+    once the retries are spent.
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    @property
+    def version(self):
+        # Only the primary backend's answers are ever cached
+        return self.primary.version
+
+    def complete(self, request):
+        try:
+            return self.primary.complete(request)
+        except Exception as e:
+            logger.warning(f"{self.primary.name} LLM backend failed ({str(e)}); using {self.fallback.name}")
+            return FallbackResponse(self.fallback.complete(request))
+
+    async def acomplete(self, request):
+        try:
+            return await self.primary.acomplete(request)
+        except Exception as e:
+            logger.warning(f"{self.primary.name} LLM backend failed ({str(e)}); using {self.fallback.name}")
+            return FallbackResponse(await self.fallback.acomplete(request))
+
+
+def get_llm_backend(name=None, fallback=LLM_FALLBACK_BACKEND, **kwargs):
+    from .local_llm import LocalTemplateBackend
+
+    backends = {'openai': OpenAIBackend, 'local': LocalTemplateBackend}
+    name = name or LLM_BACKEND
+    if name not in backends:
+        raise ValueError(f"Unknown LLM backend '{name}'; expected one of {', '.join(backends)}")
+    backend = backends[name](**kwargs)
+    if fallback and fallback != name:
+        backend = FallbackBackend(backend, backends[fallback]())
+    return backend
+
+
+def _is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    try:
+        from openai import error as openai_error
+    except ImportError:
+        return False
+    return isinstance(error, (
+        openai_error.RateLimitError, openai_error.APIError,
+        openai_error.APIConnectionError, openai_error.ServiceUnavailableError,
+        openai_error.Timeout, openai_error.TryAgain,
+    ))
+
+
+class LLMFanout:
+    """Runs many chat completions concurrently from synchronous code.
+
+    At most ``concurrency`` requests are in flight at once, each attempt is
+    cut off after ``timeout`` seconds and transient failures are retried with
+    full-jitter exponential backoff. Identical requests in the same run share
+    one call. Requests are sent through ``backend`` (the configured one by
+    default); for a FallbackBackend the retries go to its primary and the
+    fallback answers only requests that still fail.
+    """
+
+    def __init__(self, backend=None, concurrency=LLM_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 max_retries=LLM_MAX_RETRIES, retry_base_delay=LLM_RETRY_BASE_DELAY):
+        self.backend = backend or get_llm_backend()
+        self.fallback = None
+        if isinstance(self.backend, FallbackBackend):
+            # Its own fallback would swallow every error before a retry
+            self.backend, self.fallback = self.backend.primary, self.backend.fallback
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+
+    def run(self, requests):
+        """Complete ``requests`` and return one result per request, in order.
+
+        A request that still fails after its retries yields the fallback
+        backend's answer, or ``None`` when there is none or it fails too.
+        """
+        requests = list(requests)
+        if not requests:
+            return []
+        return asyncio.run(self.complete_many(requests))
+
+    async def complete_many(self, requests):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        in_flight = {}
+        for request in requests:
+            if request.key not in in_flight:
+                in_flight[request.key] = asyncio.ensure_future(self._complete_with_retries(request, semaphore))
+        results = dict(zip(in_flight, await asyncio.gather(*in_flight.values())))
+        return [results[request.key] for request in requests]
+
+    async def _complete_with_retries(self, request, semaphore):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(self.backend.acomplete(request), self.timeout)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    logger.error(f"LLM request failed after {attempt + 1} attempts: {type(e).__name__}: {str(e)}")
+                    return await self._complete_with_fallback(request)
+                delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                logger.warning(f"LLM request failed ({type(e).__name__}: {str(e)}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _complete_with_fallback(self, request):
+        if self.fallback is None:
+            return None
+        logger.warning(f"Using the {self.fallback.name} LLM backend for the failed request")
+        try:
+            return FallbackResponse(await self.fallback.acomplete(request))
+        except Exception as e:
+            logger.error(f"{self.fallback.name} LLM backend failed too: {type(e).__name__}: {str(e)}")
+            return None
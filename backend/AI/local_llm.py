@@ -0,0 +1,106 @@
+import re
+from collections import Counter
+
+from .llm import LLMBackend
+
+WORD_RE = re.compile(r"[a-z][a-z0-9'-]+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'into', 'is', 'it',
+    'its', 'of', 'on', 'or', 'our', 'that', 'the', 'their', 'this', 'to', 'was', 'we', 'were', 'will',
+    'with', 'all', 'new', 'task', 'tasks',
+}
+
+POSITIVE_WORDS = {
+    'improve', 'improved', 'success', 'successful', 'great', 'good', 'complete', 'completed', 'done',
+    'launch', 'celebrate', 'win', 'happy', 'excited', 'easy', 'progress', 'resolved', 'enhance', 'grow',
+}
+NEGATIVE_WORDS = {
+    'bug', 'bugs', 'fail', 'failed', 'failure', 'error', 'errors', 'broken', 'blocker', 'blocked',
+    'urgent', 'problem', 'issue', 'issues', 'crash', 'delay', 'delayed', 'late', 'risk', 'complaint',
+}
+
+SUGGESTION_TEMPLATES = [
+    ("Follow up on {}", 1.0),
+    ("Plan next steps for {}", 2.0),
+    ("Review results of {}", 1.5),
+    ("Document lessons learned from {}", 1.0),
+    ("Schedule a check-in about {}", 0.5),
+]
+SUGGESTION_PRIORITIES = ['High', 'High', 'Medium', 'Medium', 'Low']
+SUGGESTIONS_PER_USER = 5
+
+
+def _words(text):
+    return [word for word in WORD_RE.findall((text or '').lower()) if word not in STOPWORDS]
+
+
+class LocalTemplateBackend(LLMBackend):
+    """Deterministic CPU-only backend for tests, benchmarks and degraded mode.
+
+    Sentiment comes from a small word lexicon and task suggestions from the
+    most frequent word pairs in the user's completed tasks, rendered in the
+    same numbered format the OpenAI prompts ask for. Cost is linear in the
+    input text and there is no network access.
+    """
+
+    name = 'local-template'
+    version = 'local-template:1'
+
+    def __init__(self, **kwargs):
+        pass
+
+    def complete(self, request):
+        if request.task == 'sentiment':
+            return self.sentiment(request.context.get('text', ''))
+        if request.task == 'task_suggestions':
+            return self.task_suggestions(
+                request.context.get('task_descriptions', []),
+                request.context.get('project_names', []),
+            )
+        raise ValueError(f"Local LLM backend cannot answer '{request.task}' requests")
+
+    def sentiment(self, text):
+        words = _words(text)
+        score = sum(word in POSITIVE_WORDS for word in words) - sum(word in NEGATIVE_WORDS for word in words)
+        if score > 0:
+            return 'positive'
+        if score < 0:
+            return 'negative'
+        return 'neutral'
+
+    def task_suggestions(self, task_descriptions, project_names):
+        phrases = Counter()
+        for description in task_descriptions:
+            words = _words(description)
+            phrases.update(' '.join(pair) for pair in zip(words, words[1:]))
+            phrases.update(words)
+        # Word pairs read better than single words, so they rank first on ties
+        ranked = sorted(phrases.items(), key=lambda item: (-item[1], -item[0].count(' '), item[0]))
+        topics, covered = [], set()
+        for phrase, _ in ranked:
+            if len(topics) == SUGGESTIONS_PER_USER:
+                break
+            if not set(phrase.split()) <= covered:
+                topics.append(phrase)
+                covered.update(phrase.split())
+        topics += [name for name in project_names if name not in topics]
+        topics = (topics or ['upcoming work'])[:SUGGESTIONS_PER_USER]
+
+        lines = []
+        for i, topic in enumerate(topics):
+            template, hours = SUGGESTION_TEMPLATES[i % len(SUGGESTION_TEMPLATES)]
+            lines += [
+                f"1. {template.format(topic)}",
+                f"2. {self._closest_project(topic, project_names)}",
+                f"3. {SUGGESTION_PRIORITIES[i % len(SUGGESTION_PRIORITIES)]}",
+                f"4. {', '.join(_words(topic)) or 'general'}",
+                f"5. {hours} hours",
+            ]
+        return '\n'.join(lines)
+
+    def _closest_project(self, topic, project_names):
+        if not project_names:
+            return 'General'
+        topic_words = set(_words(topic))
+        return max(project_names, key=lambda name: len(topic_words & set(_words(name))))
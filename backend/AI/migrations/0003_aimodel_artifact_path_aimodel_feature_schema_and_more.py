@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AI', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='artifact_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='feature_schema',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='aimodel',
+            name='trained_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AI', '0003_aimodel_artifact_path_aimodel_feature_schema_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='training_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
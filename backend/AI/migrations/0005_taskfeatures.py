@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AI', '0004_aimodel_training_watermark'),
+        ('Tasks', '0008_project_meeting_frequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskFeatures',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ai_features', serialize=False, to='Tasks.task')),
+                ('description_length', models.IntegerField(default=0)),
+                ('due_date', models.FloatField(default=0)),
+                ('start_date', models.FloatField(default=0)),
+                ('category', models.IntegerField(default=0)),
+                ('num_tags', models.IntegerField(default=0)),
+                ('progress', models.IntegerField(default=0)),
+                ('recurring', models.IntegerField(default=0)),
+                ('num_subtasks', models.IntegerField(default=0)),
+                ('num_comments', models.IntegerField(default=0)),
+                ('num_attachments', models.IntegerField(default=0)),
+                ('num_dependencies', models.IntegerField(default=0)),
+                ('priority', models.CharField(default='medium', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-17 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AI', '0005_taskfeatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIJobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('completed_with_errors', 'Completed with errors')], default='running', max_length=30)),
+                ('total_items', models.IntegerField(default=0)),
+                ('processed_items', models.IntegerField(default=0)),
+                ('failed_items', models.IntegerField(default=0)),
+                ('total_chunks', models.IntegerField(default=0)),
+                ('completed_chunks', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AIJobChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField()),
+                ('item_ids', models.JSONField(default=list)),
+                ('completed_ids', models.JSONField(default=list)),
+                ('failed_ids', models.JSONField(default=list)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='AI.aijobrun')),
+            ],
+            options={
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
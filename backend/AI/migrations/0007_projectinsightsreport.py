@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-17 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AI', '0006_aijobrun_aijobchunk'),
+        ('Tasks', '0008_project_meeting_frequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectInsightsReport',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ai_insights_report', serialize=False, to='Tasks.project')),
+                ('report', models.JSONField(default=dict)),
+                ('fingerprint', models.CharField(blank=True, default='', max_length=40)),
+                ('generated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -13,12 +13,36 @@ class AIModel(models.Model):
     api_key = models.CharField(max_length=100)
     endpoint = models.URLField()
     is_active = models.BooleanField(default=True)
+    artifact_path = models.CharField(max_length=255, blank=True, default='')
+    metrics = models.JSONField(default=dict, blank=True)
+    feature_schema = models.JSONField(default=list, blank=True)
+    trained_at = models.DateTimeField(null=True, blank=True)
+    training_watermark = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} v{self.version}"
 
+class TaskFeatures(models.Model):
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name='ai_features')
+    description_length = models.IntegerField(default=0)
+    due_date = models.FloatField(default=0)
+    start_date = models.FloatField(default=0)
+    category = models.IntegerField(default=0)
+    num_tags = models.IntegerField(default=0)
+    progress = models.IntegerField(default=0)
+    recurring = models.IntegerField(default=0)
+    num_subtasks = models.IntegerField(default=0)
+    num_comments = models.IntegerField(default=0)
+    num_attachments = models.IntegerField(default=0)
+    num_dependencies = models.IntegerField(default=0)
+    priority = models.CharField(max_length=10, default='medium')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features for Task {self.task_id}"
+
 class AIPrediction(models.Model):
     PREDICTION_TYPES = [
         ('sentiment', 'Sentiment Analysis'),
@@ -100,3 +124,61 @@ class AIFeedback(models.Model):
 
     def __str__(self):
         return f"Feedback for {'Prediction' if self.prediction else 'Recommendation'} {self.prediction.id if self.prediction else self.recommendation.id}"
+
+class AIJobRun(models.Model):
+    STATUSES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('completed_with_errors', 'Completed with errors'),
+    ]
+
+    job = models.CharField(max_length=100)
+    status = models.CharField(max_length=30, choices=STATUSES, default='running')
+    total_items = models.IntegerField(default=0)
+    processed_items = models.IntegerField(default=0)
+    failed_items = models.IntegerField(default=0)
+    total_chunks = models.IntegerField(default=0)
+    completed_chunks = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self):
+        return self.completed_chunks / self.total_chunks if self.total_chunks else 1.0
+
+    def __str__(self):
+        return f"{self.job} run {self.id} ({self.get_status_display()})"
+
+class AIJobChunk(models.Model):
+    run = models.ForeignKey(AIJobRun, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    item_ids = models.JSONField(default=list)
+    completed_ids = models.JSONField(default=list)
+    failed_ids = models.JSONField(default=list)
+    is_completed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['run', 'index']
+
+    def __str__(self):
+        return f"Chunk {self.index} of {self.run}"
+
+class ProjectInsightsReport(models.Model):
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='ai_insights_report')
+    report = models.JSONField(default=dict)
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"AI insights report for Project {self.project_id}"
+
+class DependencyGraphVersion(models.Model):
+    # A project id, or '*' for checks that span projects
+    scope = models.CharField(max_length=32, primary_key=True)
+    # Dependency additions committed to the scope so far
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Dependency graph {self.scope} v{self.version}"
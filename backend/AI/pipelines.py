@@ -0,0 +1,63 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyPipeline:
+    """Thread-safe handle that loads an NLP pipeline on first use.
+
+    spaCy and transformers are imported inside the loaders, so processes that
+    never touch NLP do not pay for the imports or the model weights.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    logger.info(f"Loading NLP pipeline '{self.name}'")
+                    try:
+                        self._pipeline = self._loader()
+                    except Exception as e:
+                        logger.error(f"Error loading NLP pipeline '{self.name}': {str(e)}")
+                        raise
+        return self._pipeline
+
+    def __call__(self, *args, **kwargs):
+        return self.get()(*args, **kwargs)
+
+    @property
+    def is_loaded(self):
+        return self._pipeline is not None
+
+
+def _load_spacy_model():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
+def _load_transformers_pipeline(task):
+    def load():
+        from transformers import pipeline
+        return pipeline(task)
+    return load
+
+
+spacy_model = LazyPipeline('en_core_web_sm', _load_spacy_model)
+sentiment_pipeline = LazyPipeline('sentiment-analysis', _load_transformers_pipeline("sentiment-analysis"))
+zero_shot_pipeline = LazyPipeline('zero-shot-classification', _load_transformers_pipeline("zero-shot-classification"))
+
+
+def preload_nlp_pipelines():
+    for handle in (spacy_model, sentiment_pipeline, zero_shot_pipeline):
+        try:
+            handle.get()
+        except Exception:
+            # Already logged; the pipeline will be retried on first use.
+            pass
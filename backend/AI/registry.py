@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .artifacts import (
+    artifact_versions, TASK_COMPLETION_MODEL, TASK_PRIORITY_MODEL, WORKFLOW_AUTOMATION_MODEL,
+    RESOURCE_ALLOCATION_MODEL, TASK_DEPENDENCY_MODEL, RISK_ASSESSMENT_MODEL, COLLABORATION_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = getattr(settings, 'AI_MODEL_REFRESH_INTERVAL', 300)
+
+
+class ModelRegistry:
+    """Process-wide store of AI service objects.
+
+    Each entry is built once per process the first time it is requested and
+    then shared by every request and thread. ``reload`` rebuilds an entry and
+    swaps it in atomically, so in-flight callers keep the old instance.
+    Entries registered with a ``version`` callable are rebuilt on access when
+    the version changes, checked at most once per ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._loaders = {}
+        self._versions = {}
+        self._instances = {}
+        self._loaded_versions = {}
+        self._checked_at = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, version=None):
+        with self._lock:
+            self._loaders[name] = loader
+            self._versions[name] = version
+            self._locks.setdefault(name, threading.Lock())
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None and not self._is_stale(name):
+            return instance
+
+        if name not in self._loaders:
+            raise KeyError(f"No AI model registered under '{name}'")
+
+        with self._locks[name]:
+            current = self._instances.get(name)
+            if current is None or current is instance:
+                current = self._build(name)
+                self._instances[name] = current
+        return current
+
+    def reload(self, name=None):
+        names = [name] if name else list(self._loaders)
+        for model_name in names:
+            with self._locks[model_name]:
+                self._instances[model_name] = self._build(model_name)
+        logger.info(f"Reloaded AI models: {', '.join(names)}")
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def warm_up(self, names=None):
+        for model_name in names or list(self._loaders):
+            try:
+                self.get(model_name)
+            except Exception as e:
+                logger.error(f"Error warming up AI model '{model_name}': {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._instances.clear()
+            self._loaded_versions.clear()
+
+    def _build(self, name):
+        logger.info(f"Loading AI model '{name}'")
+        self._loaded_versions[name] = self._current_version(name)
+        self._checked_at[name] = time.monotonic()
+        return self._loaders[name]()
+
+    def _current_version(self, name):
+        version = self._versions.get(name)
+        if version is None:
+            return None
+        try:
+            return version()
+        except Exception as e:
+            logger.error(f"Error checking version of AI model '{name}': {str(e)}")
+            return self._loaded_versions.get(name)
+
+    def _is_stale(self, name):
+        if self._versions.get(name) is None or self.refresh_interval is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at.get(name, 0) < self.refresh_interval:
+            return False
+        self._checked_at[name] = now
+        return self._current_version(name) != self._loaded_versions.get(name)
+
+
+def _service_loader(class_name):
+    def load():
+        from . import services
+        return getattr(services, class_name)()
+    return load
+
+
+def _artifact_version(*artifact_names):
+    def version():
+        return artifact_versions(artifact_names)
+    return version
+
+
+model_registry = ModelRegistry()
+
+model_registry.register('ai_service', _service_loader('AIService'),
+                        _artifact_version(TASK_COMPLETION_MODEL, TASK_PRIORITY_MODEL))
+model_registry.register('nlp_task_creator', _service_loader('NLPTaskCreator'))
+model_registry.register('workflow_automation', _service_loader('WorkflowAutomationAI'),
+                        _artifact_version(WORKFLOW_AUTOMATION_MODEL))
+model_registry.register('resource_allocation', _service_loader('ResourceAllocationAI'),
+                        _artifact_version(RESOURCE_ALLOCATION_MODEL))
+model_registry.register('task_dependency', _service_loader('TaskDependencyAnalyzer'),
+                        _artifact_version(TASK_DEPENDENCY_MODEL))
+model_registry.register('risk_assessment', _service_loader('RiskAssessmentAI'),
+                        _artifact_version(RISK_ASSESSMENT_MODEL))
+model_registry.register('collaboration', _service_loader('CollaborationAI'),
+                        _artifact_version(COLLABORATION_MODEL))
+model_registry.register('enhanced_ai_service', _service_loader('EnhancedAIService'))
+
+ARTIFACT_BACKED_MODELS = [
+    'ai_service', 'workflow_automation', 'resource_allocation',
+    'task_dependency', 'risk_assessment', 'collaboration',
+]
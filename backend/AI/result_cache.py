@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from importlib import metadata
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_TTL = getattr(settings, 'AI_RESULT_CACHE_TTL', 60 * 60 * 24)
+RESULT_CACHE_MAX_ENTRIES = getattr(settings, 'AI_RESULT_CACHE_MAX_ENTRIES', 2048)
+# Bump to invalidate every cached result, e.g. after changing a prompt.
+RESULT_CACHE_VERSION = getattr(settings, 'AI_RESULT_CACHE_VERSION', 1)
+
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFC', text or '').split())
+
+
+def pipeline_version(handle):
+    """Version string for a lazy transformers/spaCy handle, without loading it."""
+    try:
+        library = metadata.version('spacy' if handle.name.startswith('en_core') else 'transformers')
+    except metadata.PackageNotFoundError:
+        library = 'unknown'
+    return f"{handle.name}@{library}"
+
+
+class LocalLRUCache:
+    """Size-bounded in-process cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultCache:
+    """Two-tier cache for model outputs keyed by model version and input text.
+
+    Lookups hit the in-process LRU first and then the shared Django cache
+    (Redis in production); shared hits are copied into the local tier. Keys
+    are a SHA-256 of the model version and the whitespace-normalized text, so
+    a new artifact or pipeline version never serves stale results. Failures
+    of the shared tier are logged and treated as misses. Computed values
+    with a true ``transient`` attribute (answers from a fallback LLM backend)
+    are returned but not stored.
+    """
+
+    def __init__(self, namespace, ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LocalLRUCache(max_entries, ttl)
+        self._stats_lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        _caches[namespace] = self
+
+    def make_key(self, version, text):
+        digest = hashlib.sha256(
+            f"{RESULT_CACHE_VERSION}\0{version}\0{normalize_text(text)}".encode('utf-8')
+        ).hexdigest()
+        return f"ai:{self.namespace}:{digest}"
+
+    def get_many(self, version, texts):
+        """Return ``{text: value}`` for every text with a cached result."""
+        keys = {text: self.make_key(version, text) for text in set(texts)}
+        values = {}
+        for key in set(keys.values()):
+            value = self.local.get(key)
+            if value is not None:
+                values[key] = value
+        local_hits = len(values)
+
+        remote_keys = [key for key in set(keys.values()) if key not in values]
+        if remote_keys:
+            try:
+                remote = shared_cache.get_many(remote_keys)
+            except Exception as e:
+                logger.warning(f"Shared result cache unavailable for {self.namespace}: {str(e)}")
+                remote = {}
+            for key, value in remote.items():
+                self.local.set(key, value)
+                values[key] = value
+
+        with self._stats_lock:
+            self.local_hits += local_hits
+            self.shared_hits += len(values) - local_hits
+            self.misses += len(set(keys.values())) - len(values)
+        return {text: values[key] for text, key in keys.items() if key in values}
+
+    def set_many(self, version, results):
+        self._store({self.make_key(version, text): value for text, value in results.items()})
+
+    def _store(self, entries):
+        entries = {
+            key: value for key, value in entries.items()
+            if value is not None and not getattr(value, 'transient', False)
+        }
+        for key, value in entries.items():
+            self.local.set(key, value)
+        try:
+            shared_cache.set_many(entries, self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not write shared result cache for {self.namespace}: {str(e)}")
+
+    def get_or_compute_many(self, version, texts, compute):
+        """Results for ``texts`` in order, running ``compute`` on the misses only.
+
+        ``compute`` receives one text per distinct uncached key and must
+        return one result per text, in the same order.
+        """
+        texts = list(texts)
+        results = self.get_many(version, texts)
+        missing = {}
+        for text in texts:
+            if text not in results:
+                missing.setdefault(self.make_key(version, text), text)
+        if missing:
+            computed = dict(zip(missing, compute(list(missing.values()))))
+            self._store(computed)
+            for text in texts:
+                if text not in results:
+                    results[text] = computed[self.make_key(version, text)]
+        return [results[text] for text in texts]
+
+    def get_or_compute(self, version, text, compute):
+        return self.get_or_compute_many(version, [text], lambda misses: [compute(misses[0])])[0]
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+                'local_entries': len(self.local),
+            }
+
+
+_caches = {}
+
+
+def result_cache_stats():
+    return {namespace: result_cache.stats() for namespace, result_cache in _caches.items()}
@@ -0,0 +1,178 @@
+import heapq
+import logging
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg
+from django.utils import timezone
+
+from Tasks.models import UserProductivity
+from .dependency_graph import DEFAULT_TASK_DURATION, START_TO_START, FINISH_TO_FINISH, START_TO_FINISH
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_DAILY_HOURS = getattr(settings, 'AI_SCHEDULE_DAILY_HOURS', 8)
+# numpy weekmask, Monday first
+SCHEDULE_WORKDAYS = getattr(settings, 'AI_SCHEDULE_WORKDAYS', '1111100')
+# A user's capacity is their average logged hours over this many days
+CAPACITY_HISTORY_DAYS = getattr(settings, 'AI_SCHEDULE_CAPACITY_HISTORY_DAYS', 30)
+
+PRIORITY_RANK = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# One person works on one task at a time, so a task started before another
+# also finishes before it: finish-to-finish is met by starting in order, and
+# start-to-finish (conservatively) by the same rule.
+RELEASED_ON_START = (START_TO_START, FINISH_TO_FINISH, START_TO_FINISH)
+
+
+def daily_capacities(user_ids, days=CAPACITY_HISTORY_DAYS):
+    """Working hours per day for each user, from their recent productivity records."""
+    since = timezone.localdate() - timedelta(days=days)
+    averages = dict(
+        UserProductivity.objects.filter(user__in=user_ids, date__gte=since, hours_worked__gt=0)
+        .order_by().values('user').annotate(average=Avg('hours_worked')).values_list('user', 'average')
+    )
+    return {
+        user_id: min(averages[user_id], 24) if averages.get(user_id) else SCHEDULE_DAILY_HOURS
+        for user_id in user_ids
+    }
+
+
+def daily_capacity(user, days=CAPACITY_HISTORY_DAYS):
+    return daily_capacities([user.pk], days)[user.pk]
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _duration_minutes(task):
+    hours = task.get('estimated_completion_time')
+    if hours is None or hours != hours or hours < 0:
+        hours = DEFAULT_TASK_DURATION
+    return int(round(hours * 60))
+
+
+def _topological_order(successors, waiting):
+    waiting = list(waiting)
+    order = [node for node, count in enumerate(waiting) if count == 0]
+    for node in order:
+        for successor, _ in successors[node]:
+            waiting[successor] -= 1
+            if waiting[successor] == 0:
+                order.append(successor)
+    return order
+
+
+def schedule_tasks(tasks, dependencies=(), daily_hours=SCHEDULE_DAILY_HOURS, start=None,
+                   workdays=SCHEDULE_WORKDAYS, holidays=()):
+    """Lay one person's ``tasks`` out over working days.
+
+    ``tasks`` are dicts with ``task_id``, ``estimated_completion_time``
+    (hours), ``priority`` and ``due_date``. ``dependencies`` are
+    ``(dependency_id, task_id, dependency_type)`` tuples; ones naming tasks
+    outside ``tasks`` are ignored. A task becomes ready once its
+    finish-to-start prerequisites have finished and its other prerequisites
+    have started, and the ready task with the least deadline slack goes
+    next: its latest start, taking the deadlines of everything that depends
+    on it into account, then its priority. Days hold ``daily_hours`` of work
+    and skip non-working days; a task that does not fit continues on the
+    next day.
+
+    Returns ``[{'date': date, 'tasks': [...]}]`` where each entry is the task
+    dict plus the ``scheduled_hours`` spent on it that day. Runs in
+    O((tasks + dependencies) log tasks).
+    """
+    if not tasks:
+        return []
+    calendar = np.busdaycalendar(weekmask=workdays, holidays=list(holidays))
+    start = np.busday_offset(np.datetime64(start or timezone.localdate(), 'D'), 0, roll='forward', busdaycal=calendar)
+    capacity = max(int(round(daily_hours * 60)), 1)
+
+    count = len(tasks)
+    index = {task['task_id']: node for node, task in enumerate(tasks)}
+    durations = [_duration_minutes(task) for task in tasks]
+    ranks = [PRIORITY_RANK.get(str(task['priority']).lower(), len(PRIORITY_RANK)) for task in tasks]
+
+    # Deadlines in working minutes from the start; the end of the due day
+    deadlines = [math.inf] * count
+    due_days = [_as_date(task['due_date']) for task in tasks]
+    known = [node for node, day in enumerate(due_days) if day is not None]
+    if known:
+        ends = np.array([due_days[node] for node in known], dtype='datetime64[D]') + 1
+        for node, days in zip(known, np.busday_count(start, ends, busdaycal=calendar).tolist()):
+            deadlines[node] = days * capacity
+
+    successors = [[] for _ in range(count)]
+    waiting = [0] * count
+    for dependency_id, task_id, dependency_type in dependencies:
+        source, target = index.get(dependency_id), index.get(task_id)
+        if source is not None and target is not None and source != target:
+            successors[source].append((target, dependency_type))
+            waiting[target] += 1
+
+    order = _topological_order(successors, waiting)
+    if len(order) < count:
+        # Edges among tasks caught in (or behind) a cycle are dropped
+        blocked = set(range(count)) - set(order)
+        logger.warning(f"Ignoring dependencies among {len(blocked)} tasks that form a cycle")
+        for node in blocked:
+            kept = [edge for edge in successors[node] if edge[0] not in blocked]
+            for successor, _ in successors[node]:
+                if successor in blocked:
+                    waiting[successor] -= 1
+            successors[node] = kept
+        order = _topological_order(successors, waiting)
+
+    # A task must start early enough for everything after it to meet its
+    # deadline, with each edge constraining it as in critical_path_schedule
+    latest_start = [deadline - duration for deadline, duration in zip(deadlines, durations)]
+    for node in reversed(order):
+        for successor, dependency_type in successors[node]:
+            if dependency_type == START_TO_START:
+                limit = latest_start[successor]
+            elif dependency_type == FINISH_TO_FINISH:
+                limit = latest_start[successor] + durations[successor] - durations[node]
+            elif dependency_type == START_TO_FINISH:
+                limit = latest_start[successor] + durations[successor]
+            else:
+                limit = latest_start[successor] - durations[node]
+            if limit < latest_start[node]:
+                latest_start[node] = limit
+
+    ready = [(latest_start[node], ranks[node], node) for node in range(count) if waiting[node] == 0]
+    heapq.heapify(ready)
+
+    def release(node, started):
+        for successor, dependency_type in successors[node]:
+            if (dependency_type in RELEASED_ON_START) == started:
+                waiting[successor] -= 1
+                if waiting[successor] == 0:
+                    heapq.heappush(ready, (latest_start[successor], ranks[successor], successor))
+
+    days = []
+    clock = 0
+    while ready:
+        _, _, node = heapq.heappop(ready)
+        release(node, True)
+        remaining = durations[node]
+        while True:
+            day = clock // capacity
+            used = min(remaining, (day + 1) * capacity - clock)
+            if day == len(days):
+                days.append([])
+            days[day].append({**tasks[node], 'scheduled_hours': used / 60})
+            clock += used
+            remaining -= used
+            if remaining == 0:
+                break
+        release(node, False)
+
+    dates = np.busday_offset(start, np.arange(len(days)), busdaycal=calendar).astype(date)
+    return [{'date': day_date, 'tasks': day_tasks} for day_date, day_tasks in zip(dates.tolist(), days)]
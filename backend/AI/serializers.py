@@ -61,6 +61,16 @@ class AIFeedbackSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Only one of prediction or recommendation should be provided.")
         return data
 
+class BulkTaskSelectionSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    project_id = serializers.IntegerField(required=False)
+    status = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, data):
+        if not data.get('task_ids') and not data.get('project_id'):
+            raise serializers.ValidationError("task_ids or project_id is required.")
+        return data
+
 class DetailedAIPredictionSerializer(AIPredictionSerializer):
     feedback = AIFeedbackSerializer(many=True, read_only=True)
 
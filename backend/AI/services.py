@@ -1,13 +1,32 @@
-import openai
-import spacy
 from django.conf import settings
-import requests
 from .models import AIModel, AIPrediction, AIRecommendation, PeerReview, Communication
-from Tasks.models import Task, Project, Tag, Workflow
+from .registry import model_registry
+from .pipelines import spacy_model, sentiment_pipeline, zero_shot_pipeline
+from . import batching
+from .inference import MicroBatcher, forest_prediction_intervals
+from .result_cache import ResultCache, pipeline_version
+from .llm import ChatRequest, LLMFanout, get_llm_backend
+from .external_signals import external_signals
+from .team_stats import team_member_stats, invalidate_team_stats
+from .scheduling import schedule_tasks, daily_capacity
+from .workload import balance_workload, apply_task_assignments
+from .stages import analysis_stages
+from .insights import cached_insights_report, invalidate_insights_reports
+from .dependency_graph import ProjectDAG, project_graphs, DEFAULT_TASK_DURATION, FINISH_TO_START
+from .features import (
+    build_task_features, task_feature_row, refresh_task_features, project_dataset, CATEGORICAL_TASK_FEATURES,
+)
+from .artifacts import (
+    load_model_artifact, require_model, TASK_COMPLETION_MODEL, TASK_PRIORITY_MODEL, WORKFLOW_AUTOMATION_MODEL,
+    RESOURCE_ALLOCATION_MODEL, TASK_DEPENDENCY_MODEL, RISK_ASSESSMENT_MODEL, COLLABORATION_MODEL,
+)
+from Tasks.models import Task, Project, Tag, Workflow, TaskDependency
 from django.contrib.auth.models import User
-from django.db.models import Avg, Count, Q, F
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Avg, Count, Q, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from transformers import pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
@@ -20,33 +39,100 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from scipy.optimize import linear_sum_assignment
 from scipy.sparse import hstack
-import networkx as nx
-from networkx import DiGraph, topological_sort
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Any
+import json
 import logging
 from datetime import datetime, timedelta
 from dateutil import parser
-from collections import Counter
+from collections import namedtuple
 
 logger = logging.getLogger(__name__)
 
-openai.api_key = settings.OPENAI_API_KEY
+
+# Trees added per incremental completion-model update, and the forest size at
+# which an update falls back to a full retrain.
+INCREMENTAL_ESTIMATORS = getattr(settings, 'AI_INCREMENTAL_ESTIMATORS', 10)
+INCREMENTAL_MAX_ESTIMATORS = getattr(settings, 'AI_INCREMENTAL_MAX_ESTIMATORS', 300)
+
+# Model outputs keyed by model version and input text; see result_cache.
+llm_cache = ResultCache('llm')
+entity_cache = ResultCache('entities')
+task_breakdown_cache = ResultCache('task-breakdown')
+
+SUGGESTION_CACHE_TTL = getattr(settings, 'AI_SUGGESTION_CACHE_TTL', 60 * 60)
+suggestion_cache = ResultCache('task-suggestions', ttl=SUGGESTION_CACHE_TTL)
+SUGGESTION_SYSTEM_PROMPT = "You are a helpful AI assistant for a task management application."
+
+ParsedText = namedtuple('ParsedText', ['text', 'ents'])
+Entity = namedtuple('Entity', ['text', 'label_'])
 
 
 class AIService:
-    def __init__(self):
+    # Models are trained offline by the update_ai_models Celery task; pass
+    # load_models=False to get an instance that only trains. LLM calls go
+    # through llm_backend, the configured AI_LLM_BACKEND unless one is passed.
+    def __init__(self, load_models=True, llm_backend=None):
         self.openai_model = AIModel.objects.get(name='GPT-4')
-        openai.api_key = self.openai_model.api_key
-        self.task_completion_model = self._train_task_completion_model()
-        self.task_priority_model = self._train_task_priority_model()
+        self.llm_backend = llm_backend or get_llm_backend(api_key=self.openai_model.api_key or None)
+        self.task_completion_model = None
+        self.task_priority_model = None
+        if load_models:
+            self.task_completion_model = load_model_artifact(TASK_COMPLETION_MODEL)
+            self.task_priority_model = load_model_artifact(TASK_PRIORITY_MODEL)
+        # Concurrent single-task requests are coalesced into one predict call
+        self.completion_batcher = MicroBatcher(self._predict_completion_batch, name='task-completion')
+        self.priority_batcher = MicroBatcher(self._predict_priority_batch, name='task-priority')
 
     def generate_task_suggestions(self, user) -> List[Dict[str, Any]]:
-        completed_tasks = Task.objects.filter(user=user, status='completed').order_by('-completed_at')[:20]
-        task_descriptions = [task.description for task in completed_tasks]
-        projects = Project.objects.filter(user=user)
-        project_names = [project.name for project in projects]
+        request = self._suggestion_request(user)
+        try:
+            content = suggestion_cache.get_or_compute(
+                self._llm_cache_version(request),
+                request.prompt,
+                lambda text: self.llm_backend.complete(request),
+            )
+            return self._save_task_suggestions(user, content)
+        except Exception as e:
+            logger.error(f"Error generating task suggestions: {str(e)}")
+            return []
+
+    def generate_task_suggestions_for_users(self, users, fanout=None) -> Dict[int, List[Dict[str, Any]]]:
+        """Generate suggestions for many users with concurrent LLM calls.
+
+        Prompts are built up front, cached responses are reused and the rest
+        go out through an LLMFanout. Returns ``{user_id: suggestions}``;
+        users whose request failed map to an empty list.
+        """
+        users = list(users)
+        requests = {user.id: self._suggestion_request(user) for user in users}
+        if not requests:
+            return {}
+        by_prompt = {request.prompt: request for request in requests.values()}
+        fanout = fanout or LLMFanout(self.llm_backend)
+
+        contents = suggestion_cache.get_or_compute_many(
+            self._llm_cache_version(next(iter(requests.values()))),
+            [request.prompt for request in requests.values()],
+            lambda prompts: fanout.run([by_prompt[prompt] for prompt in prompts]),
+        )
+
+        results = {}
+        for user, content in zip(users, contents):
+            if content is None:
+                results[user.id] = []
+                continue
+            try:
+                results[user.id] = self._save_task_suggestions(user, content)
+            except Exception as e:
+                logger.error(f"Error saving task suggestions for user {user.id}: {str(e)}")
+                results[user.id] = []
+        return results
+
+    def _suggestion_request(self, user) -> ChatRequest:
+        task_descriptions = list(Task.objects.filter(user=user, status='completed').order_by('-completed_at').values_list('description', flat=True)[:20])
+        project_names = list(Project.objects.filter(user=user).values_list('name', flat=True))
         
         prompt = f"""
         Based on the following completed tasks: {', '.join(task_descriptions)},
@@ -58,32 +144,27 @@ class AIService:
         4. A list of relevant tags
         5. Estimated duration in hours
         """
-        
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "system", "content": "You are a helpful AI assistant for a task management application."},
-                          {"role": "user", "content": prompt}],
-                max_tokens=500,
-                n=1,
-                temperature=0.7,
+        return ChatRequest(
+            SUGGESTION_SYSTEM_PROMPT, prompt, max_tokens=500, temperature=0.7, task='task_suggestions',
+            context={'task_descriptions': task_descriptions, 'project_names': project_names},
+        )
+
+    def _llm_cache_version(self, request):
+        return f"{self.llm_backend.version}|{request.task}|max_tokens={request.max_tokens}|temperature={request.temperature}"
+
+    def _save_task_suggestions(self, user, content) -> List[Dict[str, Any]]:
+        suggestions = self._parse_openai_response(content)
+        AIRecommendation.objects.bulk_create([
+            AIRecommendation(
+                user=user,
+                model=self.openai_model,
+                recommendation_type='task_suggestion',
+                recommendation=suggestion,
+                confidence=0.85  # Assuming a fixed confidence for now
             )
-            
-            suggestions = self._parse_openai_response(response.choices[0].message['content'])
-            
-            for suggestion in suggestions:
-                AIRecommendation.objects.create(
-                    user=user,
-                    model=self.openai_model,
-                    recommendation_type='task_suggestion',
-                    recommendation=suggestion,
-                    confidence=0.85  # Assuming a fixed confidence for now
-                )
-            
-            return suggestions
-        except Exception as e:
-            logger.error(f"Error generating task suggestions: {str(e)}")
-            return []
+            for suggestion in suggestions
+        ])
+        return suggestions
 
     def _parse_openai_response(self, response: str) -> List[Dict[str, Any]]:
         suggestions = []
@@ -110,16 +191,16 @@ class AIService:
         prompt = f"Analyze the sentiment of the following task description: '{task.description}'. Respond with 'positive', 'neutral', or 'negative'."
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "system", "content": "You are a sentiment analysis AI."},
-                          {"role": "user", "content": prompt}],
-                max_tokens=10,
-                n=1,
-                temperature=0.3,
+            request = ChatRequest(
+                "You are a sentiment analysis AI.", prompt, max_tokens=10, temperature=0.3,
+                task='sentiment', context={'text': task.description},
             )
-            
-            sentiment = response.choices[0].message['content'].strip().lower()
+            # Normalized after the lookup; str methods would drop the fallback marker
+            sentiment = llm_cache.get_or_compute(
+                self._llm_cache_version(request),
+                prompt,
+                lambda text: self.llm_backend.complete(request),
+            ).strip().lower()
             
             AIPrediction.objects.create(
                 user=task.user,
@@ -137,8 +218,7 @@ class AIService:
 
     def predict_task_completion_time(self, task: Task) -> float:
         features = self._extract_task_features(task)
-        prediction = self.task_completion_model.predict([features])[0]
-        confidence = self._calculate_confidence(self.task_completion_model, features)
+        prediction, confidence = self.completion_batcher.predict(features)
 
         AIPrediction.objects.create(
             user=task.user,
@@ -153,8 +233,7 @@ class AIService:
 
     def predict_task_priority(self, task: Task) -> str:
         features = self._extract_task_features(task)
-        prediction = self.task_priority_model.predict([features])[0]
-        confidence = self.task_priority_model.predict_proba([features]).max()
+        prediction, confidence = self.priority_batcher.predict(features)
 
         AIPrediction.objects.create(
             user=task.user,
@@ -167,21 +246,96 @@ class AIService:
 
         return prediction
 
+    def predict_task_completion_times(self, tasks):
+        task_ids, X, extras = build_task_features(tasks, extra_fields=('user_id',))
+        if not task_ids:
+            return []
+
+        predictions, confidences, lower, upper = forest_prediction_intervals(
+            require_model(self.task_completion_model, TASK_COMPLETION_MODEL), X
+        )
+        estimates = [
+            {
+                'task_id': task_id,
+                'estimated_completion_time': float(predictions[i]),
+                'confidence': float(confidences[i]),
+                'interval': [float(lower[i]), float(upper[i])],
+            }
+            for i, task_id in enumerate(task_ids)
+        ]
+
+        AIPrediction.objects.bulk_create([
+            AIPrediction(
+                user_id=user_id,
+                task_id=estimate['task_id'],
+                model=self.openai_model,
+                prediction_type='completion_time',
+                prediction={'completion_time': estimate['estimated_completion_time'], 'interval': estimate['interval']},
+                confidence=estimate['confidence']
+            )
+            for estimate, user_id in zip(estimates, extras['user_id'])
+        ])
+
+        return estimates
+
+    def predict_task_priorities(self, tasks):
+        task_ids, X, extras = build_task_features(tasks, extra_fields=('user_id',))
+        if not task_ids:
+            return []
+
+        model = require_model(self.task_priority_model, TASK_PRIORITY_MODEL)
+        predictions = model.predict(X)
+        confidences = model.predict_proba(X).max(axis=1)
+        estimates = [
+            {'task_id': task_id, 'predicted_priority': prediction, 'confidence': float(confidence)}
+            for task_id, prediction, confidence in zip(task_ids, predictions, confidences)
+        ]
+
+        AIPrediction.objects.bulk_create([
+            AIPrediction(
+                user_id=user_id,
+                task_id=estimate['task_id'],
+                model=self.openai_model,
+                prediction_type='priority',
+                prediction={'priority': estimate['predicted_priority']},
+                confidence=estimate['confidence']
+            )
+            for estimate, user_id in zip(estimates, extras['user_id'])
+        ])
+
+        return estimates
+
+    def _predict_completion_batch(self, rows):
+        predictions, confidences, _, _ = forest_prediction_intervals(
+            require_model(self.task_completion_model, TASK_COMPLETION_MODEL), np.array(rows)
+        )
+        return [(float(prediction), float(confidence)) for prediction, confidence in zip(predictions, confidences)]
+
+    def _predict_priority_batch(self, rows):
+        model = require_model(self.task_priority_model, TASK_PRIORITY_MODEL)
+        predictions = model.predict(rows)
+        confidences = model.predict_proba(rows).max(axis=1)
+        return [(prediction, float(confidence)) for prediction, confidence in zip(predictions, confidences)]
+
     def _train_task_completion_model(self):
-        completed_tasks = Task.objects.filter(status='completed')
-        X = [self._extract_task_features(task) for task in completed_tasks]
-        y = [(task.completed_at - task.created_at).total_seconds() / 3600 for task in completed_tasks]
+        _, X, extras = build_task_features(
+            Task.objects.filter(status='completed'), extra_fields=('created_at', 'completed_at')
+        )
+        y = [
+            (completed_at - created_at).total_seconds() / 3600
+            for created_at, completed_at in zip(extras['created_at'], extras['completed_at'])
+        ]
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
             # Create a preprocessor for categorical variables
-        categorical_features = [3, 10]  # Indices of categorical features (category and priority)
-        numeric_features = [i for i in range(len(X[0])) if i not in categorical_features]
+        categorical_features = CATEGORICAL_TASK_FEATURES
+        numeric_features = [i for i in range(X.shape[1]) if i not in categorical_features]
     
         preprocessor = ColumnTransformer(
             transformers=[
                 ('num', StandardScaler(), numeric_features),
-                ('cat', OneHotEncoder(drop='first', sparse=False), categorical_features)
+                ('cat', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), categorical_features)
             ])
         
          # Create a pipeline with preprocessor and model
@@ -197,23 +351,22 @@ class AIService:
         mse = mean_squared_error(y_test, y_pred)
         logger.info(f"Task Completion Model - MAE: {mae}, MSE: {mse}")
 
-        return model
+        return model, {'mae': float(mae), 'mse': float(mse), 'n_samples': len(X)}
 
     def _train_task_priority_model(self):
-        tasks = Task.objects.all()
-        X = [self._extract_task_features(task) for task in tasks]
-        y = [task.priority for task in tasks]
+        _, X, extras = build_task_features(Task.objects.all(), extra_fields=('priority',))
+        y = extras['priority']
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
          # Create a preprocessor for categorical variables
-        categorical_features = [3, 10]  # Indices of categorical features (category and priority)
-        numeric_features = [i for i in range(len(X[0])) if i not in categorical_features]
+        categorical_features = CATEGORICAL_TASK_FEATURES
+        numeric_features = [i for i in range(X.shape[1]) if i not in categorical_features]
     
         preprocessor = ColumnTransformer(
             transformers=[
                 ('num', StandardScaler(), numeric_features),
-                ('cat', OneHotEncoder(drop='first', sparse=False), categorical_features)
+                ('cat', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), categorical_features)
             ])
 
         # Create a pipeline with preprocessor and model
@@ -228,102 +381,99 @@ class AIService:
 
         logger.info(f"Task Priority Model - Accuracy: {accuracy}")
 
-        return model
+        return model, {'accuracy': float(accuracy), 'n_samples': len(X)}
 
-    def _extract_task_features(self, task: Task) -> List[float]:
-        features = [
-            len(task.description),
-            task.due_date.timestamp() if task.due_date else 0,
-            task.start_date.timestamp() if task.start_date else 0,
-            task.category.id if task.category else 0,
-            len(task.tags.all()),
-            task.progress,
-            1 if task.recurring else 0,
-            len(task.subtasks.all()),
-            len(task.comments.all()),
-            len(task.attachments.all()),
-            self._encode_priority(task.priority),
-        ]
-        return features
-    
-    def _encode_priority(self, priority: str) -> str:
-        priority_map = {'low': 'low', 'medium': 'medium', 'high': 'high', 'urgent': 'urgent'}
-        return priority_map.get(priority.lower(), 'medium')
+    def _update_task_completion_model(self, model, since):
+        _, X, extras = build_task_features(
+            Task.objects.filter(status='completed', completed_at__gt=since),
+            extra_fields=('created_at', 'completed_at')
+        )
+        if not len(X):
+            return None
 
+        forest = model.named_steps['regressor']
+        if len(forest.estimators_) + INCREMENTAL_ESTIMATORS > INCREMENTAL_MAX_ESTIMATORS:
+            model, metrics = self._train_task_completion_model()
+            metrics['mode'] = 'full'
+            return model, metrics
 
-    def _calculate_confidence(self, model, features):
-        # For RandomForestRegressor, we can use the standard deviation of predictions across trees
-        predictions = [tree.predict([features])[0] for tree in model.estimators_]
-        return 1 / (1 + np.std(predictions))
+        y = [
+            (completed_at - created_at).total_seconds() / 3600
+            for created_at, completed_at in zip(extras['created_at'], extras['completed_at'])
+        ]
+        # Warm start keeps the existing trees and fits only the new ones on the delta
+        forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + INCREMENTAL_ESTIMATORS)
+        forest.fit(model.named_steps['preprocessor'].transform(X), y)
+        logger.info(f"Task Completion Model - added {INCREMENTAL_ESTIMATORS} trees for {len(X)} new tasks")
+
+        return model, {'n_new_samples': len(X), 'n_estimators': len(forest.estimators_)}
+
+    def _update_task_priority_model(self, model, since):
+        # Only tasks created since the last run: partial_fit cannot unlearn, so
+        # feeding edited tasks again would count them twice. Changed
+        # priorities are picked up by the next full retrain.
+        _, X, extras = build_task_features(Task.objects.filter(created_at__gt=since), extra_fields=('priority',))
+        if not len(X):
+            return None
 
-    def optimize_user_schedule(self, user) -> List[Dict[str, Any]]:
-        tasks = Task.objects.filter(user=user, status='open').order_by('due_date')
-        schedule = []
+        model.named_steps['classifier'].partial_fit(model.named_steps['preprocessor'].transform(X), extras['priority'])
+        logger.info(f"Task Priority Model - partial fit on {len(X)} new tasks")
 
-        for task in tasks:
-            completion_time = self.predict_task_completion_time(task)
-            priority = self.predict_task_priority(task)
-            
-            schedule.append({
-                'task_id': task.id,
-                'description': task.description,
-                'estimated_completion_time': completion_time,
-                'priority': priority,
-                'due_date': task.due_date
-            })
+        return model, {'n_new_samples': len(X)}
 
-        optimized_schedule = self._optimize_schedule(schedule)
+    def _extract_task_features(self, task: Task) -> List[float]:
+        # Same builder as training, so serving features cannot drift
+        return task_feature_row(task)
+
+    def optimize_user_schedule(self, user) -> List[Dict[str, Any]]:
+        optimized_schedule = self.build_user_schedule(user)
 
         AIRecommendation.objects.create(
             user=user,
             model=self.openai_model,
             recommendation_type='schedule_optimization',
-            recommendation={'optimized_schedule': optimized_schedule},
+            # Dates are stored as ISO strings
+            recommendation={'optimized_schedule': json.loads(json.dumps(optimized_schedule, cls=DjangoJSONEncoder))},
             confidence=0.8  # Assuming a fixed confidence for now
         )
 
         return optimized_schedule
 
-    def _optimize_schedule(self, schedule: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        # Sort tasks by priority and due date
-        sorted_schedule = sorted(schedule, key=lambda x: (x['priority'], x['due_date']))
-
-        # Calculate available time per day (assuming 8 working hours)
-        available_time = 8 * 60  # 8 hours in minutes
-
-        optimized_schedule = []
-        current_day = datetime.now().date()
-        daily_schedule = []
-        daily_time = 0
-
-        for task in sorted_schedule:
-            task_duration = task['estimated_completion_time'] * 60  # Convert hours to minutes
-
-            if daily_time + task_duration > available_time:
-                optimized_schedule.append({
-                    'date': current_day,
-                    'tasks': daily_schedule
-                })
-                current_day += timedelta(days=1)
-                daily_schedule = []
-                daily_time = 0
-
-            daily_schedule.append(task)
-            daily_time += task_duration
+    def build_user_schedule(self, user) -> List[Dict[str, Any]]:
+        tasks = Task.objects.filter(user=user, status='open').order_by('due_date')
+        # One vectorized prediction per model for all of the user's open tasks
+        completion_times = {
+            estimate['task_id']: estimate['estimated_completion_time']
+            for estimate in self.predict_task_completion_times(tasks)
+        }
+        priorities = {
+            estimate['task_id']: estimate['predicted_priority']
+            for estimate in self.predict_task_priorities(tasks)
+        }
 
-        if daily_schedule:
-            optimized_schedule.append({
-                'date': current_day,
-                'tasks': daily_schedule
-            })
+        schedule = [
+            {
+                'task_id': task_id,
+                'description': description,
+                'estimated_completion_time': completion_times[task_id],
+                'priority': priorities[task_id],
+                'due_date': due_date
+            }
+            for task_id, description, due_date in tasks.values_list('id', 'description', 'due_date')
+        ]
 
-        return optimized_schedule
+        dependencies = TaskDependency.objects.filter(task__in=tasks, dependency__in=tasks).values_list(
+            'dependency_id', 'task_id', 'dependency_type'
+        )
+        return schedule_tasks(schedule, dependencies, daily_hours=daily_capacity(user))
 
     def apply_recommendation(self, recommendation: AIRecommendation) -> bool:
         if recommendation.recommendation_type == 'task_suggestion':
             return self._apply_task_suggestion(recommendation)
         elif recommendation.recommendation_type == 'schedule_optimization':
             return self._apply_schedule_optimization(recommendation)
+        elif recommendation.recommendation_type == 'workload_balance':
+            return self._apply_workload_balance(recommendation)
         else:
             logger.error(f"Unknown recommendation type: {recommendation.recommendation_type}")
             return False
@@ -355,11 +505,16 @@ class AIService:
     def _apply_schedule_optimization(self, recommendation: AIRecommendation) -> bool:
         try:
             optimized_schedule = recommendation.recommendation['optimized_schedule']
+            scheduled = set()
             for day_schedule in optimized_schedule:
-                date = day_schedule['date']
+                start_date = datetime.fromisoformat(str(day_schedule['date']))
                 for task_data in day_schedule['tasks']:
+                    # A task split across days starts on its first one
+                    if task_data['task_id'] in scheduled:
+                        continue
+                    scheduled.add(task_data['task_id'])
                     task = Task.objects.get(id=task_data['task_id'])
-                    task.start_date = datetime.combine(date, datetime.min.time())
+                    task.start_date = start_date
                     task.due_date = task.start_date + timedelta(hours=task_data['estimated_completion_time'])
                     task.save()
             return True
@@ -367,27 +522,45 @@ class AIService:
             logger.error(f"Error applying schedule optimization: {str(e)}")
             return False
 
+    def _apply_workload_balance(self, recommendation: AIRecommendation) -> bool:
+        try:
+            balance = recommendation.recommendation
+            apply_task_assignments(balance['project_id'], balance['task_assignments'])
+            return True
+        except Exception as e:
+            logger.error(f"Error applying workload balance: {str(e)}")
+            return False
+
 class NLPTaskCreator:
-    def __init__(self):
-        self.nlp_model = self.load_nlp_model()
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
-        self.zero_shot_classifier = pipeline("zero-shot-classification")
+    # Pipelines are process-wide lazy handles: each one is loaded the first
+    # time a method needs it rather than when the creator is constructed.
+    @property
+    def nlp_model(self):
+        return spacy_model.get()
+
+    @property
+    def sentiment_analyzer(self):
+        return sentiment_pipeline.get()
+
+    @property
+    def zero_shot_classifier(self):
+        return zero_shot_pipeline.get()
 
     def create_task_from_text(self, user, text):
         try:
-            parsed_data = self.nlp_model(text)
+            parsed_data = self.parse_text(text)
             task_data = self.extract_task_data(parsed_data)
-            sentiment = self.analyze_sentiment(text)
-            task_data['sentiment'] = sentiment
+            # Sentiment, priority and tags come from one batched pass over the text
+            analysis = self.analyze_texts([text])[0]
+            task_data['sentiment'] = analysis['sentiment']
 
             task = Task.objects.create(user=user, **task_data)
             
             # Predict task priority
-            priority = self.predict_priority(text)
-            task.priority = priority
+            task.priority = analysis['priority']
             
             # Suggest tags
-            suggested_tags = self.suggest_tags(text)
+            suggested_tags = analysis['tags']
             for tag_name in suggested_tags:
                 tag, _ = Tag.objects.get_or_create(name=tag_name, user=user)
                 task.tags.add(tag)
@@ -400,12 +573,14 @@ class NLPTaskCreator:
             logger.error(f"Error creating task from text for user {user.id}: {str(e)}")
             raise
 
-    def load_nlp_model(self):
-        try:
-            return spacy.load("en_core_web_sm")
-        except Exception as e:
-            logger.error(f"Error loading NLP model: {str(e)}")
-            raise
+    def parse_text(self, text):
+        # Only the entities are used, so those are cached rather than the Doc
+        ents = entity_cache.get_or_compute(
+            pipeline_version(spacy_model),
+            text,
+            lambda text: [(ent.text, ent.label_) for ent in self.nlp_model(text).ents],
+        )
+        return ParsedText(text, [Entity(*ent) for ent in ents])
 
     def extract_task_data(self, parsed_data):
         task_data = {
@@ -450,27 +625,25 @@ class NLPTaskCreator:
         return priority_map.get(priority_text.lower(), 'medium')
 
     def analyze_sentiment(self, text):
-        result = self.sentiment_analyzer(text)[0]
-        return result['label']
+        return batching.analyze_sentiment_batch([text])[0]
 
     def predict_priority(self, text):
-        labels = ["high priority", "medium priority", "low priority"]
-        result = self.zero_shot_classifier(text, labels)
-        return result['labels'][0].split()[0]
+        return batching.predict_priority_batch([text])[0]
 
     def suggest_tags(self, text):
-        common_tags = ["work", "personal", "urgent", "long-term", "quick", "complex"]
-        result = self.zero_shot_classifier(text, common_tags, multi_label=True)
-        return [label for label, score in zip(result['labels'], result['scores']) if score > 0.5]
+        return batching.suggest_tags_batch([text])[0]
+
+    def analyze_texts(self, texts):
+        return batching.analyze_texts(texts)
 
 class WorkflowAutomationAI:
-    def __init__(self):
-        self.model = self.train_automation_model()
+    def __init__(self, load_models=True):
+        self.model = load_model_artifact(WORKFLOW_AUTOMATION_MODEL) if load_models else None
 
     def suggest_automations(self, user):
         try:
             user_data = self.collect_user_data(user)
-            suggestions = self.model.predict_proba(user_data)
+            suggestions = require_model(self.model, WORKFLOW_AUTOMATION_MODEL).predict_proba(user_data)
             formatted_suggestions = self.format_suggestions(suggestions)
 
             AIRecommendation.objects.create(
@@ -512,7 +685,7 @@ class WorkflowAutomationAI:
         
             preprocessor = ColumnTransformer(
                 transformers=[
-                    ('cat', OneHotEncoder(drop='first', sparse=False), categorical_features)
+                    ('cat', OneHotEncoder(drop='first', sparse_output=False), categorical_features)
                 ],
                 remainder='passthrough'
             )
@@ -530,7 +703,7 @@ class WorkflowAutomationAI:
             accuracy = model.score(X_test, y_test)
             logger.info(f"Workflow Automation Model - Accuracy: {accuracy}")
 
-            return model
+            return model, {'accuracy': float(accuracy), 'n_samples': len(y)}
         except Exception as e:
             logger.error(f"Error training workflow automation model: {str(e)}")
             raise
@@ -581,44 +754,52 @@ class WorkflowAutomationAI:
         return descriptions.get(automation_type, "")
 
 class EnhancedAIService:
-    def __init__(self):
-        self.nlp_task_creator = NLPTaskCreator()
-        self.workflow_automation = WorkflowAutomationAI()
-        self.resource_allocation_ai = ResourceAllocationAI()
-        self.task_dependency_analyzer = TaskDependencyAnalyzer()
-        self.risk_assessment_ai = RiskAssessmentAI()
-        self.collaboration_ai = CollaborationAI()
+    # Sub-models are resolved through the process-wide registry on each access,
+    # so a shared instance is cheap to build and picks up reloaded models.
+    @property
+    def ai_service(self):
+        return model_registry.get('ai_service')
+
+    @property
+    def nlp_task_creator(self):
+        return model_registry.get('nlp_task_creator')
+
+    @property
+    def workflow_automation(self):
+        return model_registry.get('workflow_automation')
+
+    @property
+    def resource_allocation_ai(self):
+        return model_registry.get('resource_allocation')
+
+    @property
+    def task_dependency_analyzer(self):
+        return model_registry.get('task_dependency')
+
+    @property
+    def risk_assessment_ai(self):
+        return model_registry.get('risk_assessment')
+
+    @property
+    def collaboration_ai(self):
+        return model_registry.get('collaboration')
 
     def create_task_with_nlp(self, user, text):
         return self.nlp_task_creator.create_task_from_text(user, text)
 
+    def analyze_texts(self, texts):
+        return self.nlp_task_creator.analyze_texts(texts)
+
     def get_workflow_suggestions(self, user):
         return self.workflow_automation.suggest_automations(user)
 
     def generate_task_suggestions(self, user: User) -> List[Dict[str, Any]]:
-        try:
-            completed_tasks = Task.objects.filter(user=user, status='completed').order_by('-completed_at')[:20]
-            task_descriptions = [task.description for task in completed_tasks]
-            projects = Project.objects.filter(user=user)
-            project_names = [project.name for project in projects]
-            
-            prompt = f"""
-            Based on the following completed tasks: {', '.join(task_descriptions)},
-            and considering the user's projects: {', '.join(project_names)},
-            suggest 5 new tasks for the user. For each task, provide:
-            1. A task description
-            2. A suggested project (from the list or a new one)
-            3. Estimated priority (High, Medium, Low)
-            4. A list of relevant tags
-            5. Estimated duration in hours
-            """
-            
-            suggestions = self.nlp_task_creator.generate_task_suggestions(prompt)
-            logger.info(f"Generated {len(suggestions)} task suggestions for user {user.id}")
-            return suggestions
-        except Exception as e:
-            logger.error(f"Error generating task suggestions for user {user.id}: {str(e)}")
-            raise
+        suggestions = self.ai_service.generate_task_suggestions(user)
+        logger.info(f"Generated {len(suggestions)} task suggestions for user {user.id}")
+        return suggestions
+
+    def analyze_task_sentiment(self, task):
+        return self.ai_service.analyze_task_sentiment(task)
 
     def analyze_project_complexity(self, project):
         try:
@@ -647,10 +828,11 @@ class EnhancedAIService:
 
     def suggest_task_breakdown(self, task):
         try:
-            subtasks = self.nlp_task_creator.zero_shot_classifier(
+            labels = ["research", "planning", "implementation", "testing", "documentation"]
+            subtasks = task_breakdown_cache.get_or_compute(
+                f"{pipeline_version(zero_shot_pipeline)}|{','.join(labels)}|multi_label",
                 task.description,
-                ["research", "planning", "implementation", "testing", "documentation"],
-                multi_label=True
+                lambda text: self.nlp_task_creator.zero_shot_classifier(text, labels, multi_label=True),
             )
             
             suggested_breakdown = [
@@ -686,31 +868,32 @@ class EnhancedAIService:
         return self.collaboration_ai.suggest_collaborations(project)
 
     def comprehensive_project_analysis(self, project):
+        # The four stages are independent and run concurrently
         try:
-            resource_allocation = self.optimize_project_resources(project)
-            task_dependencies = self.analyze_task_dependencies(project)
-            risk_assessment = self.assess_project_risks(project)
-            collaboration_suggestions = self.suggest_collaborations(project)
-
-            return {
-                'resource_allocation': resource_allocation,
-                'task_dependencies': task_dependencies,
-                'risk_assessment': risk_assessment,
-                'collaboration_suggestions': collaboration_suggestions,
-            }
+            return analysis_stages.run({
+                'resource_allocation': self.optimize_project_resources,
+                'task_dependencies': self.analyze_task_dependencies,
+                'risk_assessment': self.assess_project_risks,
+                'collaboration_suggestions': self.suggest_collaborations,
+            }, project)
         except Exception as e:
             logger.error(f"Error performing comprehensive project analysis for project {project.id}: {str(e)}")
             raise
 
-    def calculate_project_health_score(self, project):
+    def calculate_project_health_score(self, project, analysis=None):
+        # Reuses the risk and collaboration stages of ``analysis`` when given
         try:
-            risk_assessment = self.risk_assessment_ai.assess_project_risks(project)
-            collaboration_suggestions = self.collaboration_ai.suggest_collaborations(project)
+            if analysis is None:
+                analysis = analysis_stages.run({
+                    'risk_assessment': self.assess_project_risks,
+                    'collaboration_suggestions': self.suggest_collaborations,
+                }, project)
             
-            risk_score = 1 - risk_assessment['risk_breakdown']['high']
-            collaboration_score = collaboration_suggestions['overall_collaboration_score']
+            risk_score = 1 - analysis['risk_assessment']['risk_breakdown']['high']
+            collaboration_score = analysis['collaboration_suggestions']['overall_collaboration_score']
             
-            progress_score = project.tasks.filter(status='completed').count() / project.tasks.count()
+            counts = project.tasks.aggregate(total=Count('pk'), completed=Count('pk', filter=Q(status='completed')))
+            progress_score = counts['completed'] / counts['total'] if counts['total'] else 0.0
             health_score = (risk_score + collaboration_score + progress_score) / 3
             
             return health_score
@@ -721,14 +904,14 @@ class EnhancedAIService:
     def generate_ai_insights_report(self, project):
         try:
             analysis = self.comprehensive_project_analysis(project)
-            health_score = self.calculate_project_health_score(project)
+            health_score = self.calculate_project_health_score(project, analysis)
             
             report = {
                 'project_id': project.id,
                 'project_name': project.name,
                 'health_score': health_score,
                 'resource_allocation_summary': self.summarize_resource_allocation(analysis['resource_allocation']),
-                'critical_path': self.identify_critical_path(analysis['task_dependencies']),
+                'critical_path': self.identify_critical_path(project),
                 'top_risks': self.extract_top_risks(analysis['risk_assessment']),
                 'collaboration_recommendations': self.summarize_collaboration_suggestions(analysis['collaboration_suggestions']),
                 'ai_generated_action_items': self.generate_action_items(analysis, health_score),
@@ -739,6 +922,10 @@ class EnhancedAIService:
             logger.error(f"Error generating AI insights report for project {project.id}: {str(e)}")
             raise
 
+    def cached_insights_report(self, project):
+        # Stored per project; regenerated in the background once out of date
+        return cached_insights_report(project, self.generate_ai_insights_report)
+
     def summarize_resource_allocation(self, allocation):
         summary = {
             'total_resources': len(allocation),
@@ -770,23 +957,20 @@ class EnhancedAIService:
         
         return summary
 
-    def identify_critical_path(self, task_dependencies):
-        G = nx.DiGraph()
-        for task in task_dependencies:
-            G.add_node(task['id'], duration=task['estimated_duration'])
-            for dep in task['dependencies']:
-                G.add_edge(dep, task['id'])
-        
-        critical_path = nx.dag_longest_path(G)
-        critical_path_duration = sum(G.nodes[task]['duration'] for task in critical_path)
+    def identify_critical_path(self, project):
+        # Kept ready on the cached project graph
+        dag = project_graphs.get(project)
+        critical_path = dag.critical_path()
+        durations = {task_id: dag.durations[dag.index[task_id]] for task_id in critical_path}
         
         return {
             'critical_path': critical_path,
-            'critical_path_duration': critical_path_duration,
+            # Overlapping dependency types make this less than the sum of durations
+            'critical_path_duration': dag.project_finish(),
             'critical_tasks': [
                 {
                     'task_id': task,
-                    'duration': G.nodes[task]['duration']
+                    'duration': durations[task]
                 } for task in critical_path
             ]
         }
@@ -853,158 +1037,57 @@ class EnhancedAIService:
 
     def optimize_user_schedule(self, user: User) -> List[Dict[str, Any]]:
         try:
-            tasks = Task.objects.filter(user=user, status='open').order_by('due_date')
-            schedule = []
-
-            for task in tasks:
-                completion_time = self.predict_task_completion_time(task)
-                priority = self.predict_task_priority(task)
-                
-                schedule.append({
-                    'task_id': task.id,
-                    'description': task.description,
-                    'estimated_completion_time': completion_time,
-                    'priority': priority,
-                    'due_date': task.due_date
-                })
-
-            optimized_schedule = self._optimize_schedule(schedule)
+            optimized_schedule = self.ai_service.build_user_schedule(user)
             logger.info(f"Optimized schedule for user {user.id} with {len(optimized_schedule)} entries")
             return optimized_schedule
         except Exception as e:
             logger.error(f"Error optimizing schedule for user {user.id}: {str(e)}")
             raise
 
-    def _optimize_schedule(self, schedule: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        sorted_schedule = sorted(schedule, key=lambda x: (x['priority'], x['due_date']))
-        available_time = 8 * 60  # 8 hours in minutes
-
-        optimized_schedule = []
-        current_day = datetime.now().date()
-        daily_schedule = []
-        daily_time = 0
-
-        for task in sorted_schedule:
-            task_duration = task['estimated_completion_time'] * 60  # Convert hours to minutes
-
-            if daily_time + task_duration > available_time:
-                optimized_schedule.append({
-                    'date': current_day,
-                    'tasks': daily_schedule
-                })
-                current_day += timedelta(days=1)
-                daily_schedule = []
-                daily_time = 0
-
-            daily_schedule.append(task)
-            daily_time += task_duration
-
-        if daily_schedule:
-            optimized_schedule.append({
-                'date': current_day,
-                'tasks': daily_schedule
-            })
-
-        return optimized_schedule
-
     def predict_task_completion_time(self, task):
-        features = self._extract_task_features(task)
-        prediction = self.task_completion_model.predict([features])[0]
-        confidence = self._calculate_confidence(self.task_completion_model, features)
-
-        AIPrediction.objects.create(
-            user=task.user,
-            task=task,
-            model=self.openai_model,
-            prediction_type='completion_time',
-            prediction={'completion_time': prediction},
-            confidence=confidence
-        )
-
-        return prediction
+        return self.ai_service.predict_task_completion_time(task)
 
     def predict_task_priority(self, task):
-        features = self._extract_task_features(task)
-        prediction = self.task_priority_model.predict([features])[0]
-        confidence = self.task_priority_model.predict_proba([features]).max()
+        return self.ai_service.predict_task_priority(task)
 
-        AIPrediction.objects.create(
-            user=task.user,
-            task=task,
-            model=self.openai_model,
-            prediction_type='priority',
-            prediction={'priority': prediction},
-            confidence=confidence
-        )
+    def predict_task_completion_times(self, tasks):
+        return self.ai_service.predict_task_completion_times(tasks)
 
-        return prediction
+    def predict_task_priorities(self, tasks):
+        return self.ai_service.predict_task_priorities(tasks)
 
-    def balance_team_workload(self, project):
+    def balance_team_workload(self, project, apply=False, capacities=None, max_load_days=None):
+        # Heap-based; see AI.workload.balance_workload for the constraints
         try:
-            team_members = project.team.all()
-            tasks = Task.objects.filter(project=project, status='open')
-            
-            member_workloads = {member: 0 for member in team_members}
-            for task in tasks:
-                if task.assigned_to:
-                    member_workloads[task.assigned_to] += task.estimated_hours or 1
-            
-            avg_workload = sum(member_workloads.values()) / len(team_members)
-            suggestions = []
-            
-            for task in tasks.filter(assigned_to__isnull=True):
-                best_member = min(member_workloads, key=member_workloads.get)
-                suggestions.append({
-                    'task_id': task.id,
-                    'suggested_assignee': best_member.id,
-                    'current_workload': member_workloads[best_member],
-                    'avg_workload': avg_workload
-                })
-                member_workloads[best_member] += task.estimated_hours or 1
-            
+            suggestions, unassigned = balance_workload(project, capacities, max_load_days)
+
             AIRecommendation.objects.create(
                 user=project.user,
                 model=AIModel.objects.get(name='Workload Balancer'),
                 recommendation_type='workload_balance',
-                recommendation={'task_assignments': suggestions},
-                confidence=0.9
+                recommendation={'project_id': project.id, 'task_assignments': suggestions, 'unassigned_tasks': unassigned},
+                confidence=0.9,
+                is_applied=apply,
             )
+            if apply:
+                apply_task_assignments(project.id, suggestions)
 
-            logger.info(f"Generated workload balance suggestions for project {project.id}")
+            logger.info(
+                f"Generated workload balance suggestions for project {project.id}: "
+                f"{len(suggestions)} assigned, {len(unassigned)} left unassigned"
+            )
             return suggestions
         except Exception as e:
             logger.error(f"Error balancing team workload for project {project.id}: {str(e)}")
             raise
 
-    def _extract_task_features(self, task):
-        features = [
-            len(task.description),
-            task.due_date.timestamp() if task.due_date else 0,
-            task.start_date.timestamp() if task.start_date else 0,
-            task.category.id if task.category else 0,
-            len(task.tags.all()),
-            task.progress,
-            1 if task.recurring else 0,
-            len(task.subtasks.all()),
-            len(task.comments.all()),
-            len(task.attachments.all()),
-            self._encode_priority(task.priority),
-        ]
-        return features
-    
-    def _encode_priority(self, priority):
-        priority_map = {'low': 0, 'medium': 1, 'high': 2, 'urgent': 3}
-        return priority_map.get(priority.lower(), 1)
-
-    def _calculate_confidence(self, model, features):
-        predictions = [tree.predict([features])[0] for tree in model.estimators_]
-        return 1 / (1 + np.std(predictions))
-
     def apply_recommendation(self, recommendation):
         if recommendation.recommendation_type == 'task_suggestion':
             return self._apply_task_suggestion(recommendation)
         elif recommendation.recommendation_type == 'schedule_optimization':
             return self._apply_schedule_optimization(recommendation)
+        elif recommendation.recommendation_type == 'workload_balance':
+            return self._apply_workload_balance(recommendation)
         else:
             logger.error(f"Unknown recommendation type: {recommendation.recommendation_type}")
             return False
@@ -1036,11 +1119,16 @@ class EnhancedAIService:
     def _apply_schedule_optimization(self, recommendation):
         try:
             optimized_schedule = recommendation.recommendation['optimized_schedule']
+            scheduled = set()
             for day_schedule in optimized_schedule:
-                date = day_schedule['date']
+                start_date = datetime.fromisoformat(str(day_schedule['date']))
                 for task_data in day_schedule['tasks']:
+                    # A task split across days starts on its first one
+                    if task_data['task_id'] in scheduled:
+                        continue
+                    scheduled.add(task_data['task_id'])
                     task = Task.objects.get(id=task_data['task_id'])
-                    task.start_date = datetime.combine(date, datetime.min.time())
+                    task.start_date = start_date
                     task.due_date = task.start_date + timedelta(hours=task_data['estimated_completion_time'])
                     task.save()
             return True
@@ -1048,55 +1136,24 @@ class EnhancedAIService:
             logger.error(f"Error applying schedule optimization: {str(e)}")
             return False
 
-
-
-    # AI-driven team workload balancing
-    def balance_team_workload(self, project):
+    def _apply_workload_balance(self, recommendation):
         try:
-            team_members = project.team.all()
-            tasks = Task.objects.filter(project=project, status='open')
-            
-            member_workloads = {member: 0 for member in team_members}
-            for task in tasks:
-                if task.assigned_to:
-                    member_workloads[task.assigned_to] += task.estimated_hours or 1
-            
-            avg_workload = sum(member_workloads.values()) / len(team_members)
-            suggestions = []
-            
-            for task in tasks.filter(assigned_to__isnull=True):
-                best_member = min(member_workloads, key=member_workloads.get)
-                suggestions.append({
-                    'task_id': task.id,
-                    'suggested_assignee': best_member.id,
-                    'current_workload': member_workloads[best_member],
-                    'avg_workload': avg_workload
-                })
-                member_workloads[best_member] += task.estimated_hours or 1
-            
-            AIRecommendation.objects.create(
-                user=project.user,
-                model=AIModel.objects.get(name='Workload Balancer'),
-                recommendation_type='workload_balance',
-                recommendation={'task_assignments': suggestions},
-                confidence=0.9
-            )
-
-            logger.info(f"Generated workload balance suggestions for project {project.id}")
-            return suggestions
+            balance = recommendation.recommendation
+            apply_task_assignments(balance['project_id'], balance['task_assignments'])
+            return True
         except Exception as e:
-            logger.error(f"Error balancing team workload for project {project.id}: {str(e)}")
-            raise
+            logger.error(f"Error applying workload balance: {str(e)}")
+            return False
 
 class ResourceAllocationAI:
-    def __init__(self):
-        self.allocation_model = self.train_allocation_model()
+    def __init__(self, load_models=True):
+        self.allocation_model = load_model_artifact(RESOURCE_ALLOCATION_MODEL) if load_models else None
 
     def optimize_allocation(self, project):
         try:
             project_data = self.collect_project_data(project)
-            team_data = self.collect_team_data(project.team.all())
-            optimal_allocation = self.allocation_model.predict(
+            team_data = self.collect_team_data(project)
+            optimal_allocation = require_model(self.allocation_model, RESOURCE_ALLOCATION_MODEL).predict(
                 pd.concat([project_data, team_data], axis=1)
             )
             return self.apply_allocation(project, optimal_allocation)
@@ -1109,7 +1166,7 @@ class ResourceAllocationAI:
             historical_data = self.collect_historical_allocation_data()
             if 'efficiency_score' not in historical_data.columns:
                 print("Warning: 'efficiency_score' not found in historical data")
-                return None
+                return None, {}
         
              # Identify categorical and numerical columns
             categorical_columns = ['project_priority']
@@ -1135,7 +1192,7 @@ class ResourceAllocationAI:
             accuracy = model.score(X_test, y_test)
             logger.info(f"Resource Allocation Model - Accuracy: {accuracy}")
         
-            return model
+            return model, {'r2': float(accuracy), 'n_samples': len(X)}
         except Exception as e:
             logger.error(f"Error training resource allocation model: {str(e)}")
             raise
@@ -1149,84 +1206,111 @@ class ResourceAllocationAI:
             'num_tasks': [project.tasks.count()],
         })
 
-    def collect_team_data(self, team):
+    def collect_team_data(self, project):
+        # Workload and performance for the whole team come from one cached query
+        stats = team_member_stats(project)
         team_data = []
-        for member in team:
+        for member in project.team.all():
+            member_stats = stats.get(member.id, {})
             member_data = {
                 'member_id': member.id,
                 'skills': [skill.name for skill in member.skills.all()],
                 'experience': member.years_of_experience,
-                'current_workload': self.calculate_current_workload(member),
-                'performance_score': self.calculate_performance_score(member),
+                'current_workload': member_stats.get('current_workload', 0),
+                'performance_score': member_stats.get('on_time_rate', 0),
             }
             team_data.append(member_data)
         return pd.DataFrame(team_data)
 
-    def calculate_current_workload(self, team_member):
-        current_tasks = Task.objects.filter(assigned_to=team_member, status='in_progress')
-        return sum(task.estimated_hours for task in current_tasks)
-
-    def calculate_performance_score(self, team_member):
-        completed_tasks = Task.objects.filter(assigned_to=team_member, status='completed')
-        if not completed_tasks:
-            return 0
-        on_time_tasks = completed_tasks.filter(completed_at__lte=F('due_date'))
-        return on_time_tasks.count() / completed_tasks.count()
-
     def collect_historical_allocation_data(self):
-        
-        historical_projects = Project.objects.filter(status='completed')
-        
-        data = []
-        for project in historical_projects:
-            project_data = {
-                'project_priority': project.priority,
-                'project_complexity': float(project.complexity or 0),
-                'project_duration': (project.end_date - project.start_date).days,
-                'num_tasks': project.tasks.count(),
-                'team_size': project.team.count(),
-                'avg_team_experience': project.team.aggregate(Avg('userprofile__years_of_experience'))['userprofile__years_of_experience__avg'] or 0,
-                'avg_team_workload': project.team.aggregate(Avg('userprofile__workload'))['userprofile__workload__avg'] or 0,
-                'efficiency_score': float(project.efficiency_score or 0)
-            }
-            data.append(project_data)
-                
-        return pd.DataFrame(data)
+        # One annotated query instead of several aggregates per project
+        data = project_dataset(Project.objects.filter(status='completed'), {
+            'project_priority': 'priority',
+            'project_complexity': 'complexity',
+            'project_duration': 'project_duration',
+            'num_tasks': 'feature_num_tasks',
+            'team_size': 'feature_team_size',
+            'avg_team_experience': 'feature_avg_team_experience',
+            'avg_team_workload': 'feature_avg_team_workload',
+            'efficiency_score': 'efficiency_score',
+        })
+        data['project_complexity'] = data['project_complexity'].astype(float).fillna(0)
+        data['efficiency_score'] = data['efficiency_score'].astype(float).fillna(0)
+        return data
 
 
-    def apply_allocation(self, project, optimal_allocation):
+    def apply_allocation(self, project, optimal_allocation, max_tasks_per_member=None):
+        """Assign the project's not-started tasks to team members.
+
+        ``optimal_allocation`` holds one score per (task, member) pair in
+        row-major order. Each member column is repeated
+        ``max_tasks_per_member`` times (enough to cover every task by
+        default) so the assignment can give one member several tasks.
+        """
         try:
-            tasks = project.tasks.filter(status='not_started')
-            team = project.team.all()
-            
-            # Create a cost matrix based on the optimal allocation
-            cost_matrix = np.zeros((len(tasks), len(team)))
-            for i, task in enumerate(tasks):
-                for j, member in enumerate(team):
-                    cost_matrix[i, j] = -optimal_allocation[i * len(team) + j]
-            
+            task_ids = list(project.tasks.filter(status='not_started').order_by('pk').values_list('pk', flat=True))
+            member_ids = list(project.team.order_by('pk').values_list('pk', flat=True))
+            if not task_ids or not member_ids:
+                return "No tasks or team members to allocate"
+
+            scores = np.asarray(optimal_allocation, dtype=float)
+            if scores.size != len(task_ids) * len(member_ids):
+                raise ValueError(
+                    f"Expected {len(task_ids) * len(member_ids)} allocation scores, got {scores.size}"
+                )
+            capacity = max_tasks_per_member or -(-len(task_ids) // len(member_ids))
+            if capacity * len(member_ids) < len(task_ids):
+                raise ValueError(f"{len(member_ids)} members with capacity {capacity} cannot cover {len(task_ids)} tasks")
+
+            cost_matrix = np.repeat(-scores.reshape(len(task_ids), len(member_ids)), capacity, axis=1)
             row_ind, col_ind = linear_sum_assignment(cost_matrix)
-            
-            for i, j in zip(row_ind, col_ind):
-                task = tasks[i]
-                member = team[j]
-                task.assigned_to = member
-                task.save()
+
+            TaskAssignee = Task.assigned_to.through
+            with transaction.atomic():
+                TaskAssignee.objects.filter(task_id__in=task_ids).delete()
+                TaskAssignee.objects.bulk_create([
+                    TaskAssignee(task_id=task_ids[i], user_id=member_ids[j // capacity])
+                    for i, j in zip(row_ind, col_ind)
+                ])
+                # Bulk writes on the through table send no m2m_changed signals
+                def invalidate():
+                    invalidate_team_stats([project.id], member_ids)
+                    invalidate_insights_reports([project.id])
+                transaction.on_commit(invalidate)
             
             return "Resource allocation applied successfully"
         except Exception as e:
             logger.error(f"Error applying resource allocation for project {project.id}: {str(e)}")
             raise
 
+class DependencyModel:
+    def __init__(self, pipeline_model):
+        self.pipeline_model = pipeline_model
+
+    def predict(self, task_data, dag=None):
+        if dag is None:
+            dag = ProjectDAG(
+                [task['id'] for task in task_data],
+                [task['estimated_duration'] or DEFAULT_TASK_DURATION for task in task_data],
+                [(dep, task['id'], FINISH_TO_START) for task in task_data for dep in task['dependencies']],
+            )
+        return dag.topological_task_ids()
+
 class TaskDependencyAnalyzer:
-    def __init__(self):
-        self.dependency_model = self.train_dependency_model()
+    def __init__(self, load_models=True):
+        self.dependency_model = None
+        if load_models:
+            pipeline_model = load_model_artifact(TASK_DEPENDENCY_MODEL)
+            if pipeline_model is not None:
+                self.dependency_model = DependencyModel(pipeline_model)
 
     def analyze_dependencies(self, project):
         try:
-            task_data = self.collect_task_data(project)
-            optimal_order = self.dependency_model.predict(task_data)
-            return self.generate_recommendations(project, optimal_order)
+            # The prepared dependency graph is cached per project and shared by every step
+            dag = project_graphs.get(project)
+            task_data = self.collect_task_data(project, dag)
+            optimal_order = require_model(self.dependency_model, TASK_DEPENDENCY_MODEL).predict(task_data, dag)
+            return self.generate_recommendations(project, optimal_order, dag)
         except Exception as e:
             logger.error(f"Error analyzing task dependencies for project {project.id}: {str(e)}")
             raise
@@ -1234,23 +1318,23 @@ class TaskDependencyAnalyzer:
     def train_dependency_model(self):
         try:
             historical_tasks = Task.objects.filter(project__status='completed')
-            task_features = []
-            task_orders = []
-            
-            for project in Project.objects.filter(status='completed'):
-                project_tasks = historical_tasks.filter(project=project).order_by('completed_at')
-                task_order = list(project_tasks.values_list('id', flat=True))
-            
-                for task in project_tasks:
-                    features = [
-                        task.ai_estimated_duration,
-                        self.encode_priority(task.priority),
-                        task.complexity,
-                        task.dependencies.count(),
-                        task.project.team.count()
-                    ]
-                    task_features.append(features)
-                    task_orders.append(task_order.index(task.id))
+            # Dependency counts come from the feature store, so this is one scan
+            missing = historical_tasks.filter(ai_features__isnull=True).values_list('pk', flat=True)
+            refresh_task_features(list(missing))
+
+            team_sizes = (
+                Project.team.through.objects.filter(project=OuterRef('project_id'))
+                .order_by().values('project').annotate(total=Count('pk')).values('total')
+            )
+            rows = historical_tasks.annotate(
+                team_size=Coalesce(Subquery(team_sizes, output_field=IntegerField()), 0)
+            ).order_by('project_id', 'completed_at').values_list(
+                'ai_estimated_duration', 'priority', 'complexity', 'ai_features__num_dependencies', 'team_size'
+            )
+            task_features = [
+                [duration, self.encode_priority(priority), complexity, num_dependencies, team_size]
+                for duration, priority, complexity, num_dependencies, team_size in rows
+            ]
 
             # Create a pipeline with SimpleImputer, StandardScaler, and KMeans
             model = Pipeline([
@@ -1262,41 +1346,7 @@ class TaskDependencyAnalyzer:
             X = np.array(task_features)
             model.fit(X)
 
-            class DependencyModel:
-                def __init__(self, pipeline_model):
-                    self.pipeline_model = pipeline_model
-
-                def predict(self, task_data):
-                    G = DiGraph()
-                    task_features = []
-
-                    for task in task_data:
-                        G.add_node(task['id'])
-                        for dep in task['dependencies']:
-                            G.add_edge(dep, task['id'])
-
-                        features = [
-                            task['estimated_duration'],
-                            self.encode_priority(task['priority']),
-                            task['complexity'],
-                            len(task['dependencies']),
-                            task['team_size']
-                        ]
-                        task_features.append(features)
-    
-                    X = np.array(task_features)
-                    clusters = self.pipeline_model.predict(X)
-                
-                    sorted_tasks = sorted(zip(task_data, clusters), key=lambda x: x[1])
-                    ordered_tasks = [task['id'] for task, _ in sorted_tasks]
-                
-                    return list(topological_sort(G))
-            
-                def encode_priority(self, priority):
-                    priority_map = {'low': 0, 'medium': 1, 'high': 2, 'urgent': 3}
-                    return priority_map.get(priority.lower(), 1)
-            
-            return DependencyModel(model)
+            return model, {'inertia': float(model.named_steps['kmeans'].inertia_), 'n_samples': len(X)}
         except Exception as e:
             logger.error(f"Error training task dependency model: {str(e)}")
             raise
@@ -1306,53 +1356,55 @@ class TaskDependencyAnalyzer:
 
     
 
-    def collect_task_data(self, project):
+    def collect_task_data(self, project, dag=None):
+        dag = dag or project_graphs.get(project)
+        team_size = project.team.count()
+        rows = Task.objects.filter(project=project).values_list('pk', 'title', 'priority', 'complexity')
         return [
             {
-                'id': task.id,
-                'title': task.title,
-                'estimated_duration': task.estimated_duration,
-                'dependencies': [dep.id for dep in task.dependencies.all()],
+                'id': task_id,
+                'title': title,
+                'estimated_duration': dag.durations[dag.index[task_id]],
+                'priority': priority,
+                'complexity': complexity,
+                'team_size': team_size,
+                'dependencies': [dag.task_ids[i] for i, _ in dag.predecessors[dag.index[task_id]]],
             }
-            for task in project.tasks.all()
+            for task_id, title, priority, complexity in rows
         ]
 
-    def generate_recommendations(self, project, optimal_order):
+    def generate_recommendations(self, project, optimal_order, dag=None):
         try:
+            dag = dag or project_graphs.get(project)
+            # Critical-path times honour each dependency's type; parallel
+            # tasks are those with no ancestor/descendant relation.
+            schedule = dag.critical_path_schedule()
             recommendations = []
-            current_time = 0
             for task_id in optimal_order:
-                task = project.tasks.get(id=task_id)
-                parallel_tasks = self.find_parallel_tasks(project, task, optimal_order)
+                timing = schedule[task_id]
                 recommendations.append({
                     'task_id': task_id,
-                    'start_time': current_time,
-                    'parallel_tasks': parallel_tasks,
+                    'start_time': timing['earliest_start'],
+                    'latest_start': timing['latest_start'],
+                    'slack': timing['slack'],
+                    'is_critical': timing['is_critical'],
+                    'parallel_tasks': dag.parallel_tasks(task_id),
                 })
-                current_time += task.estimated_duration
             
             return recommendations
         except Exception as e:
             logger.error(f"Error generating task dependency recommendations for project {project.id}: {str(e)}")
             raise
 
-    def find_parallel_tasks(self, project, task, optimal_order):
-        task_index = optimal_order.index(task.id)
-        parallel_tasks = []
-        for other_task in project.tasks.all():
-            if other_task.id in optimal_order[task_index+1:] and not set(other_task.dependencies.all()).intersection(set(task.dependencies.all())):
-                parallel_tasks.append(other_task.id)
-        return parallel_tasks
-
 class RiskAssessmentAI:
-    def __init__(self):
-        self.risk_model = self.train_risk_model()
+    def __init__(self, load_models=True):
+        self.risk_model = load_model_artifact(RISK_ASSESSMENT_MODEL) if load_models else None
 
     def assess_project_risks(self, project):
         try:
             project_data = self.collect_project_data(project)
             external_data = self.collect_external_data()
-            risk_assessment = self.risk_model.predict_proba(
+            risk_assessment = require_model(self.risk_model, RISK_ASSESSMENT_MODEL).predict_proba(
                 pd.concat([project_data, external_data], axis=1)
             )
             return self.format_risk_report(project, risk_assessment)
@@ -1375,7 +1427,7 @@ class RiskAssessmentAI:
             accuracy = model.score(X_test, y_test)
             logger.info(f"Risk Assessment Model - Accuracy: {accuracy}")
             
-            return model
+            return model, {'accuracy': float(accuracy), 'n_samples': len(X)}
         except Exception as e:
             logger.error(f"Error training risk assessment model: {str(e)}")
             raise
@@ -1392,51 +1444,27 @@ class RiskAssessmentAI:
         })
 
     def collect_external_data(self):
+        # Cached and fetched concurrently; see external_signals
         try:
-             # Fetch economic indicators from an API
-            economic_response = requests.get('https://api.example.com/economic-indicators')
-            economic_data = economic_response.json()
-        
-             # Fetch weather data from an API
-            weather_response = requests.get('https://api.example.com/weather-forecast')
-            weather_data = weather_response.json()
-        
-              # Fetch industry trends from an API
-            industry_response = requests.get('https://api.example.com/industry-trends')
-            industry_data = industry_response.json()
-        
-            return pd.DataFrame({
-                'market_volatility': [economic_data['market_volatility']],
-                'economic_growth': [economic_data['gdp_growth_rate']],
-                'industry_disruption_level': [industry_data['disruption_level']],
-                 'weather_severity': [weather_data['severity_index']],
-            })
+            return external_signals.get_frame()
         except Exception as e:
             logger.error(f"Error collecting external data: {str(e)}")
             raise
 
-
     def collect_historical_risk_data(self):
-        historical_projects = Project.objects.filter(status='completed')
-        
-        data = []
-        for project in historical_projects:
-            project_data = {
-                'project_budget': project.budget,
-                'project_duration': (project.end_date - project.start_date).days,
-                'team_size': project.team.count(),
-                'num_tasks': project.tasks.count(),
-                'num_completed_tasks': project.tasks.filter(status='completed').count(),
-                'num_high_priority_tasks': project.tasks.filter(priority='high').count(),
-                'market_volatility': project.market_volatility,
-                'economic_growth': project.economic_growth,
-                'industry_disruption_level': project.industry_disruption_level,
-                'risk_level': project.risk_level
-            }
-            
-            data.append(project_data)
-        
-        return pd.DataFrame(data)
+        # One annotated query instead of several counts per project
+        return project_dataset(Project.objects.filter(status='completed'), {
+            'project_budget': 'budget',
+            'project_duration': 'project_duration',
+            'team_size': 'feature_team_size',
+            'num_tasks': 'feature_num_tasks',
+            'num_completed_tasks': 'feature_num_completed_tasks',
+            'num_high_priority_tasks': 'feature_num_high_priority_tasks',
+            'market_volatility': 'market_volatility',
+            'economic_growth': 'economic_growth',
+            'industry_disruption_level': 'industry_disruption_level',
+            'risk_level': 'risk_level',
+        })
 
 
     def format_risk_report(self, project, risk_assessment):
@@ -1499,14 +1527,14 @@ class RiskAssessmentAI:
 
 
 class CollaborationAI:
-    def __init__(self):
-        self.collaboration_model = self.train_collaboration_model()
+    def __init__(self, load_models=True):
+        self.collaboration_model = load_model_artifact(COLLABORATION_MODEL) if load_models else None
 
     def suggest_collaborations(self, project):
         try:
-            team_data = self.collect_team_data(project.team.all())
+            team_data = self.collect_team_data(project)
             project_data = self.collect_project_data(project)
-            suggestions = self.collaboration_model.predict(
+            suggestions = require_model(self.collaboration_model, COLLABORATION_MODEL).predict(
                 pd.concat([team_data, project_data], axis=1)
             )
             return self.format_collaboration_suggestions(project, suggestions)
@@ -1531,22 +1559,23 @@ class CollaborationAI:
             mse = mean_squared_error(y_test, model.predict(X_test))
             logger.info(f"Collaboration Model - Mean Squared Error: {mse}")
             
-            return model
+            return model, {'mse': float(mse), 'n_samples': len(X)}
         except Exception as e:
             logger.error(f"Error training collaboration model: {str(e)}")
-            return None
+            return None, {}
 
 
-    def collect_team_data(self, team):
+    def collect_team_data(self, project):
+        stats = team_member_stats(project)
         team_data = []
-        for member in team:
+        for member in project.team.all():
             member_data = {
                 'member_id': member.id,
                 'role': member.role,
                 'department': member.department,
                 'years_of_experience': member.years_of_experience,
                 'communication_preference': member.communication_preference,
-                'collaboration_score': self.calculate_collaboration_score(member),
+                'collaboration_score': self.calculate_collaboration_score(stats.get(member.id, {})),
             }
             team_data.append(member_data)
         return pd.DataFrame(team_data)
@@ -1562,24 +1591,13 @@ class CollaborationAI:
         })
 
    
-    def calculate_collaboration_score(self, team_member):
-        completed_tasks = Task.objects.filter(assigned_to=team_member, status='completed')
-        on_time_completion_rate = completed_tasks.filter(completed_at__lte=F('due_date')).count() / completed_tasks.count()
-    
-        avg_task_complexity = completed_tasks.aggregate(Avg('complexity'))['complexity__avg']
-    
-        peer_reviews = PeerReview.objects.filter(reviewee=team_member)
-        avg_peer_rating = peer_reviews.aggregate(Avg('rating'))['rating__avg']
-    
-        communication_frequency = Communication.objects.filter(
-            Q(sender=team_member) | Q(recipient=team_member)
-        ).count() / 30 
-    
+    def calculate_collaboration_score(self, member_stats):
+        # member_stats is one entry of team_member_stats(project)
         factors = [
-            on_time_completion_rate,
-            avg_task_complexity / 10, 
-            avg_peer_rating / 5,  
-            min(communication_frequency / 5, 1) 
+            member_stats.get('on_time_rate', 0),
+            (member_stats.get('avg_task_complexity') or 0) / 10, 
+            (member_stats.get('avg_peer_rating') or 0) / 5,  
+            min(member_stats.get('communication_frequency', 0) / 5, 1) 
         ]
     
         collaboration_score = sum(factors) / len(factors)
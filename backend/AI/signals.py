@@ -0,0 +1,227 @@
+from django.db import connection, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from Tasks.models import Task, Project, SubTask, Comment, Attachment, Tag, TaskDependency
+from .models import PeerReview, Communication
+from .features import refresh_task_features
+from .team_stats import invalidate_team_stats
+from .insights import invalidate_insights_reports
+from .dependency_graph import project_graphs, pending_dependencies, task_duration, validate_dependencies
+
+
+def schedule_task_features_refresh(task_ids):
+    task_ids = {task_id for task_id in task_ids if task_id is not None}
+    if task_ids:
+        transaction.on_commit(lambda: refresh_task_features(task_ids))
+
+
+@receiver(post_save, sender=Task)
+def refresh_features_on_task_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_task_features_refresh([instance.pk])
+
+
+@receiver(post_save, sender=SubTask)
+@receiver(post_delete, sender=SubTask)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def refresh_features_on_related_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_task_features_refresh([instance.task_id])
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def refresh_features_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._ai_cleared_task_ids = list(instance.tasks.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        task_ids = getattr(instance, '_ai_cleared_task_ids', []) if reverse else [instance.pk]
+        schedule_task_features_refresh(task_ids)
+    elif action in ('post_add', 'post_remove'):
+        schedule_task_features_refresh(pk_set if reverse else [instance.pk])
+
+
+@receiver(pre_delete, sender=Tag)
+def collect_tasks_on_tag_delete(sender, instance, **kwargs):
+    instance._ai_tagged_task_ids = list(instance.tasks.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def refresh_features_on_tag_delete(sender, instance, **kwargs):
+    schedule_task_features_refresh(getattr(instance, '_ai_tagged_task_ids', []))
+
+
+def schedule_team_stats_invalidation(project_ids=(), user_ids=()):
+    project_ids, user_ids = list(project_ids), list(user_ids)
+    if project_ids or user_ids:
+        transaction.on_commit(lambda: invalidate_team_stats(project_ids, user_ids))
+
+
+@receiver(post_save, sender=Task)
+def invalidate_team_stats_on_task_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_team_stats_invalidation(
+            [instance.project_id], instance.assigned_to.values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Task)
+def collect_assignees_on_task_delete(sender, instance, **kwargs):
+    instance._ai_assignee_ids = list(instance.assigned_to.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_team_stats_on_task_delete(sender, instance, **kwargs):
+    schedule_team_stats_invalidation([instance.project_id], getattr(instance, '_ai_assignee_ids', []))
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def invalidate_team_stats_on_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember who is about to be unassigned (or which tasks, in reverse)
+        if reverse:
+            instance._ai_cleared_assignment_ids = list(instance.assigned_tasks.values_list('pk', flat=True))
+        else:
+            instance._ai_cleared_assignment_ids = list(instance.assigned_to.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    changed = getattr(instance, '_ai_cleared_assignment_ids', []) if action == 'post_clear' else list(pk_set)
+    if reverse:
+        project_ids = list(Task.objects.filter(pk__in=changed).values_list('project_id', flat=True))
+        schedule_team_stats_invalidation(project_ids, [instance.pk])
+    else:
+        project_ids = [instance.project_id]
+        schedule_team_stats_invalidation(project_ids, changed)
+    # Assignments do not touch Task.updated_at, which the report fingerprint uses
+    schedule_insights_invalidation(project_ids)
+
+
+@receiver(m2m_changed, sender=Project.team.through)
+def invalidate_team_stats_on_team_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_team_stats_invalidation([instance.pk])
+    elif action == 'pre_clear':
+        instance._ai_cleared_project_ids = list(instance.team_projects.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        schedule_team_stats_invalidation(getattr(instance, '_ai_cleared_project_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        schedule_team_stats_invalidation(pk_set)
+
+
+@receiver(post_save, sender=PeerReview)
+@receiver(post_delete, sender=PeerReview)
+def invalidate_team_stats_on_review(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_team_stats_invalidation(user_ids=[instance.reviewee_id])
+
+
+@receiver(post_save, sender=Communication)
+@receiver(post_delete, sender=Communication)
+def invalidate_team_stats_on_communication(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_team_stats_invalidation(user_ids=[instance.sender_id, instance.receiver_id])
+
+
+def schedule_insights_invalidation(project_ids):
+    project_ids = list(project_ids)
+    if project_ids:
+        transaction.on_commit(lambda: invalidate_insights_reports(project_ids))
+
+
+def _task_project_id(task_id):
+    return Task.objects.filter(pk=task_id).values_list('project_id', flat=True).first()
+
+
+def _task_project_ids(task_ids):
+    return set(Task.objects.filter(pk__in=task_ids, project__isnull=False).values_list('project_id', flat=True))
+
+
+@receiver(pre_save, sender=TaskDependency)
+def reject_dependency_cycles(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if instance.pk is not None:
+        previous = TaskDependency.objects.filter(pk=instance.pk).values_list('dependency_id', 'task_id').first()
+    instance._ai_previous_edge = previous
+    instance._ai_written = {}
+    # A changed dependency_type alone cannot create a cycle
+    if previous != (instance.dependency_id, instance.task_id):
+        instance._ai_written = validate_dependencies(
+            [(instance.dependency_id, instance.task_id, instance.dependency_type)],
+            removed=[previous] if previous else (),
+        )
+
+
+@receiver(post_save, sender=TaskDependency)
+def update_project_graph_on_dependency_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    edge = (instance.dependency_id, instance.task_id)
+    previous = getattr(instance, '_ai_previous_edge', None)
+    changed = [edge] if previous in (None, edge) else [edge, previous]
+    written = getattr(instance, '_ai_written', {})
+
+    def apply():
+        # Both ends' projects: the graph of each holds, or is marked by, the edge
+        for project_id in _task_project_ids({task_id for pair in changed for task_id in pair}):
+            _, versions = written.get(project_id, ((), ()))
+            project_graphs.edges_changed(project_id, changed, versions)
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=TaskDependency)
+def update_project_graph_on_dependency_delete(sender, instance, **kwargs):
+    if connection.in_atomic_block:
+        # Later cycle checks in this transaction must see the change before it commits
+        pending_project_id = _task_project_id(instance.task_id)
+        if pending_project_id is not None:
+            pending_dependencies.record(
+                pending_project_id, instance.dependency_id, instance.task_id, change=pending_dependencies.REMOVED
+            )
+
+    def apply():
+        # Gone along with a deleted task, whose own signal drops the graph
+        for project_id in _task_project_ids([instance.dependency_id, instance.task_id]):
+            project_graphs.edges_changed(project_id, [(instance.dependency_id, instance.task_id)])
+    transaction.on_commit(apply)
+
+
+@receiver(pre_save, sender=Task)
+def collect_previous_project_on_task_save(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None:
+        instance._ai_previous_project_id = _task_project_id(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def update_project_graph_on_task_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous_project_id = getattr(instance, '_ai_previous_project_id', None)
+    if previous_project_id is not None and previous_project_id != instance.project_id:
+        # Moved out of another project, whose graph still has the task
+        transaction.on_commit(lambda: project_graphs.invalidate(previous_project_id))
+    if instance.project_id is not None:
+        project_id, task_id, duration = instance.project_id, instance.pk, task_duration(instance)
+        transaction.on_commit(lambda: project_graphs.task_changed(project_id, task_id, duration))
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_project_graph_on_task_delete(sender, instance, **kwargs):
+    if instance.project_id is not None:
+        project_id = instance.project_id
+        transaction.on_commit(lambda: project_graphs.invalidate(project_id))
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def invalidate_insights_on_dependency_change(sender, instance, raw=False, **kwargs):
+    # A dependency edited in place keeps the count and newest id the fingerprint uses
+    if not raw:
+        transaction.on_commit(lambda: invalidate_insights_reports([_task_project_id(instance.task_id)]))
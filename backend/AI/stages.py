@@ -0,0 +1,59 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+# Threads shared by all requests in a process; one insights report uses four
+ANALYSIS_CONCURRENCY = getattr(settings, 'AI_ANALYSIS_CONCURRENCY', 8)
+
+
+class StagePool:
+    """Runs the independent stages of one analysis concurrently.
+
+    The pool is bounded and shared across requests. Each stage runs on its
+    own thread with its own database connection, which is closed when the
+    stage finishes. A stage that itself asks for stages runs them inline,
+    so nested calls cannot wait on their own pool.
+    """
+
+    def __init__(self, max_workers=ANALYSIS_CONCURRENCY):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = None
+        self._executor = None
+
+    def run(self, stages, *args):
+        """Call each of ``stages`` (``{name: callable}``) with ``args``.
+
+        Returns ``{name: result}`` once every stage has finished; if any
+        stage raised, the first such error (in ``stages`` order) is raised.
+        """
+        if getattr(self._local, 'in_stage', False) or len(stages) < 2:
+            return {name: stage(*args) for name, stage in stages.items()}
+
+        executor = self._ensure_pool()
+        futures = {name: executor.submit(self._run_stage, stage, args) for name, stage in stages.items()}
+        wait(futures.values())
+        return {name: future.result() for name, future in futures.items()}
+
+    def _run_stage(self, stage, args):
+        self._local.in_stage = True
+        try:
+            return stage(*args)
+        finally:
+            self._local.in_stage = False
+            connections.close_all()
+
+    def _ensure_pool(self):
+        # Threads do not survive a fork; rebuild the pool per process.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='project-analysis')
+                self._pid = os.getpid()
+            return self._executor
+
+
+analysis_stages = StagePool()
@@ -0,0 +1,134 @@
+import logging
+
+from celery import group
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import AIJobRun, AIJobChunk
+
+logger = logging.getLogger(__name__)
+
+SWEEP_CHUNK_SIZE = getattr(settings, 'AI_SWEEP_CHUNK_SIZE', 25)
+
+_handlers = {}
+
+
+class SweepHandler:
+    def __init__(self, func, model, batch):
+        self.func = func
+        self.model = model
+        self.batch = batch
+
+
+def sweep_handler(job, model, batch=False):
+    """Register the function that processes the items of sweep ``job``.
+
+    Items are ``model`` primary keys, loaded one chunk at a time. The
+    function gets one instance, or with ``batch=True`` the chunk's list of
+    instances, and must then return the ids it completed.
+    """
+    def register(func):
+        _handlers[job] = SweepHandler(func, model, batch)
+        return func
+    return register
+
+
+def start_sweep(job, item_ids, chunk_size=SWEEP_CHUNK_SIZE):
+    """Split ``item_ids`` into chunks and process them as a group of Celery tasks.
+
+    Returns the ``AIJobRun`` that records the sweep's progress.
+    """
+    from .tasks import process_sweep_chunk
+
+    item_ids = list(item_ids)
+    chunks = [item_ids[start:start + chunk_size] for start in range(0, len(item_ids), chunk_size)]
+    with transaction.atomic():
+        run = AIJobRun.objects.create(job=job, total_items=len(item_ids), total_chunks=len(chunks))
+        AIJobChunk.objects.bulk_create([
+            AIJobChunk(run=run, index=index, item_ids=chunk) for index, chunk in enumerate(chunks)
+        ])
+        if not chunks:
+            run.status, run.finished_at = 'completed', timezone.now()
+            run.save(update_fields=['status', 'finished_at'])
+            return run
+        transaction.on_commit(
+            lambda: group(process_sweep_chunk.s(run.id, index) for index in range(len(chunks))).apply_async()
+        )
+    logger.info(f"Started {job} run {run.id}: {len(item_ids)} items in {len(chunks)} chunks")
+    return run
+
+
+def run_sweep_chunk(run_id, index):
+    """Process the items of one chunk that are not yet checkpointed.
+
+    Every finished item is saved to the chunk before the next one starts,
+    so a redelivered or retried chunk resumes where it stopped. On a soft
+    time limit the item in progress is recorded as failed and
+    ``SoftTimeLimitExceeded`` is re-raised, so the caller can queue the rest
+    of the chunk again.
+    """
+    chunk = AIJobChunk.objects.select_related('run').get(run_id=run_id, index=index)
+    if chunk.is_completed:
+        return
+    handler = _handlers[chunk.run.job]
+    done = set(chunk.completed_ids) | set(chunk.failed_ids)
+    pending = [item_id for item_id in chunk.item_ids if item_id not in done]
+    instances = handler.model.objects.in_bulk(pending)
+    # Items deleted since the sweep started have nothing left to do
+    chunk.completed_ids += [item_id for item_id in pending if item_id not in instances]
+
+    if handler.batch:
+        try:
+            completed = set(handler.func([instances[item_id] for item_id in pending if item_id in instances]))
+        except Exception as e:
+            logger.error(f"Error in {chunk.run.job} chunk {index} of run {run_id}: {str(e)}")
+            completed, chunk.last_error = set(), str(e)
+        chunk.completed_ids += [item_id for item_id in instances if item_id in completed]
+        chunk.failed_ids += [item_id for item_id in instances if item_id not in completed]
+    else:
+        chunk.save(update_fields=['completed_ids', 'updated_at'])
+        for item_id, instance in instances.items():
+            try:
+                handler.func(instance)
+                chunk.completed_ids.append(item_id)
+            except SoftTimeLimitExceeded:
+                chunk.failed_ids.append(item_id)
+                chunk.last_error = f"Item {item_id} exceeded the time limit"
+                chunk.save(update_fields=['failed_ids', 'last_error', 'updated_at'])
+                raise
+            except Exception as e:
+                logger.error(f"Error in {chunk.run.job} for item {item_id}: {str(e)}")
+                chunk.failed_ids.append(item_id)
+                chunk.last_error = str(e)
+            chunk.save(update_fields=['completed_ids', 'failed_ids', 'last_error', 'updated_at'])
+
+    _finish_chunk(chunk)
+
+
+def _finish_chunk(chunk):
+    with transaction.atomic():
+        # A chunk delivered twice is only counted once
+        finished = AIJobChunk.objects.filter(pk=chunk.pk, is_completed=False).update(
+            completed_ids=chunk.completed_ids, failed_ids=chunk.failed_ids, last_error=chunk.last_error,
+            is_completed=True, updated_at=timezone.now(),
+        )
+        if not finished:
+            return
+        AIJobRun.objects.filter(pk=chunk.run_id).update(
+            processed_items=F('processed_items') + len(chunk.completed_ids),
+            failed_items=F('failed_items') + len(chunk.failed_ids),
+            completed_chunks=F('completed_chunks') + 1,
+        )
+    # Whichever chunk finishes last closes the run
+    closed = AIJobRun.objects.filter(
+        pk=chunk.run_id, completed_chunks=F('total_chunks'), finished_at__isnull=True
+    ).update(
+        status=Case(When(failed_items=0, then=Value('completed')), default=Value('completed_with_errors')),
+        finished_at=timezone.now(),
+    )
+    if closed:
+        run = AIJobRun.objects.get(pk=chunk.run_id)
+        logger.info(f"Finished {run.job} run {run.id}: {run.processed_items} processed, {run.failed_items} failed")
@@ -1,8 +1,16 @@
 from celery import shared_task
-from .services import AIService
+from celery.exceptions import SoftTimeLimitExceeded
+from .registry import model_registry, ARTIFACT_BACKED_MODELS
+from .training import train_all_models
+from .batching import suggest_tags_batch
+from .features import refresh_task_features
+from .llm import LLM_CONCURRENCY
+from .sweeps import sweep_handler, start_sweep, run_sweep_chunk
+from .insights import refresh_stored_report, release_refresh_lock, invalidate_insights_reports
+from .dependency_graph import project_graphs
 from django.contrib.auth import get_user_model
 from Tasks.models import Task, Project, Tag
-from .models import AIPrediction, AIRecommendation, AIModel
+from .models import AIPrediction, AIRecommendation, AIModel, AIJobRun
 from django.utils import timezone
 from django.db import transaction
 import logging
@@ -14,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 @shared_task
 def analyze_new_tasks():
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     new_tasks = Task.objects.filter(sentiment__isnull=True)
     
     for task in new_tasks:
@@ -27,64 +35,125 @@ def analyze_new_tasks():
         except Exception as e:
             logger.error(f"Error analyzing sentiment for task {task.id}: {str(e)}")
 
+# Per-user and per-project sweeps are split into chunks that run as a
+# Celery group; progress and per-item checkpoints are kept in AIJobRun and
+# AIJobChunk (see AI.sweeps).
+
+@shared_task(bind=True, acks_late=True)
+def process_sweep_chunk(self, run_id, index):
+    try:
+        run_sweep_chunk(run_id, index)
+    except SoftTimeLimitExceeded:
+        # The slow item is recorded as failed; carry on with the rest of the
+        # chunk in a fresh task. Each retry gets past at least one item.
+        raise self.retry(countdown=0, max_retries=None)
+
+def _active_user_ids():
+    return User.objects.filter(is_active=True).values_list('pk', flat=True)
+
 @shared_task
 def generate_task_suggestions_for_users():
-    ai_service = AIService()
-    users = User.objects.filter(is_active=True)
-    
-    for user in users:
-        try:
-            suggestions = ai_service.generate_task_suggestions(user)
-            logger.info(f"Generated {len(suggestions)} task suggestions for user {user.id}")
-        except Exception as e:
-            logger.error(f"Error generating task suggestions for user {user.id}: {str(e)}")
+    # One chunk is one round of concurrent LLM calls; see AI.llm.LLMFanout
+    return start_sweep('generate_task_suggestions_for_users', _active_user_ids(), chunk_size=LLM_CONCURRENCY).id
+
+@sweep_handler('generate_task_suggestions_for_users', model=User, batch=True)
+def generate_task_suggestions_for_chunk(users):
+    ai_service = model_registry.get('ai_service')
+    results = ai_service.generate_task_suggestions_for_users(users)
+    for user_id, suggestions in results.items():
+        logger.info(f"Generated {len(suggestions)} task suggestions for user {user_id}")
+    # Users whose request failed get no suggestions
+    return [user_id for user_id, suggestions in results.items() if suggestions]
 
 @shared_task
 def optimize_user_schedules():
-    ai_service = AIService()
-    users = User.objects.filter(is_active=True)
-    
-    for user in users:
-        try:
-            optimized_schedule = ai_service.optimize_user_schedule(user)
-            logger.info(f"Optimized schedule for user {user.id}")
-        except Exception as e:
-            logger.error(f"Error optimizing schedule for user {user.id}: {str(e)}")
+    return start_sweep('optimize_user_schedules', _active_user_ids()).id
+
+@sweep_handler('optimize_user_schedules', model=User)
+def optimize_schedule_for_user(user):
+    ai_service = model_registry.get('ai_service')
+    ai_service.optimize_user_schedule(user)
+    logger.info(f"Optimized schedule for user {user.id}")
 
 @shared_task
-def update_ai_models():
-    ai_service = AIService()
+def update_ai_models(incremental=True):
+    # The only place models are trained; web workers load the saved artifacts.
+    # Task models are updated from the rows added since their last watermark
+    # unless incremental=False forces a full retrain.
     try:
-        ai_service.task_completion_model = ai_service._train_task_completion_model()
-        ai_service.task_priority_model = ai_service._train_task_priority_model()
-        logger.info("Successfully updated AI models")
+        trained = train_all_models(incremental=incremental)
+        for name in ARTIFACT_BACKED_MODELS:
+            model_registry.reload(name)
+        logger.info(f"Successfully updated AI models: {', '.join(trained)}")
     except Exception as e:
         logger.error(f"Error updating AI models: {str(e)}")
 
+@shared_task
+def suggest_tags_for_untagged_tasks(batch_size=512):
+    TaskTag = Task.tags.through
+    tag_cache = {}
+    tagged = 0
+
+    untagged = Task.objects.filter(tags__isnull=True).exclude(description='').values_list('id', 'user_id', 'description')
+    tasks = list(untagged)
+    for start in range(0, len(tasks), batch_size):
+        chunk = tasks[start:start + batch_size]
+        try:
+            suggestions = suggest_tags_batch([description for _, _, description in chunk])
+            links = []
+            for (task_id, user_id, _), tag_names in zip(chunk, suggestions):
+                for tag_name in tag_names:
+                    if tag_name not in tag_cache:
+                        tag_cache[tag_name], _ = Tag.objects.get_or_create(name=tag_name, defaults={'user_id': user_id})
+                    links.append(TaskTag(task_id=task_id, tag_id=tag_cache[tag_name].id))
+            TaskTag.objects.bulk_create(links, ignore_conflicts=True)
+            # bulk_create sends no m2m_changed, so refresh the stored tag counts here
+            task_ids = {link.task_id for link in links}
+            transaction.on_commit(lambda task_ids=task_ids: refresh_task_features(task_ids))
+            tagged += len(chunk)
+        except Exception as e:
+            logger.error(f"Error suggesting tags for tasks {chunk[0][0]}-{chunk[-1][0]}: {str(e)}")
+
+    logger.info(f"Suggested tags for {tagged} untagged tasks")
+
+@shared_task
+def rebuild_task_features():
+    refreshed = refresh_task_features()
+    logger.info(f"Rebuilt stored features for {refreshed} tasks")
+
 @shared_task
 def clean_old_predictions_and_recommendations():
     thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
     AIPrediction.objects.filter(created_at__lt=thirty_days_ago).delete()
     AIRecommendation.objects.filter(created_at__lt=thirty_days_ago).delete()
+    AIJobRun.objects.filter(started_at__lt=thirty_days_ago).delete()
     logger.info("Cleaned old predictions and recommendations")
 
 @shared_task
 def predict_task_completion_times():
-    ai_service = AIService()
-    open_tasks = Task.objects.filter(status='open', estimated_completion_time__isnull=True)
-    
-    for task in open_tasks:
-        try:
-            completion_time = ai_service.predict_task_completion_time(task)
-            task.estimated_completion_time = completion_time
-            task.save()
-            logger.info(f"Predicted completion time for task {task.id}")
-        except Exception as e:
-            logger.error(f"Error predicting completion time for task {task.id}: {str(e)}")
+    ai_service = model_registry.get('ai_service')
+    open_tasks = Task.objects.filter(status='open', ai_estimated_duration__isnull=True)
+
+    try:
+        estimates = ai_service.predict_task_completion_times(open_tasks)
+        Task.objects.bulk_update(
+            [Task(id=estimate['task_id'], ai_estimated_duration=estimate['estimated_completion_time']) for estimate in estimates],
+            ['ai_estimated_duration'],
+            batch_size=500,
+        )
+        # bulk_update sends no signals; cached graphs and reports hold the old durations
+        task_ids = [estimate['task_id'] for estimate in estimates]
+        project_ids = set(Task.objects.filter(pk__in=task_ids, project__isnull=False).values_list('project_id', flat=True))
+        for project_id in project_ids:
+            project_graphs.invalidate(project_id)
+        invalidate_insights_reports(project_ids)
+        logger.info(f"Predicted completion time for {len(estimates)} tasks")
+    except Exception as e:
+        logger.error(f"Error predicting task completion times: {str(e)}")
 
 @shared_task
 def predict_task_priorities():
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     open_tasks = Task.objects.filter(status='open', ai_priority__isnull=True)
     
     for task in open_tasks:
@@ -99,7 +168,7 @@ def predict_task_priorities():
 @shared_task
 def apply_pending_recommendations():
     pending_recommendations = AIRecommendation.objects.filter(is_applied=False)
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     
     for recommendation in pending_recommendations:
         try:
@@ -114,32 +183,31 @@ def apply_pending_recommendations():
 
 @shared_task
 def analyze_user_productivity():
-    users = User.objects.filter(is_active=True)
-    for user in users:
-        try:
-            completed_tasks = Task.objects.filter(user=user, status='completed', completed_at__gte=timezone.now() - timedelta(days=30))
-            avg_completion_time = completed_tasks.aggregate(Avg('time_spent'))['time_spent__avg']
-            task_count = completed_tasks.count()
-            productivity_score = task_count * (1 / avg_completion_time.total_seconds() if avg_completion_time else 1)
-            
-            AIRecommendation.objects.create(
-                user=user,
-                model=AIModel.objects.get(name='Productivity Analyzer'),
-                recommendation_type='productivity_insight',
-                recommendation={
-                    'productivity_score': productivity_score,
-                    'completed_tasks': task_count,
-                    'avg_completion_time': str(avg_completion_time) if avg_completion_time else None
-                },
-                confidence=0.9
-            )
-            logger.info(f"Analyzed productivity for user {user.id}")
-        except Exception as e:
-            logger.error(f"Error analyzing productivity for user {user.id}: {str(e)}")
+    return start_sweep('analyze_user_productivity', _active_user_ids()).id
+
+@sweep_handler('analyze_user_productivity', model=User)
+def analyze_productivity_for_user(user):
+    completed_tasks = Task.objects.filter(user=user, status='completed', completed_at__gte=timezone.now() - timedelta(days=30))
+    avg_completion_time = completed_tasks.aggregate(Avg('time_spent'))['time_spent__avg']
+    task_count = completed_tasks.count()
+    productivity_score = task_count * (1 / avg_completion_time.total_seconds() if avg_completion_time else 1)
+
+    AIRecommendation.objects.create(
+        user=user,
+        model=AIModel.objects.get(name='Productivity Analyzer'),
+        recommendation_type='productivity_insight',
+        recommendation={
+            'productivity_score': productivity_score,
+            'completed_tasks': task_count,
+            'avg_completion_time': str(avg_completion_time) if avg_completion_time else None
+        },
+        confidence=0.9
+    )
+    logger.info(f"Analyzed productivity for user {user.id}")
 
 @shared_task
 def suggest_task_collaborations():
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     projects = Project.objects.annotate(user_count=Count('tasks__user', distinct=True)).filter(user_count__gt=1)
     
     for project in projects:
@@ -164,7 +232,7 @@ def suggest_task_collaborations():
 
 @shared_task
 def analyze_task_dependencies():
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     open_tasks = Task.objects.filter(status='open')
     
     for task in open_tasks:
@@ -183,28 +251,37 @@ def analyze_task_dependencies():
         except Exception as e:
             logger.error(f"Error analyzing dependencies for task {task.id}: {str(e)}")
 
+@shared_task
+def refresh_insights_report(project_id):
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        release_refresh_lock(project_id)
+        return
+    try:
+        refresh_stored_report(project, model_registry.get('enhanced_ai_service').generate_ai_insights_report)
+    except Exception as e:
+        logger.error(f"Error refreshing AI insights report for project {project_id}: {str(e)}")
+
 @shared_task
 def generate_project_insights():
-    ai_service = AIService()
-    projects = Project.objects.all()
-    
-    for project in projects:
-        try:
-            insights = ai_service.generate_project_insights(project)
-            AIRecommendation.objects.create(
-                user=project.user,
-                model=AIModel.objects.get(name='Project Insight Generator'),
-                recommendation_type='project_insights',
-                recommendation=insights,
-                confidence=0.9
-            )
-            logger.info(f"Generated insights for project {project.id}")
-        except Exception as e:
-            logger.error(f"Error generating insights for project {project.id}: {str(e)}")
+    return start_sweep('generate_project_insights', Project.objects.values_list('pk', flat=True)).id
+
+@sweep_handler('generate_project_insights', model=Project)
+def generate_insights_for_project(project):
+    ai_service = model_registry.get('ai_service')
+    insights = ai_service.generate_project_insights(project)
+    AIRecommendation.objects.create(
+        user=project.user,
+        model=AIModel.objects.get(name='Project Insight Generator'),
+        recommendation_type='project_insights',
+        recommendation=insights,
+        confidence=0.9
+    )
+    logger.info(f"Generated insights for project {project.id}")
 
 @shared_task
 def update_tag_relevance():
-    ai_service = AIService()
+    ai_service = model_registry.get('ai_service')
     tags = Tag.objects.all()
     
     for tag in tags:
@@ -218,19 +295,17 @@ def update_tag_relevance():
 
 @shared_task
 def generate_productivity_reports():
-    ai_service = AIService()
-    users = User.objects.filter(is_active=True)
-    
-    for user in users:
-        try:
-            report = ai_service.generate_productivity_report(user)
-            AIRecommendation.objects.create(
-                user=user,
-                model=AIModel.objects.get(name='Productivity Reporter'),
-                recommendation_type='productivity_report',
-                recommendation=report,
-                confidence=0.95
-            )
-            logger.info(f"Generated productivity report for user {user.id}")
-        except Exception as e:
-            logger.error(f"Error generating productivity report for user {user.id}: {str(e)}")
+    return start_sweep('generate_productivity_reports', _active_user_ids()).id
+
+@sweep_handler('generate_productivity_reports', model=User)
+def generate_productivity_report_for_user(user):
+    ai_service = model_registry.get('ai_service')
+    report = ai_service.generate_productivity_report(user)
+    AIRecommendation.objects.create(
+        user=user,
+        model=AIModel.objects.get(name='Productivity Reporter'),
+        recommendation_type='productivity_report',
+        recommendation=report,
+        confidence=0.95
+    )
+    logger.info(f"Generated productivity report for user {user.id}")
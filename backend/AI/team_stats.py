@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F, FloatField, Func, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from Tasks.models import Task, Project
+from .models import PeerReview, Communication
+
+User = get_user_model()
+
+TEAM_STATS_CACHE_TTL = getattr(settings, 'AI_TEAM_STATS_CACHE_TTL', 60 * 60)
+# Communication counts are divided by this to give a per-day frequency
+COMMUNICATION_WINDOW_DAYS = 30
+
+
+def _cache_key(project_id):
+    return f"ai:team-stats:{project_id}"
+
+
+def _aggregate(queryset, function, field='pk'):
+    # Correlated aggregate without GROUP BY; queryset is already filtered on OuterRef
+    values = (
+        queryset.order_by()
+        .annotate(value=Func(F(field), function=function, output_field=FloatField()))
+        .values('value')[:1]
+    )
+    return Subquery(values, output_field=FloatField())
+
+
+def _total(queryset, function, field='pk'):
+    return Coalesce(_aggregate(queryset, function, field), 0.0)
+
+
+def _compute_team_stats(project_id):
+    assigned = Task.objects.filter(assigned_to=OuterRef('pk'))
+    completed = assigned.filter(status='completed')
+    rows = User.objects.filter(team_projects=project_id).annotate(
+        current_workload=_total(assigned.filter(status='in_progress'), 'SUM', 'estimated_hours'),
+        completed_tasks=_total(completed, 'COUNT'),
+        on_time_tasks=_total(completed.filter(completed_at__lte=F('due_date')), 'COUNT'),
+        avg_task_complexity=_aggregate(completed, 'AVG', 'complexity'),
+        avg_peer_rating=_aggregate(PeerReview.objects.filter(reviewee=OuterRef('pk')), 'AVG', 'rating'),
+        communications=_total(
+            Communication.objects.filter(Q(sender=OuterRef('pk')) | Q(receiver=OuterRef('pk'))), 'COUNT'
+        ),
+    ).values(
+        'pk', 'current_workload', 'completed_tasks', 'on_time_tasks',
+        'avg_task_complexity', 'avg_peer_rating', 'communications',
+    )
+
+    stats = {}
+    for row in rows:
+        completed_tasks = row['completed_tasks']
+        stats[row['pk']] = {
+            'current_workload': row['current_workload'],
+            'completed_tasks': int(completed_tasks),
+            'on_time_rate': row['on_time_tasks'] / completed_tasks if completed_tasks else 0.0,
+            'avg_task_complexity': row['avg_task_complexity'],
+            'avg_peer_rating': row['avg_peer_rating'],
+            'communication_frequency': row['communications'] / COMMUNICATION_WINDOW_DAYS,
+        }
+    return stats
+
+
+def team_member_stats(project):
+    """Workload, on-time rate, complexity, peer rating and communication
+    frequency for every member of ``project``, keyed by user id.
+
+    Computed with one query and cached per project until a task, review,
+    communication or team change touching the project invalidates it.
+    """
+    key = _cache_key(project.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_team_stats(project.pk)
+        cache.set(key, stats, TEAM_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_team_stats(project_ids=(), user_ids=()):
+    """Drop cached stats for the given projects and every project the users belong to."""
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        project_ids.update(
+            Project.objects.filter(team__in=user_ids).values_list('pk', flat=True).distinct()
+        )
+    if project_ids:
+        cache.delete_many([_cache_key(project_id) for project_id in project_ids])
@@ -1,3 +1,425 @@
-from django.test import TestCase
+import threading
+from datetime import date
 
-# Create your tests here.
+from celery.exceptions import SoftTimeLimitExceeded
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from Tasks.models import Task, Project, TaskDependency, Tag, Skill, UserProductivity
+from .dependency_graph import (
+    ProjectDAG, DependencyCycleError, create_task_dependencies,
+    FINISH_TO_START, START_TO_START, FINISH_TO_FINISH, START_TO_FINISH,
+)
+from .inference import MicroBatcher
+from .models import AIJobRun
+from .scheduling import schedule_tasks
+from .services import ResourceAllocationAI
+from .sweeps import sweep_handler, start_sweep, run_sweep_chunk
+from .workload import MemberHeaps, balance_workload
+
+
+class ProjectDAGTests(SimpleTestCase):
+    def test_reachability_and_parallel_tasks(self):
+        dag = ProjectDAG([1, 2, 3, 4], [1, 1, 1, 1], [(1, 2, FINISH_TO_START), (2, 3, FINISH_TO_START)])
+        self.assertTrue(dag.reaches(1, 3))
+        self.assertFalse(dag.reaches(3, 1))
+        self.assertEqual(dag.parallel_tasks(2), [4])
+        order = dag.topological_task_ids()
+        self.assertLess(order.index(1), order.index(3))
+
+    def test_add_edge_rejects_cycle(self):
+        dag = ProjectDAG([1, 2, 3], [1, 1, 1], [(1, 2, FINISH_TO_START), (2, 3, FINISH_TO_START)])
+        dag.prepare()
+        with self.assertRaises(DependencyCycleError):
+            dag.add_edge(3, 1)
+        with self.assertRaises(DependencyCycleError):
+            dag.check_edges([(3, 1, FINISH_TO_START)])
+        # Removing the edge that closes the loop makes room for the new one
+        dag.check_edges([(3, 1, FINISH_TO_START)], removed=[(1, 2)])
+
+    def test_topological_order_rejects_cycle(self):
+        dag = ProjectDAG([1, 2], [1, 1], [(1, 2, FINISH_TO_START), (2, 1, FINISH_TO_START)])
+        with self.assertRaises(DependencyCycleError):
+            dag.topological_order()
+
+    def test_transitive_reduction_drops_implied_edges(self):
+        dag = ProjectDAG([1, 2, 3], [1, 1, 1], [
+            (1, 2, FINISH_TO_START), (2, 3, FINISH_TO_START), (1, 3, FINISH_TO_START),
+        ])
+        self.assertEqual(sorted(dag.transitive_reduction()), [(1, 2), (2, 3)])
+
+    def test_finish_to_start_chain(self):
+        dag = ProjectDAG([1, 2, 3], [3, 4, 2], [(1, 2, FINISH_TO_START), (2, 3, FINISH_TO_START)])
+        self.assertEqual(dag.critical_path(), [1, 2, 3])
+        self.assertEqual(dag.project_finish(), 9)
+
+    def test_start_to_start_slack(self):
+        dag = ProjectDAG([1, 2], [10, 1], [(1, 2, START_TO_START)])
+        schedule = dag.critical_path_schedule()
+        self.assertEqual(schedule[2]['earliest_start'], 0)
+        self.assertEqual(schedule[2]['slack'], 9)
+        self.assertEqual(dag.critical_path(), [1])
+        self.assertEqual(dag.project_finish(), 10)
+
+    def test_finish_to_finish_slack(self):
+        dag = ProjectDAG([1, 2], [5, 2], [(1, 2, FINISH_TO_FINISH)])
+        schedule = dag.critical_path_schedule()
+        self.assertEqual(schedule[2]['earliest_start'], 3)
+        self.assertEqual((schedule[1]['slack'], schedule[2]['slack']), (0, 0))
+        self.assertEqual(dag.critical_path(), [1, 2])
+        self.assertEqual(dag.project_finish(), 5)
+
+    def test_start_to_finish_slack(self):
+        dag = ProjectDAG([1, 2], [2, 5], [(1, 2, START_TO_FINISH)])
+        schedule = dag.critical_path_schedule()
+        self.assertEqual(schedule[1]['slack'], 3)
+        self.assertEqual(schedule[2]['slack'], 0)
+        self.assertEqual(dag.critical_path(), [2])
+        self.assertEqual(dag.project_finish(), 5)
+
+
+class DependencyCycleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='owner')
+        self.project = Project.objects.create(name='Project', user=self.user)
+        self.a, self.b, self.c = (
+            Task.objects.create(title=f"Task {name}", user=self.user, project=self.project) for name in 'abc'
+        )
+
+    def depend(self, dependency, task, dependency_type=FINISH_TO_START):
+        return TaskDependency.objects.create(dependency=dependency, task=task, dependency_type=dependency_type)
+
+    def test_rejects_cycle(self):
+        self.depend(self.a, self.b)
+        self.depend(self.b, self.c)
+        with self.assertRaises(DependencyCycleError):
+            self.depend(self.c, self.a)
+        with self.assertRaises(DependencyCycleError):
+            self.depend(self.a, self.a)
+
+    def test_sees_uncommitted_dependencies(self):
+        with transaction.atomic():
+            self.depend(self.a, self.b)
+            with self.assertRaises(DependencyCycleError):
+                self.depend(self.b, self.a)
+
+    def test_forgets_rolled_back_dependencies(self):
+        try:
+            with transaction.atomic():
+                self.depend(self.a, self.b)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.depend(self.b, self.a)
+
+    def test_sees_uncommitted_deletes(self):
+        with transaction.atomic():
+            self.depend(self.a, self.b).delete()
+            self.depend(self.b, self.a)
+
+    def test_editing_an_edge_replaces_it(self):
+        dependency = self.depend(self.a, self.b)
+        dependency.dependency, dependency.task = self.b, self.a
+        dependency.save()
+        self.assertEqual(TaskDependency.objects.get().task, self.a)
+
+    def test_rejects_cycle_across_projects(self):
+        other = Project.objects.create(name='Other', user=self.user)
+        outside = Task.objects.create(title='Task d', user=self.user, project=other)
+        loose = Task.objects.create(title='Task e', user=self.user)
+        self.depend(self.a, outside)
+        self.depend(outside, loose)
+        with self.assertRaises(DependencyCycleError):
+            self.depend(loose, self.a)
+
+    def test_bulk_create_rejects_whole_batch(self):
+        with self.assertRaises(DependencyCycleError):
+            create_task_dependencies([
+                TaskDependency(dependency=self.a, task=self.b, dependency_type=FINISH_TO_START),
+                TaskDependency(dependency=self.b, task=self.c, dependency_type=FINISH_TO_START),
+                TaskDependency(dependency=self.c, task=self.a, dependency_type=FINISH_TO_START),
+            ])
+        self.assertFalse(TaskDependency.objects.exists())
+
+
+def scheduled_task(task_id, hours, priority='medium', due_date=None):
+    return {'task_id': task_id, 'estimated_completion_time': hours, 'priority': priority, 'due_date': due_date}
+
+
+def scheduled_hours(schedule):
+    """``[(date, task_id, hours)]`` in the order the schedule lays them out."""
+    return [(day['date'], task['task_id'], task['scheduled_hours']) for day in schedule for task in day['tasks']]
+
+
+class ScheduleTasksTests(SimpleTestCase):
+    monday = date(2026, 1, 5)
+
+    def test_splits_tasks_across_working_days(self):
+        schedule = schedule_tasks([scheduled_task(1, 12)], daily_hours=8, start=date(2026, 1, 9))
+        self.assertEqual(scheduled_hours(schedule), [(date(2026, 1, 9), 1, 8), (date(2026, 1, 12), 1, 4)])
+
+    def test_dependency_order_holds_when_tasks_split(self):
+        tasks = [scheduled_task(1, 12, 'low'), scheduled_task(2, 4, 'urgent', due_date=self.monday)]
+        schedule = schedule_tasks(tasks, [(1, 2, FINISH_TO_START)], daily_hours=8, start=self.monday)
+        self.assertEqual(scheduled_hours(schedule), [
+            (self.monday, 1, 8), (date(2026, 1, 6), 1, 4), (date(2026, 1, 6), 2, 4),
+        ])
+
+    def test_least_slack_goes_first(self):
+        tasks = [scheduled_task(1, 4, 'urgent'), scheduled_task(2, 4, 'low', due_date=self.monday)]
+        schedule = schedule_tasks(tasks, daily_hours=8, start=self.monday)
+        self.assertEqual([task_id for _, task_id, _ in scheduled_hours(schedule)], [2, 1])
+
+    def test_prerequisite_inherits_dependent_deadline(self):
+        tasks = [
+            scheduled_task(1, 4, 'low'),
+            scheduled_task(2, 4, 'urgent', due_date=date(2026, 1, 6)),
+            scheduled_task(3, 4, 'low', due_date=self.monday),
+        ]
+        schedule = schedule_tasks(tasks, [(1, 3, FINISH_TO_START)], daily_hours=8, start=self.monday)
+        self.assertEqual([task_id for _, task_id, _ in scheduled_hours(schedule)], [1, 3, 2])
+
+    def test_every_dependency_type_holds(self):
+        tasks = [scheduled_task(task_id, hours) for task_id, hours in [(1, 3), (2, 13), (3, 8), (4, 1), (5, 5)]]
+        dependencies = [
+            (1, 2, START_TO_START), (2, 3, FINISH_TO_FINISH), (1, 4, START_TO_FINISH),
+            (4, 5, FINISH_TO_START), (3, 5, FINISH_TO_FINISH),
+        ]
+        schedule = schedule_tasks(tasks, dependencies, daily_hours=8, start=self.monday)
+        starts, finishes, clock = {}, {}, 0
+        for index, day in enumerate(schedule):
+            clock = index * 8
+            for task in day['tasks']:
+                starts.setdefault(task['task_id'], clock)
+                clock += task['scheduled_hours']
+                finishes[task['task_id']] = clock
+        for dependency_id, task_id, dependency_type in dependencies:
+            later, earlier = {
+                FINISH_TO_START: (starts[task_id], finishes[dependency_id]),
+                START_TO_START: (starts[task_id], starts[dependency_id]),
+                FINISH_TO_FINISH: (finishes[task_id], finishes[dependency_id]),
+                START_TO_FINISH: (finishes[task_id], starts[dependency_id]),
+            }[dependency_type]
+            self.assertGreaterEqual(later, earlier)
+
+    def test_cycles_are_ignored(self):
+        tasks = [scheduled_task(1, 2), scheduled_task(2, 2)]
+        schedule = schedule_tasks(tasks, [(1, 2, FINISH_TO_START), (2, 1, FINISH_TO_START)], start=self.monday)
+        self.assertEqual(sorted(task_id for _, task_id, _ in scheduled_hours(schedule)), [1, 2])
+
+
+class MemberHeapsTests(SimpleTestCase):
+    def setUp(self):
+        self.heaps = MemberHeaps(
+            {1: 0.0, 2: 6.0, 3: 2.0}, {1: 2.0, 2: 8.0, 3: 4.0}, {2: {'python'}, 3: {'python', 'rust'}},
+            max_load_days=2,
+        )
+
+    def test_least_loaded_relative_to_capacity(self):
+        self.assertEqual(self.heaps.least_loaded(), 1)
+        self.assertEqual(self.heaps.least_loaded({'python'}), 3)
+        self.assertEqual(self.heaps.least_loaded({'go'}), None)
+
+    def test_most_room_under_the_cap(self):
+        self.assertEqual(self.heaps.most_room(), 2)
+        self.assertEqual(self.heaps.most_room({'rust'}), 3)
+
+    def test_outdated_entries_are_skipped(self):
+        self.heaps.add(1, 4)
+        self.heaps.add(2, 9)
+        self.assertEqual(self.heaps.least_loaded(), 3)
+        self.assertEqual(self.heaps.most_room({'python'}), 3)
+
+
+class BalanceWorkloadTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username='owner')
+        self.project = Project.objects.create(name='Project', user=self.owner)
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.project.team.add(self.alice, self.bob)
+
+    def task(self, hours, tags=()):
+        task = Task.objects.create(
+            title='Task', user=self.owner, project=self.project, status='open', estimated_hours=hours
+        )
+        task.tags.add(*(Tag.objects.get_or_create(name=tag)[0] for tag in tags))
+        return task
+
+    def assignees(self, suggestions):
+        return {suggestion['task_id']: suggestion['suggested_assignee'] for suggestion in suggestions}
+
+    def test_balances_by_capacity(self):
+        tasks = [self.task(4) for _ in range(3)]
+        suggestions, unassigned = balance_workload(self.project, capacities={self.alice.pk: 4, self.bob.pk: 8})
+        self.assertEqual(unassigned, [])
+        self.assertEqual(self.assignees(suggestions), {
+            tasks[0].pk: self.alice.pk, tasks[1].pk: self.bob.pk, tasks[2].pk: self.bob.pk,
+        })
+
+    def test_skill_tags_are_requirements(self):
+        productivity = UserProductivity.objects.create(user=self.bob, date=timezone.localdate(), hours_worked=8)
+        productivity.skills.add(Skill.objects.create(name='Python', proficiency_level=3))
+        Skill.objects.create(name='Rust', proficiency_level=3)
+        python, rust = self.task(2, ['python']), self.task(2, ['rust'])
+        self.task(8).assigned_to.add(self.bob)
+
+        suggestions, unassigned = balance_workload(self.project, capacities={self.alice.pk: 8, self.bob.pk: 8})
+        self.assertEqual(self.assignees(suggestions), {python.pk: self.bob.pk})
+        self.assertEqual([entry['task_id'] for entry in unassigned], [rust.pk])
+
+    def test_task_over_the_cap_goes_to_the_member_with_room(self):
+        self.task(1).assigned_to.add(self.bob)
+        task = self.task(5)
+        suggestions, unassigned = balance_workload(
+            self.project, capacities={self.alice.pk: 1, self.bob.pk: 10}, max_load_days=2
+        )
+        self.assertEqual(self.assignees(suggestions), {task.pk: self.bob.pk})
+
+        suggestions, unassigned = balance_workload(
+            self.project, capacities={self.alice.pk: 1, self.bob.pk: 1}, max_load_days=2
+        )
+        self.assertEqual(suggestions, [])
+        self.assertEqual([entry['task_id'] for entry in unassigned], [task.pk])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def predict_concurrently(self, batcher, rows):
+        results = {}
+
+        def predict(row):
+            try:
+                results[row] = batcher.predict(row, timeout=5)
+            except Exception as e:
+                results[row] = e
+        threads = [threading.Thread(target=predict, args=(row,)) for row in rows]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalesces_concurrent_rows(self):
+        batches = []
+
+        def predict_batch(rows):
+            batches.append(list(rows))
+            return [row * 10 for row in rows]
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait=0.2)
+        results = self.predict_concurrently(batcher, range(8))
+        self.assertEqual(results, {row: row * 10 for row in range(8)})
+        self.assertLess(len(batches), 8)
+        self.assertEqual(sorted(row for batch in batches for row in batch), list(range(8)))
+
+    def test_mismatched_batch_fails_every_caller(self):
+        batcher = MicroBatcher(lambda rows: rows[1:], max_batch_size=4, max_wait=0.2)
+        results = self.predict_concurrently(batcher, range(4))
+        for result in results.values():
+            self.assertIsInstance(result, ValueError)
+
+    def test_failed_batch_fails_every_caller(self):
+        def predict_batch(rows):
+            raise RuntimeError('model failed')
+        batcher = MicroBatcher(predict_batch, max_wait=0.01)
+        with self.assertRaisesMessage(RuntimeError, 'model failed'):
+            batcher.predict(1, timeout=5)
+
+
+processed_users = []
+slow_user_ids = set()
+
+
+@sweep_handler('test_sweep', model=User)
+def process_test_user(user):
+    processed_users.append(user.pk)
+    if user.pk in slow_user_ids:
+        slow_user_ids.discard(user.pk)
+        raise SoftTimeLimitExceeded()
+
+
+@sweep_handler('test_batch_sweep', model=User, batch=True)
+def process_test_users(users):
+    return [user.pk for user in users if user.username != 'fails']
+
+
+class SweepTests(TestCase):
+    def setUp(self):
+        processed_users.clear()
+        slow_user_ids.clear()
+        self.user_ids = [User.objects.create(username=f"user{i}").pk for i in range(5)]
+
+    def run_of(self, run):
+        return AIJobRun.objects.get(pk=run.pk)
+
+    def test_chunk_delivered_twice_is_counted_once(self):
+        run = start_sweep('test_sweep', self.user_ids, chunk_size=3)
+        run_sweep_chunk(run.id, 0)
+        run_sweep_chunk(run.id, 0)
+        run = self.run_of(run)
+        self.assertEqual((run.processed_items, run.completed_chunks, run.status), (3, 1, 'running'))
+        self.assertEqual(processed_users, self.user_ids[:3])
+
+        run_sweep_chunk(run.id, 1)
+        run = self.run_of(run)
+        self.assertEqual((run.processed_items, run.completed_chunks, run.status), (5, 2, 'completed'))
+        self.assertIsNotNone(run.finished_at)
+
+    def test_retried_chunk_resumes_after_the_slow_item(self):
+        slow_user_ids.add(self.user_ids[1])
+        run = start_sweep('test_sweep', self.user_ids, chunk_size=5)
+        with self.assertRaises(SoftTimeLimitExceeded):
+            run_sweep_chunk(run.id, 0)
+        run_sweep_chunk(run.id, 0)
+        run = self.run_of(run)
+        # Every item ran once; the slow one is not retried
+        self.assertEqual(processed_users, self.user_ids)
+        self.assertEqual((run.processed_items, run.failed_items), (4, 1))
+        self.assertEqual(run.status, 'completed_with_errors')
+
+    def test_batch_handler_reports_failed_items(self):
+        User.objects.filter(pk=self.user_ids[2]).update(username='fails')
+        User.objects.filter(pk=self.user_ids[4]).delete()
+        run = start_sweep('test_batch_sweep', self.user_ids, chunk_size=5)
+        run_sweep_chunk(run.id, 0)
+        chunk = run.chunks.get()
+        self.assertEqual(sorted(chunk.completed_ids), sorted(self.user_ids[:2] + self.user_ids[3:]))
+        self.assertEqual(chunk.failed_ids, [self.user_ids[2]])
+        self.assertEqual(self.run_of(run).processed_items, 4)
+
+
+class ApplyAllocationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username='owner')
+        self.project = Project.objects.create(name='Project', user=self.owner)
+        self.alice, self.bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        self.project.team.add(self.alice, self.bob)
+        self.allocation = ResourceAllocationAI(load_models=False)
+
+    def tasks(self, count):
+        return [
+            Task.objects.create(title='Task', user=self.owner, project=self.project, status='not_started')
+            for _ in range(count)
+        ]
+
+    def assignees(self, tasks):
+        return [list(task.assigned_to.values_list('pk', flat=True)) for task in tasks]
+
+    def test_assigns_highest_scoring_pairs(self):
+        tasks = self.tasks(2)
+        tasks[0].assigned_to.add(self.alice)
+        self.allocation.apply_allocation(self.project, [1, 5, 4, 2])
+        self.assertEqual(self.assignees(tasks), [[self.bob.pk], [self.alice.pk]])
+
+    def test_member_can_take_several_tasks(self):
+        tasks = self.tasks(3)
+        self.allocation.apply_allocation(self.project, [9, 1] * 3, max_tasks_per_member=3)
+        self.assertEqual(self.assignees(tasks), [[self.alice.pk]] * 3)
+
+    def test_rejects_mismatched_scores(self):
+        tasks = self.tasks(3)
+        with self.assertRaises(ValueError):
+            self.allocation.apply_allocation(self.project, [1, 2, 3])
+        with self.assertRaises(ValueError):
+            self.allocation.apply_allocation(self.project, [1] * 6, max_tasks_per_member=1)
+        self.assertEqual(self.assignees(tasks), [[], [], []])
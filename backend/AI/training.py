@@ -0,0 +1,91 @@
+import logging
+
+from django.db.models import Max
+
+from Tasks.models import Task
+from .artifacts import (
+    save_model_artifact, load_model_artifact, training_watermark,
+    TASK_COMPLETION_MODEL, TASK_PRIORITY_MODEL, WORKFLOW_AUTOMATION_MODEL,
+    RESOURCE_ALLOCATION_MODEL, TASK_DEPENDENCY_MODEL, RISK_ASSESSMENT_MODEL, COLLABORATION_MODEL,
+)
+from .services import (
+    AIService, WorkflowAutomationAI, ResourceAllocationAI, TaskDependencyAnalyzer,
+    RiskAssessmentAI, CollaborationAI,
+)
+from .features import TASK_FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_FEATURE_NAMES = ['estimated_duration', 'priority', 'complexity', 'num_dependencies', 'team_size']
+WORKFLOW_FEATURE_NAMES = ['workflow_text_tfidf', 'trigger_type', 'action_type']
+
+
+def _completion_watermark():
+    return Task.objects.filter(status='completed').aggregate(latest=Max('completed_at'))['latest']
+
+
+def _priority_watermark():
+    return Task.objects.aggregate(latest=Max('created_at'))['latest']
+
+
+def train_all_models(incremental=False):
+    ai_service = AIService(load_models=False)
+    dependency_analyzer = TaskDependencyAnalyzer(load_models=False)
+
+    trained = []
+    incremental_trainers = [
+        (TASK_COMPLETION_MODEL, ai_service._train_task_completion_model,
+         ai_service._update_task_completion_model, _completion_watermark),
+        (TASK_PRIORITY_MODEL, ai_service._train_task_priority_model,
+         ai_service._update_task_priority_model, _priority_watermark),
+    ]
+    for name, train, update, current_watermark in incremental_trainers:
+        try:
+            if _train_task_model(name, train, update, current_watermark, incremental):
+                trained.append(name)
+        except Exception as e:
+            logger.error(f"Error training {name}: {str(e)}")
+
+    trainers = [
+        (WORKFLOW_AUTOMATION_MODEL, WorkflowAutomationAI(load_models=False).train_automation_model, WORKFLOW_FEATURE_NAMES),
+        (RESOURCE_ALLOCATION_MODEL, ResourceAllocationAI(load_models=False).train_allocation_model, None),
+        (TASK_DEPENDENCY_MODEL, dependency_analyzer.train_dependency_model, DEPENDENCY_FEATURE_NAMES),
+        (RISK_ASSESSMENT_MODEL, RiskAssessmentAI(load_models=False).train_risk_model, None),
+        (COLLABORATION_MODEL, CollaborationAI(load_models=False).train_collaboration_model, None),
+    ]
+    for name, train, feature_schema in trainers:
+        try:
+            model, metrics = train()
+            if model is None:
+                logger.warning(f"Skipped saving {name}: training produced no model")
+                continue
+            if feature_schema is None:
+                feature_schema = [str(column) for column in getattr(model, 'feature_names_in_', [])]
+            save_model_artifact(name, model, metrics=metrics, feature_schema=feature_schema)
+            trained.append(name)
+        except Exception as e:
+            logger.error(f"Error training {name}: {str(e)}")
+    return trained
+
+
+def _train_task_model(name, train, update, current_watermark, incremental):
+    # Read the watermark before touching the data: rows that land while we
+    # train are picked up again by the next delta instead of being skipped.
+    watermark = current_watermark()
+    since = training_watermark(name) if incremental else None
+    model = load_model_artifact(name, mmap_mode=None) if since else None
+
+    if model is None:
+        model, metrics = train()
+        metrics['mode'] = 'full'
+    else:
+        result = update(model, since)
+        if result is None:
+            logger.info(f"No new training data for {name} since {since}")
+            return False
+        model, metrics = result
+        # update() reports 'full' when it had to retrain instead
+        metrics.setdefault('mode', 'incremental')
+
+    save_model_artifact(name, model, metrics=metrics, feature_schema=TASK_FEATURE_NAMES, watermark=watermark)
+    return True
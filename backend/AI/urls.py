@@ -1,4 +1,5 @@
 from django.urls import path, include
+from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 from .views import AIPredictionViewSet, AIRecommendationViewSet, AIServiceViewSet
 
@@ -20,7 +21,12 @@ urlpatterns = [
     path('services/analyze-task-sentiment/', AIServiceViewSet.as_view({'post': 'analyze_task_sentiment'}), name='analyze-task-sentiment'),
     path('services/predict-task-completion-time/', AIServiceViewSet.as_view({'post': 'predict_task_completion_time'}), name='predict-task-completion-time'),
     path('services/predict-task-priority/', AIServiceViewSet.as_view({'post': 'predict_task_priority'}), name='predict-task-priority'),
+    path('services/predict-task-completion-times/', AIServiceViewSet.as_view({'post': 'predict_task_completion_times'}), name='predict-task-completion-times'),
+    path('services/predict-task-priorities/', AIServiceViewSet.as_view({'post': 'predict_task_priorities'}), name='predict-task-priorities'),
     path('services/create-task-with-nlp/', AIServiceViewSet.as_view({'post': 'create_task_with_nlp'}), name='create-task-with-nlp'),
+    path('services/analyze-texts/', AIServiceViewSet.as_view({'post': 'analyze_texts'}), name='analyze-texts'),
+    # Explicit routes skip @action kwargs; pass the permission again
+    path('services/result-cache-stats/', AIServiceViewSet.as_view({'get': 'result_cache_stats'}, permission_classes=[permissions.IsAdminUser]), name='result-cache-stats'),
     path('services/get-workflow-suggestions/', AIServiceViewSet.as_view({'post': 'get_workflow_suggestions'}), name='get-workflow-suggestions'),
     path('services/optimize-project-resources/', AIServiceViewSet.as_view({'post': 'optimize_project_resources'}), name='optimize-project-resources'),
     path('services/analyze-task-dependencies/', AIServiceViewSet.as_view({'post': 'analyze_task_dependencies'}), name='analyze-task-dependencies'),
@@ -2,9 +2,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .serializers import AIPredictionSerializer, AIRecommendationSerializer, AIFeedbackSerializer
+from .serializers import AIPredictionSerializer, AIRecommendationSerializer, AIFeedbackSerializer, BulkTaskSelectionSerializer
 from .models import AIPrediction, AIRecommendation, AIFeedback
-from .services import EnhancedAIService
+from .registry import model_registry
+from .artifacts import ModelNotTrainedError
+from .result_cache import result_cache_stats
 from Tasks.models import Task, Project
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -42,7 +44,7 @@ class AIRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['post'])
     def apply_recommendation(self, request, pk=None):
         recommendation = self.get_object()
-        ai_service = EnhancedAIService()
+        ai_service = model_registry.get('enhanced_ai_service')
         result = ai_service.apply_recommendation(recommendation)
         if result:
             recommendation.is_applied = True
@@ -63,9 +65,15 @@ class AIServiceViewSet(viewsets.ViewSet):
     authentication_classes = [TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.ai_service = EnhancedAIService()
+    @property
+    def ai_service(self):
+        return model_registry.get('enhanced_ai_service')
+
+    def handle_exception(self, exc):
+        # Models are only trained by update_ai_models; until then there is nothing to serve
+        if isinstance(exc, ModelNotTrainedError):
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return super().handle_exception(exc)
 
     @action(detail=False, methods=['post'])
     def generate_task_suggestions(self, request):
@@ -104,6 +112,37 @@ class AIServiceViewSet(viewsets.ViewSet):
         priority = self.ai_service.predict_task_priority(task)
         return Response({'predicted_priority': priority})
 
+    @action(detail=False, methods=['post'])
+    def predict_task_completion_times(self, request):
+        tasks, error = self._get_bulk_tasks(request)
+        if error:
+            return error
+        estimates = self.ai_service.predict_task_completion_times(tasks)
+        return Response(estimates)
+
+    @action(detail=False, methods=['post'])
+    def predict_task_priorities(self, request):
+        tasks, error = self._get_bulk_tasks(request)
+        if error:
+            return error
+        estimates = self.ai_service.predict_task_priorities(tasks)
+        return Response(estimates)
+
+    def _get_bulk_tasks(self, request):
+        serializer = BulkTaskSelectionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return None, Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        tasks = Task.objects.filter(user=request.user)
+        if data.get('task_ids'):
+            tasks = tasks.filter(id__in=data['task_ids'])
+        if data.get('project_id'):
+            tasks = tasks.filter(project_id=data['project_id'])
+        if data.get('status'):
+            tasks = tasks.filter(status=data['status'])
+        return tasks.order_by('id'), None
+
     @action(detail=False, methods=['post'])
     def create_task_with_nlp(self, request):
         text = request.data.get('text')
@@ -112,6 +151,19 @@ class AIServiceViewSet(viewsets.ViewSet):
         task = self.ai_service.create_task_with_nlp(request.user, text)
         return Response({'task_id': task.id, 'title': task.title})
 
+    @action(detail=False, methods=['post'])
+    def analyze_texts(self, request):
+        texts = request.data.get('texts')
+        if not texts or not isinstance(texts, list):
+            return Response({'error': 'texts must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        analyses = self.ai_service.analyze_texts([str(text) for text in texts])
+        return Response(analyses)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def result_cache_stats(self, request):
+        # Counters are per worker process
+        return Response(result_cache_stats())
+
     @action(detail=False, methods=['post'])
     def get_workflow_suggestions(self, request):
         suggestions = self.ai_service.get_workflow_suggestions(request.user)
@@ -168,7 +220,7 @@ class AIServiceViewSet(viewsets.ViewSet):
         if not project_id:
             return Response({'error': 'project_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         project = get_object_or_404(Project, id=project_id, user=request.user)
-        report = self.ai_service.generate_ai_insights_report(project)
+        report = self.ai_service.cached_insights_report(project)
         return Response(report)
 
 
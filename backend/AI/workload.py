@@ -0,0 +1,161 @@
+import heapq
+from collections import defaultdict
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+
+from Tasks.models import Task, Skill, UserProductivity
+from .dependency_graph import DEFAULT_TASK_DURATION
+from .scheduling import daily_capacities
+from .team_stats import invalidate_team_stats
+from .insights import invalidate_insights_reports
+
+
+def _task_hours():
+    return Coalesce('ai_estimated_duration', 'estimated_hours', Value(DEFAULT_TASK_DURATION))
+
+
+class MemberHeaps:
+    """Team members ordered by queued work relative to capacity.
+
+    There is one min-heap for the whole team and one per skill. When a
+    member's load changes they are pushed again with the new load; outdated
+    entries are skipped when they reach the top, so each update costs
+    O(log m) per skill the member holds. With ``max_load_days`` a second
+    set of heaps orders members by the hours they have left under that cap.
+    """
+
+    def __init__(self, loads, capacities, skills, max_load_days=None):
+        self.loads = loads
+        self.capacities = capacities
+        self.skills = skills
+        self.max_load_days = max_load_days
+        self.heaps = defaultdict(list)
+        self.room_heaps = defaultdict(list)
+        for member in loads:
+            self._push(member)
+
+    def _push(self, member):
+        load, capacity = self.loads[member], self.capacities[member]
+        entries = [(self.heaps, (load / capacity, member, load))]
+        if self.max_load_days is not None:
+            entries.append((self.room_heaps, (load - self.max_load_days * capacity, member, load)))
+        for heaps, entry in entries:
+            for skill in chain([None], self.skills.get(member, ())):
+                heapq.heappush(heaps[skill], entry)
+
+    def _top(self, heaps, required_skills):
+        best = None
+        for skill in required_skills or [None]:
+            heap = heaps.get(skill)
+            while heap and heap[0][2] != self.loads[heap[0][1]]:
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0] < best):
+                best = heap[0]
+        return best[1] if best else None
+
+    def least_loaded(self, required_skills=None):
+        """The least loaded member holding any of ``required_skills`` (anyone if empty)."""
+        return self._top(self.heaps, required_skills)
+
+    def most_room(self, required_skills=None):
+        """The member holding any of ``required_skills`` (anyone if empty) with
+        the most hours left under ``max_load_days``."""
+        return self._top(self.room_heaps, required_skills)
+
+    def add(self, member, hours):
+        self.loads[member] += hours
+        self._push(member)
+
+
+def balance_workload(project, capacities=None, max_load_days=None):
+    """Suggest assignees for the project's open, unassigned tasks.
+
+    Tasks go, largest first, to the team member with the least open work in
+    the project relative to their daily capacity (``capacities`` in hours
+    per day; by default each member's recent logged hours). Tags that name
+    a skill are requirements: such a task only goes to members holding one
+    of those skills, and those tasks are placed first. With
+    ``max_load_days`` no member is given more than that many days of work;
+    a task the least loaded member cannot fit goes to the member with the
+    most hours left under the cap, if it fits there. Members with no
+    capacity get no tasks.
+
+    Each task costs O(log m) per required skill; all inputs are read in a
+    fixed number of queries. Returns ``(suggestions, unassigned)``.
+    """
+    member_ids = list(project.team.values_list('pk', flat=True))
+    open_tasks = Task.objects.filter(project=project, status='open')
+    unassigned_tasks = open_tasks.filter(assigned_to__isnull=True)
+    tasks = list(unassigned_tasks.order_by().annotate(hours=_task_hours()).values_list('pk', 'hours'))
+    if not tasks:
+        return [], []
+    if not member_ids:
+        return [], [{'task_id': task_id, 'reason': 'The project has no team members'} for task_id, _ in tasks]
+
+    loads = dict.fromkeys(member_ids, 0.0)
+    loads.update(
+        open_tasks.filter(assigned_to__in=member_ids).order_by().values('assigned_to')
+        .annotate(hours=Sum(_task_hours())).values_list('assigned_to', 'hours')
+    )
+    capacities = {**daily_capacities(member_ids), **(capacities or {})}
+    available = [member for member in member_ids if capacities[member] > 0]
+    if not available:
+        return [], [{'task_id': task_id, 'reason': 'No team member has any capacity'} for task_id, _ in tasks]
+
+    skill_names = {name.lower() for name in Skill.objects.values_list('name', flat=True)}
+    member_skills = defaultdict(set)
+    for member_id, skill in UserProductivity.skills.through.objects.filter(
+        userproductivity__user__in=member_ids
+    ).values_list('userproductivity__user_id', 'skill__name').distinct():
+        member_skills[member_id].add(skill.lower())
+    required_skills = defaultdict(set)
+    for task_id, tag in Task.tags.through.objects.filter(task__in=unassigned_tasks).values_list('task_id', 'tag__name'):
+        if tag.lower() in skill_names:
+            required_skills[task_id].add(tag.lower())
+
+    # Constrained tasks first, then longest first: both balance better
+    tasks.sort(key=lambda task: (not required_skills.get(task[0]), -task[1], task[0]))
+    avg_workload = sum(loads.values()) / len(loads)
+    heaps = MemberHeaps({member: loads[member] for member in available}, capacities, member_skills, max_load_days)
+    loads = heaps.loads
+    suggestions, unassigned = [], []
+    for task_id, hours in tasks:
+        skills = required_skills.get(task_id)
+        member = heaps.least_loaded(skills)
+        if member is None:
+            unassigned.append({'task_id': task_id, 'reason': f"No team member has any of: {', '.join(sorted(skills))}"})
+            continue
+        if max_load_days is not None and (loads[member] + hours) / capacities[member] > max_load_days:
+            # Whoever has the most room left fits it if anyone does
+            member = heaps.most_room(skills)
+            if (loads[member] + hours) / capacities[member] > max_load_days:
+                unassigned.append({'task_id': task_id, 'reason': 'Every eligible team member is at capacity'})
+                continue
+        suggestions.append({
+            'task_id': task_id,
+            'suggested_assignee': member,
+            'current_workload': loads[member],
+            'avg_workload': avg_workload,
+            'estimated_hours': hours,
+        })
+        heaps.add(member, hours)
+    return suggestions, unassigned
+
+
+def apply_task_assignments(project_id, suggestions):
+    """Assign every suggested task to its suggested member in one bulk insert."""
+    TaskAssignee = Task.assigned_to.through
+    member_ids = {suggestion['suggested_assignee'] for suggestion in suggestions}
+    with transaction.atomic():
+        TaskAssignee.objects.bulk_create([
+            TaskAssignee(task_id=suggestion['task_id'], user_id=suggestion['suggested_assignee'])
+            for suggestion in suggestions
+        ], ignore_conflicts=True)
+        # Bulk writes on the through table send no m2m_changed signals
+        def invalidate():
+            invalidate_team_stats([project_id], member_ids)
+            invalidate_insights_reports([project_id])
+        transaction.on_commit(invalidate)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -274,6 +274,12 @@ class TaskDependency(models.Model):
         ('finish_to_finish', 'Finish to Finish')
     ])
 
+    def save(self, *args, **kwargs):
+        # The cycle check run on pre_save locks the projects involved until
+        # the row is written, so both happen in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.task.title} depends on {self.dependency.title} ({self.get_dependency_type_display()})"
 
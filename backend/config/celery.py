@@ -42,6 +42,9 @@ redis_wrapper = RedisWrapper(os.environ.get('REDIS_URL', 'redis://localhost:6379
 @worker_process_init.connect
 def init_worker_process(sender=None, conf=None, **kwargs):
     redis_wrapper.connect()
+    if getattr(settings, 'AI_PRELOAD_NLP_PIPELINES', False):
+        from AI.pipelines import preload_nlp_pipelines
+        preload_nlp_pipelines()
 
 # Create the Celery app
 app = Celery('config')